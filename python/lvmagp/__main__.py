@@ -15,8 +15,6 @@ from clu.tools import cli_coro as cli_coro_lvm
 
 from sdsstools.daemonizer import DaemonGroup
 
-from lvmagp.actor.actor import LvmagpActor
-
 
 @click.group(cls=DefaultGroup, default="actor")
 @click.option(
@@ -54,6 +52,8 @@ def lvmagp(ctx, config_file, rmq_url, verbose):
 async def actor(ctx):
     """Runs the actor."""
 
+    from lvmagp.actor.actor import LvmagpActor
+
     config_file = ctx.obj["config_file"]
 
     lvmagp_obj = LvmagpActor.from_config(config_file, url=ctx.obj["rmq_url"], verbose=ctx.obj["verbose"])
@@ -62,5 +62,20 @@ async def actor(ctx):
     await lvmagp_obj.run_forever()
 
 
+@lvmagp.group(cls=DaemonGroup, prog="lvmagp_solver", workdir=os.getcwd())
+@click.pass_context
+@cli_coro_lvm
+async def solver(ctx):
+    """Runs the astrometry solver daemon shared by the actors of this node."""
+
+    from sdsstools import read_yaml_file
+    from lvmagp.images.processors.astrometry.solverd import SolverServer, DEFAULT_SOCKET
+
+    config = dict(read_yaml_file(ctx.obj["config_file"])["ag"].get("solver") or {})
+
+    server = SolverServer(config.pop("socket", DEFAULT_SOCKET), **config)
+    await server.serve()
+
+
 if __name__ == "__main__":
     lvmagp()
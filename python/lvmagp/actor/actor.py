@@ -1,6 +1,9 @@
 from __future__ import absolute_import, annotations, division, print_function
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from logging import DEBUG
+from typing import Any, Dict, List, Optional
 
 from sdsstools.logger import StreamFormatter  
 from sdsstools import get_logger, read_yaml_file
@@ -8,18 +11,15 @@ from sdsstools.logger import SDSSLogger
 
 from clu.actor import AMQPActor
 
-from lvmtipo.actors import lvm
-
 from lvmagp import __version__
+from lvmagp.exceptions import LvmagpActorMissing, LvmagpNotExistingHardware
 
 from .commands  import parser
 from .statemachine import ActorStateMachine, ActorState
+from .telescope import Telescope
 
 from cluplus.proxy import Proxy
 
-from lvmagp.focus import Focus
-from lvmagp.guide.worker import GuiderWorker
-
 
 __all__ = ["LvmagpActor"]
 
@@ -39,10 +39,9 @@ class LvmagpActor(AMQPActor):
     ):
         super().__init__(*args, version=__version__, **kwargs)
 
-        self.statemachine = ActorStateMachine()
-        self.telsubsystems = None
-        self.guider = None
-        self.focus = None
+        self.telescopes: Dict[str, Telescope] = {}
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.solver_queue = None
 
         
         self.schema = { #TODO add schema
@@ -72,17 +71,99 @@ class LvmagpActor(AMQPActor):
         """Start actor."""
         await super().start()
 
-        self.telsubsystems = await lvm.from_string(self.config["ag"]["system"]).start(self)
+        from lvmtipo.actors import lvm
+
+        # telescopes share the process, so the astrometry solver and its indexes, and the
+        # worker pool
+        guide_config = self.config["ag"].get("guide") or {}
+        if guide_config.get("pool_size"):
+            self.executor = ThreadPoolExecutor(guide_config["pool_size"],
+                                               thread_name_prefix="guide")
+        if guide_config.get("solver_queue"):
+            from lvmagp.guide.solverqueue import SolverQueue
+
+            self.solver_queue = SolverQueue(executor=self.executor, **guide_config["solver_queue"])
+
+        for name in self.systems:
+            telsubsystems = await lvm.from_string(name).start(self)
+            self.telescopes[name] = Telescope(name, telsubsystems, self.telescope_config(name),
+                                              self, executor=self.executor,
+                                              solver_queue=self.solver_queue)
 #        self.log.debug(f"{await self.telsubsystems.foc.status()}")
 
-        self.guider = GuiderWorker(self.telsubsystems, self.statemachine, actor=self, logger=self.log)
-        self.focus = Focus(self.telsubsystems, level=DEBUG)
+        # guider and focus pull in the whole image processing stack, they are built on first use
+        if self.config["ag"].get("warmup", False):
+            asyncio.get_running_loop().create_task(self.warmup())
 
         self.log.debug("Start done")
 
+    @property
+    def systems(self) -> List[str]:
+        """Names of the telescope subsystems, ag.system is a name or a list of names."""
+        system = self.config["ag"]["system"]
+        return [system] if isinstance(system, str) else list(system)
+
+    def telescope_config(self, name: str) -> Dict[str, Any]:
+        """The ag config of a telescope, ag.telescopes.<name> overrides the common entries."""
+        ag = self.config["ag"]
+        return {**ag, **(ag.get("telescopes") or {}).get(name, {})}
+
+    def telescope(self, name: Optional[str] = None) -> Telescope:
+        """Telescope by name, the first configured one if name is None."""
+        if not self.telescopes:
+            raise LvmagpActorMissing("actor not started")
+        if name is None:
+            return next(iter(self.telescopes.values()))
+        if name not in self.telescopes:
+            raise LvmagpNotExistingHardware(f"unknown telescope {name}, "
+                                            f"available {list(self.telescopes)}")
+        return self.telescopes[name]
+
+    # the first telescope, as before more than one telescope could be served
+    @property
+    def statemachine(self):
+        return self.telescope().statemachine
+
+    @property
+    def telsubsystems(self):
+        return self.telescope().telsubsystems
+
+    @property
+    def guider(self):
+        return self.telescope().guider
+
+    @property
+    def telemetry(self):
+        return self.telescope().telemetry
+
+    @property
+    def focus(self):
+        return self.telescope().focus
+
+    async def warmup(self):
+        """Import the processing stack and load the astrometry indexes in the background."""
+        try:
+            # touching the properties imports the processing stack
+            for telescope in self.telescopes.values():
+                telescope.guider
+                telescope.focus
+
+            from lvmagp.images.processors.astrometry import AstrometryDotLocal
+
+            await asyncio.get_running_loop().run_in_executor(None, AstrometryDotLocal.warmup)
+            self.log.debug("Warmup done")
+
+        except Exception as ex:
+            self.log.warning(f"warmup failed: {ex}")
+
 
     async def stop(self):
         """Stop actor."""
+        for telescope in self.telescopes.values():
+            await telescope.statemachine.stop()
+        if self.executor:
+            self.executor.shutdown(wait=False)
+
         await super().stop()
 
         self.log.debug("Stop done")
@@ -6,9 +6,8 @@
 # @Filename: __init__.py
 # @License: BSD 3-clause (http://www.opensource.org/licenses/BSD-3-Clause)
 
-import glob
 import importlib
-import os
+from functools import lru_cache
 
 import click
 from clu.command import Command
@@ -17,33 +16,64 @@ from clu.parsers.click import CluGroup, command_parser, help_, ping, version, ge
 from cluplus.parsers.click import __commands
 
 
-@click.group(cls=CluGroup)
-def parser(*args):
-    pass
+# Command modules in this package and the commands they add to the parser.
+# New command modules have to be listed here, there is no directory scanning.
+COMMAND_MODULES = {
+    "focus": ["focusOffset", "focusFine", "focusConfirm", "focusNominal"],
+    "guide": ["guideStart", "guidePause", "guideStop"],
+    "status": ["status"],
+    "telemetry": ["guideTelemetry"],
+}
 
+_command_module = {cmd: mod for mod, cmds in COMMAND_MODULES.items() for cmd in cmds}
 
-parser.add_command(ping)
-parser.add_command(version)
-parser.add_command(help_)
-parser.add_command(get_schema)
-parser.add_command(__commands)
+# Commands that enumerate the parser and need every module loaded.
+_listing_commands = ("help", "__commands")
+
+
+@lru_cache(maxsize=None)
+def load_command_module(name: str):
+    """Import a command module, which registers its commands with the parser."""
+    return importlib.import_module(f"{__name__}.{name}")
+
+
+def load_command_modules():
+    """Import all command modules."""
+    for name in COMMAND_MODULES:
+        load_command_module(name)
 
 
-# Autoimport all modules in this directory so that they are added to the parser.
+class LazyCluGroup(CluGroup):
+    """CluGroup that imports a command module only when one of its commands is used.
 
-exclusions = ["__init__.py"]
+    Unknown names and commands that list the parser, like help, load all modules first.
+    """
 
-cwd = os.getcwd()
-os.chdir(os.path.dirname(os.path.realpath(__file__)))
+    def get_command(self, ctx, cmd_name):
+        if cmd_name in _command_module:
+            load_command_module(_command_module[cmd_name])
+        elif cmd_name not in self.commands or cmd_name in _listing_commands:
+            load_command_modules()
+        return super().get_command(ctx, cmd_name)
 
-files = [
-    file_ for file_ in glob.glob("**/*.py", recursive=True) if file_ not in exclusions
-]
+    def list_commands(self, ctx):
+        load_command_modules()
+        return super().list_commands(ctx)
 
-for file_ in files:
-    modname = file_[0:-3].replace("/", ".")
-    mod = importlib.import_module(
-        "lvmagp.actor.commands." + modname
-    )  # changged by CK 2021/03/30
 
-os.chdir(cwd)
+def tel_option(f):
+    """Option selecting the telescope of a command, the first configured one by default."""
+    return click.option("--tel", type=str, default=None,
+                        help="Telescope subsystem, default the first configured one.")(f)
+
+
+@click.group(cls=LazyCluGroup)
+def parser(*args):
+    pass
+
+
+parser.add_command(ping)
+parser.add_command(version)
+parser.add_command(help_)
+parser.add_command(get_schema)
+parser.add_command(__commands)
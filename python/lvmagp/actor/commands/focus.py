@@ -1,30 +1,32 @@
 import asyncio
 
 import click
-import numpy as np
 
 from logging import DEBUG, INFO
+from math import nan
 from clu.command import Command
 
 from cluplus.proxy import unpack
 
-from . import parser
+from . import parser, tel_option
 
 from lvmagp.actor.statemachine import ActorState, ActorStateMachine
-from lvmagp.focus import Focus
 from lvmagp.exceptions import LvmagpIsNotIdle
 
 
 @parser.command("focusOffset")
 @click.argument("OFFSET", type=float)
+@tel_option
 async def focusOffset(
     command: Command,
     offset: float,
+    tel: str,
 ):
     """Focus offest"""
     try:
-        actor_statemachine = command.actor.statemachine
-        focus = command.actor.focus
+        telescope = command.actor.telescope(tel)
+        actor_statemachine = telescope.statemachine
+        focus = telescope.focus
 
         await focus.offset(offset)
          
@@ -36,17 +38,24 @@ async def focusOffset(
 
 @parser.command("focusFine")
 @click.argument("EXPOTIME", type=float, default=10.0)
+@click.option("--temperature", type=float, default=nan)
+@click.option("--guess", type=float, default=None, help="Center of the sweep, stored if None.")
+@tel_option
 async def focusFine(
     command: Command,
     expotime: float,
+    temperature: float,
+    guess: float,
+    tel: str,
 ):
     """Focus fine"""
     try:
         logger = command.actor.log
-        actor_statemachine = command.actor.statemachine
-        telsubsystems = command.actor.telsubsystems
+        telescope = command.actor.telescope(tel)
+        actor_statemachine = telescope.statemachine
+        telsubsystems = telescope.telsubsystems
 
-        focus = command.actor.focus
+        focus = telescope.focus
 
         if not actor_statemachine.isIdle():
             return command.fail(error = LvmagpIsNotIdle(), state = actor_statemachine.state.value)
@@ -55,7 +64,7 @@ async def focusFine(
         command.info(state = actor_statemachine.state.value)
         
         logger.debug(f"start focusing {actor_statemachine.state.value} {await telsubsystems.foc.status()}")
-        await focus.fine(expotime)
+        await focus.fine(guess, exposure_time=expotime, temperature=temperature)
     
     except Exception as e:
         return command.fail(error=e)
@@ -65,16 +74,58 @@ async def focusFine(
     return command.finish(state = actor_statemachine.state.value)
 
 
+@parser.command("focusConfirm")
+@click.argument("TEMPERATURE", type=float)
+@click.argument("EXPOTIME", type=float, default=10.0)
+@tel_option
+async def focusConfirm(
+    command: Command,
+    temperature: float,
+    expotime: float,
+    tel: str,
+):
+    """Focus confirmation sweep around the nominal focus"""
+    try:
+        telescope = command.actor.telescope(tel)
+    except Exception as e:
+        return command.fail(error=e)
+
+    try:
+        actor_statemachine = telescope.statemachine
+        focus = telescope.focus
+
+        if not actor_statemachine.isIdle():
+            return command.fail(error = LvmagpIsNotIdle(), state = actor_statemachine.state.value)
+
+        actor_statemachine.state = ActorState.FOCUS
+        command.info(state = actor_statemachine.state.value)
+
+        await focus.confirm(temperature, exposure_time=expotime)
+
+    except Exception as e:
+        actor_statemachine.state = ActorState.IDLE
+        return command.fail(error=e)
+
+    actor_statemachine.state = ActorState.IDLE
+
+    return command.finish(state = actor_statemachine.state.value)
+
+
 @parser.command("focusNominal")
+@click.argument("TEMPERATURE", type=float)
+@tel_option
 async def focusNominal(
     command: Command,
+    temperature: float,
+    tel: str,
 ):
     """Focus nominal"""
     try:
-        actor_statemachine = command.actor.statemachine
-        focus = command.actor.focus
+        telescope = command.actor.telescope(tel)
+        actor_statemachine = telescope.statemachine
+        focus = telescope.focus
 
-        await focus.nominal()
+        await focus.nominal(temperature)
 
     except Exception as e:
         return command.fail(error=e)
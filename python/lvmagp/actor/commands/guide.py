@@ -1,24 +1,23 @@
 import asyncio
 
 import click
-import numpy as np
 import json
 
 from logging import DEBUG
-from math import nan
+from math import nan, isnan
 from functools import partial
+from typing import TYPE_CHECKING
 
 from clu.command import Command
 from clu.actor import BaseActor
 
-from . import parser
-
-from astropy.coordinates import SkyCoord, Angle
+from . import parser, tel_option
 
 from lvmagp.actor.statemachine import ActorState, ActorStateMachine
 from lvmagp.exceptions import LvmagpIsNotIdle
-from lvmagp.guide.worker import GuiderWorker
-from lvmagp.json_serializers import serialize_skycoord
+
+if TYPE_CHECKING:
+    from astropy.coordinates import SkyCoord
 
 
 async def callback(actor:BaseActor,
@@ -26,24 +25,37 @@ async def callback(actor:BaseActor,
                    state:ActorState,
                    filenames:list,
                    images:list,
-                   position:SkyCoord,
+                   position:"SkyCoord",
                    correction:list=None,
-                   error:Exception=None):
+                   quality:list=None,
+                   seeing:dict=None,
+                   error:Exception=None,
+                   telescope:str=None):
+
+    from lvmagp.json_serializers import serialize_skycoord
 
-    status = {"isreference": is_reference,
+    status = {"telescope": telescope,
+              "isreference": is_reference,
               "state": state.name,
               "filenames": filenames,
-              "catalog": [json.loads(img.catalog.to_pandas().to_json()) for img in images] if images else None,
+              "catalog": [json.loads(img.catalog.to_pandas().to_json())
+                          if img.catalog is not None else None
+                          for img in images] if images else None,
               "position": serialize_skycoord(position) if position else None
              }
 
     if not is_reference:
         status.update({"correction": correction})
 
+    if quality:
+        status.update({"quality": quality})
+
+    if seeing:
+        status.update({"seeing": seeing})
+
 #    if error:
 #        status.update({"failure": error})
 
-    print(status)
     actor.write("i", **status, validate = False)
 
 
@@ -53,6 +65,13 @@ async def callback(actor:BaseActor,
 @click.argument("deg_d", type=float, default=nan)
 @click.option("--pause", type=bool, default=False)
 @click.option("--force", type=bool, default=True)
+@click.option("--acquire", type=bool, default=False,
+              help="Bring the telescope on target before guiding.")
+@click.option("--tolerance", type=float, default=2.0, help="Acquisition tolerance in arcsec.")
+@click.option("--iterations", type=int, default=5, help="Maximum number of acquisition frames.")
+@click.option("--camera", "cameras", type=str, multiple=True,
+              help="Guide with this camera only, can be repeated.")
+@tel_option
 async def guideStart(
     command: Command,
     exptime: float,
@@ -60,15 +79,23 @@ async def guideStart(
     deg_d: float,
     pause: bool,
     force: bool,
+    acquire: bool,
+    tolerance: float,
+    iterations: int,
+    cameras: tuple,
+    tel: str,
 ):
     """Start guiding"""
+    from lvmagp.json_serializers import serialize_skycoord
+
     logger = command.actor.log
-    statemachine = command.actor.statemachine
-    telsubsystems = command.actor.telsubsystems
+    telescope = command.actor.telescope(tel)
+    statemachine = telescope.statemachine
+    telsubsystems = telescope.telsubsystems
 
     logger.debug(f"start guiding")
 
-    guider = command.actor.guider
+    guider = telescope.guider
 
     try:
         if not statemachine.isIdle():
@@ -79,11 +106,25 @@ async def guideStart(
 
         logger.debug(f"start guiding {statemachine.state}")
 
+        guider.cameras = list(cameras) if cameras else guider.default_cameras
+        guide_callback = partial(callback, command.actor, telescope=telescope.name)
+
+        if acquire:
+            if isnan(ra_h) or isnan(deg_d):
+                return command.fail(error="acquisition needs ra_h and deg_d")
+            await guider.acquire(ra_h, deg_d,
+                                 exptime=exptime,
+                                 tolerance=tolerance,
+                                 iterations=iterations,
+                                 callback=guide_callback)
+
         pos, filenames = await guider.reference(exptime,
-                                                pause,
-                                                callback=partial(callback, command.actor))
+                                                ra_h=ra_h,
+                                                deg_d=deg_d,
+                                                pause=pause,
+                                                callback=guide_callback)
 
-        await statemachine.start(guider.loop(callback=partial(callback, command.actor)))
+        await statemachine.start(guider.loop(callback=guide_callback))
 
         logger.debug(f"started guiding {statemachine.state}")
 
@@ -97,19 +138,19 @@ async def guideStart(
 
 @parser.command("guidePause")
 @click.argument("pause", type=bool, default=True)
+@tel_option
 async def guidePause(
     command: Command,
     pause: bool,
+    tel: str,
 ):
     """Pause guiding"""
     logger = command.actor.log
-    statemachine = command.actor.statemachine
-    telsubsystems = command.actor.telsubsystems
+    telescope = command.actor.telescope(tel)
+    statemachine = telescope.statemachine
+    telsubsystems = telescope.telsubsystems
 
     try:
-        logger = command.actor.log
-        statemachine = command.actor.statemachine
-
         await statemachine.pause(pause)
 
         logger.debug(f"state guiding {statemachine.state}")
@@ -121,13 +162,16 @@ async def guidePause(
 
 
 @parser.command("guideStop")
+@tel_option
 async def guideStop(
     command: Command,
+    tel: str,
 ):
     """Stop guiding"""
     logger = command.actor.log
-    statemachine = command.actor.statemachine
-    telsubsystems = command.actor.telsubsystems
+    telescope = command.actor.telescope(tel)
+    statemachine = telescope.statemachine
+    telsubsystems = telescope.telsubsystems
 
     try:
         logger.debug(f"stop guiding {statemachine.state}")
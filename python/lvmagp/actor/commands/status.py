@@ -1,23 +1,39 @@
 import asyncio
 
 import click
-import numpy as np
 from clu.command import Command
 
-from . import parser
+from . import parser, tel_option
 from lvmagp.actor.statemachine import ActorState, ActorStateMachine
 from lvmagp import exceptions
 
 
 @parser.command("status")
+@tel_option
 async def status(
     command: Command,
+    tel: str,
 ):
     """Status information"""
-    actor_statemachine = command.actor.statemachine
+    telescope = command.actor.telescope(tel)
+    actor_statemachine = telescope.statemachine
     
     status = {
+        "telescope": telescope.name,
         "state": actor_statemachine.state.value,
     }    
 
+    # only report seeing if the guider exists, status must not build the processing stack
+    guider = telescope._guider
+    if guider is not None and guider.seeing is not None:
+        status["seeing"] = guider.seeing.status()
+    if guider is not None:
+        status["exposure"] = guider.exposure_stats.to_dict()
+        solver_queue = getattr(guider.offest_calc, "solver_queue", None)
+        if solver_queue is not None:
+            status["solver_queue"] = solver_queue.to_dict()
+        astrometry = getattr(guider.offest_calc, "source_astrometry", None)
+        if getattr(astrometry, "client", None) is not None:
+            status["solver"] = {"fallback_solves": astrometry.fallback_solves}
+
     return command.finish(status)
@@ -0,0 +1,47 @@
+import base64
+import time
+
+import click
+from clu.command import Command
+
+from . import parser, tel_option
+
+
+@parser.command("guideTelemetry")
+@click.option("--start", type=float, default=None, help="Start of the time range as unix time.")
+@click.option("--end", type=float, default=None, help="End of the time range as unix time.")
+@click.option("--last", type=float, default=None, help="Export the last seconds, overrides start.")
+@click.option("--format", "fmt", type=click.Choice(["npy", "parquet"]), default="npy")
+@click.option("--filename", type=str, default=None, help="Write to this file on the actor host.")
+@tel_option
+async def guideTelemetry(
+    command: Command,
+    start: float,
+    end: float,
+    last: float,
+    fmt: str,
+    filename: str,
+    tel: str,
+):
+    """Export the guide telemetry of a time range"""
+    try:
+        telemetry = command.actor.telescope(tel).telemetry
+
+        if last is not None:
+            start = time.time() - last
+        start = -float("inf") if start is None else start
+        end = float("inf") if end is None else end
+
+        data = telemetry.export(start, end, format=fmt)
+
+        if filename:
+            with open(filename, "wb") as f:
+                f.write(data)
+            return command.finish(filename=filename, format=fmt, size=len(data),
+                                  cameras=telemetry.cameras)
+
+        return command.finish(data=base64.b64encode(data).decode(), format=fmt,
+                              cameras=telemetry.cameras)
+
+    except Exception as e:
+        return command.fail(error=e)
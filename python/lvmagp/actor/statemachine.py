@@ -21,14 +21,20 @@ class ActorState(enum.Enum):
     STOP = "STOP"
     PAUSE = "PAUSE"
     GUIDE = "GUIDE"
+    ACQUIRE = "ACQUIRE"
     FOCUS = "FOCUS"
 
 class WrongStateTypeException(Exception):
     """The state should be of type ActorState"""
 
+class StateInterrupted(Exception):
+    """A stage was interrupted because a stop was requested."""
+
 class ActorStateMachine:
     def __init__(self):
         self.task = None
+        self.stop_timeout = 5
+        self._stop_event = None
         self.state = ActorState.IDLE
 
     def isIdle(self):
@@ -42,9 +48,48 @@ class ActorStateMachine:
     def state(self, s):
         if isinstance(s, ActorState):
             self.__state = s
+            # the event is created in the running loop on first use
+            if self._stop_event is not None:
+                if s is ActorState.STOP:
+                    self._stop_event.set()
+                else:
+                    self._stop_event.clear()
             return
         raise WrongStateTypeException()
-            
+
+    @property
+    def stop_event(self):
+        """Event set while a stop is requested."""
+        if self._stop_event is None:
+            self._stop_event = asyncio.Event()
+            if self.state is ActorState.STOP:
+                self._stop_event.set()
+        return self._stop_event
+
+    def checkpoint(self):
+        """Cancellation point between stages, raises StateInterrupted if a stop was requested."""
+        if self.state is ActorState.STOP:
+            raise StateInterrupted("stop requested")
+
+    async def interruptible(self, aw):
+        """Await aw, cancel it and raise StateInterrupted as soon as a stop is requested."""
+        self.checkpoint()
+        task = asyncio.ensure_future(aw)
+        stop = asyncio.ensure_future(self.stop_event.wait())
+        try:
+            await asyncio.wait({task, stop}, return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+        finally:
+            stop.cancel()
+
+        if not task.done():
+            task.cancel()
+            await asyncio.wait({task})
+            raise StateInterrupted("stop requested")
+        return task.result()
+
     async def start(self, coro):
         await self.stop()
         self.task = asyncio.create_task(coro)
@@ -61,15 +106,18 @@ class ActorStateMachine:
 
     async def stop(self):
         if not self.task:
+            # reference and acquisition run in the command, they stop at their next stage
+            if self.state in (ActorState.START, ActorState.ACQUIRE):
+                self.state = ActorState.STOP
             return
 
         self.state = ActorState.STOP
 
-        try:
-            await asyncio.wait_for(self.task, timeout=5)
-
-        except asyncio.TimeoutError:
+        # the running stage is interrupted, the task should finish almost at once
+        done, _ = await asyncio.wait({self.task}, timeout=self.stop_timeout)
+        if not done:
             self.task.cancel()
+            await asyncio.wait({self.task})
 
         self.state = ActorState.IDLE
         self.task = None
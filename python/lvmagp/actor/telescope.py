@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+from concurrent.futures import Executor
+from logging import DEBUG
+from typing import Any, Dict, Optional
+
+from .statemachine import ActorStateMachine
+
+
+__all__ = ["Telescope"]
+
+
+class Telescope:
+    """Everything the actor keeps per telescope.
+
+    The subsystems, statemachine, guider, focus and telemetry of one telescope, the
+    actor can serve several of them. Guider and focus are created on first use.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        telsubsystems: Any,
+        config: Dict[str, Any],
+        actor: Any,
+        executor: Optional[Executor] = None,
+        solver_queue: Optional[Any] = None,
+    ):
+        """Init new telescope.
+
+        Args:
+            name: Name of the telescope subsystem, e.g. sci.
+            telsubsystems: Started lvm.TelSubSystem.
+            config: The "ag" section of the actor config for this telescope.
+            actor: The actor.
+            executor: Executor for the image processing shared by all telescopes.
+            solver_queue: SolverQueue shared by all telescopes, each calc has its own if None.
+        """
+        self.name = name
+        self.telsubsystems = telsubsystems
+        self.config = config
+        self.actor = actor
+        self.log = actor.log
+        self.executor = executor
+        self.solver_queue = solver_queue
+        self.statemachine = ActorStateMachine()
+        self._guider = None
+        self._focus = None
+        self._telemetry = None
+
+    @property
+    def guider(self):
+        """Guider worker, created on first use."""
+        if self._guider is None:
+            from lvmagp.guide.worker import GuiderWorker
+            from lvmagp.guide.factory import (create_guide_stack, create_quality_check,
+                                              create_seeing_monitor)
+
+            guide_config = self.config.get("guide") or {}
+            offset_calc, offset_mount = create_guide_stack(guide_config,
+                                                           self.telsubsystems.pwi,
+                                                           executor=self.executor,
+                                                           solver_queue=self.solver_queue,
+                                                           logger=self.log)
+            self._guider = GuiderWorker(self.telsubsystems, self.statemachine, actor=self.actor,
+                                        logger=self.log,
+                                        offset_calc=offset_calc, offset_mount=offset_mount,
+                                        cameras=guide_config.get("cameras"),
+                                        quality_check=create_quality_check(guide_config),
+                                        seeing=create_seeing_monitor(guide_config),
+                                        telemetry=self.telemetry,
+                                        **guide_config.get("exposure", {}))
+        return self._guider
+
+    @property
+    def telemetry(self):
+        """Ring buffer of the guide telemetry, created on first use."""
+        if self._telemetry is None:
+            from lvmagp.guide.telemetry import GuideTelemetry
+
+            self._telemetry = GuideTelemetry(self.config.get("telemetry_size", 20000))
+        return self._telemetry
+
+    @property
+    def focus(self):
+        """Focus system, created on first use."""
+        if self._focus is None:
+            from lvmagp.focus import Focus
+            from lvmagp.focus.focuslog import FocusLog
+
+            focus_log = self.config.get("focus_log")
+            self._focus = Focus(self.telsubsystems,
+                                focus_log=FocusLog(focus_log) if focus_log else None,
+                                level=DEBUG)
+        return self._focus
@@ -60,6 +60,18 @@ class LvmagpIsNotIdle(LvmagpError):
     """Focusing not allowed while guiding."""
 
 
+class LvmagpFrameRejected(LvmagpError):
+    """Frame failed the quality check."""
+
+
+class LvmagpExposureFailed(LvmagpError):
+    """Guide cameras did not deliver a frame, all retries failed or timed out."""
+
+
+class LvmagpSolveDropped(LvmagpError):
+    """Solve dropped from the solver queue, superseded by a newer frame or past its deadline."""
+
+
 class LvmagpTelescopeError(LvmagpError):
     """Telescope(mount) failed. Check the mount hardware."""
 
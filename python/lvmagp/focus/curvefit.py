@@ -1,7 +1,165 @@
-from typing import List, Tuple
+import warnings
+from typing import List, Tuple, Optional
 
 import numpy as np
-from scipy.optimize import curve_fit
+from scipy.optimize import least_squares
+
+
+def hyperbola(x: np.ndarray, a: float, b: float, c: float) -> np.ndarray:
+    """Hyperbola b * sqrt((x - c)^2 / a^2 + 1) with minimum b at c."""
+    return b * np.sqrt((x - c) ** 2 / a**2 + 1.0)
+
+
+def hyperbola_jacobian(x: np.ndarray, a: float, b: float, c: float) -> np.ndarray:
+    """Analytic jacobian of the hyperbola with respect to a, b and c.
+
+    Returns:
+        Array of shape (len(x), 3).
+    """
+    u = (x - c) / a
+    s = np.sqrt(u**2 + 1.0)
+    return np.column_stack([-b * u**2 / (a * s), s, -b * u / (a * s)])
+
+
+def guess_hyperbolas(x_arr: np.ndarray, y_arr: np.ndarray, y_err: np.ndarray) -> np.ndarray:
+    """Closed form initial estimates for many hyperbolas at once.
+
+    The squared hyperbola is a parabola, y^2 = A x^2 + B x + C, so a weighted linear least squares
+    fit on the squared widths gives a, b and c directly. Curves where this fails fall back to the
+    minimum of the data.
+
+    Args:
+        x_arr: X data of shape (n_curves, n_points), may be padded with NaN.
+        y_arr: Y data of shape (n_curves, n_points), may be padded with NaN.
+        y_err: Y errors of shape (n_curves, n_points).
+
+    Returns:
+        Initial (a, b, c) of shape (n_curves, 3).
+    """
+    x_arr, y_arr, y_err = (np.atleast_2d(np.asarray(v, dtype=float))
+                           for v in (x_arr, y_arr, y_err))
+    valid = np.isfinite(x_arr) & np.isfinite(y_arr) & np.isfinite(y_err) & (y_err > 0)
+    x = np.where(valid, x_arr, 0.0)
+    y = np.where(valid, y_arr, 0.0)
+
+    # weights of squared widths, sigma(y^2) = 2 y sigma(y)
+    w = np.where(valid, 1.0 / np.maximum(2.0 * np.abs(y) * np.where(valid, y_err, 1.0), 1e-12),
+                 0.0) ** 2
+
+    # center x to keep the normal equations well conditioned
+    x0 = np.sum(x * valid, axis=1) / np.maximum(np.sum(valid, axis=1), 1)
+    xc = np.where(valid, x - x0[:, None], 0.0)
+
+    V = np.stack([xc**2, xc, np.ones_like(xc)], axis=-1)
+    M = np.einsum("ni,nij,nik->njk", w, V, V)
+    r = np.einsum("ni,nij,ni->nj", w, V, y**2)
+
+    with np.errstate(all="ignore"):
+        solvable = np.abs(np.linalg.det(M)) > 1e-300
+        coeffs = np.full((len(x), 3), np.nan)
+        if solvable.any():
+            coeffs[solvable] = np.linalg.solve(M[solvable], r[solvable][..., None])[..., 0]
+
+        A, B, C = coeffs.T
+        c = -B / (2.0 * A)
+        b2 = C - A * c**2
+        a = np.sqrt(b2 / A)
+        b = np.sqrt(b2)
+        c = c + x0
+
+    # fallback for curves without a valid parabola, minimum of data and slope from the span
+    ymasked = np.where(valid, y, np.inf)
+    imin = np.argmin(ymasked, axis=1)
+    rows = np.arange(len(x))
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        xv = np.where(valid, x_arr, np.nan)
+        lo, hi = np.nanmin(xv, axis=1), np.nanmax(xv, axis=1)
+    span = hi - lo
+
+    bad = ~(np.isfinite(a) & np.isfinite(b) & np.isfinite(c) & (A > 0) & (b2 > 0)
+            & (c >= lo - span) & (c <= hi + span))
+    b = np.where(bad, ymasked[rows, imin], b)
+    c = np.where(bad, x_arr[rows, imin], c)
+    a = np.where(bad, np.maximum(span, 1e-6) / 4.0, a)
+
+    return np.column_stack([a, b, c])
+
+
+def _fit(x: np.ndarray, y: np.ndarray, sigma: np.ndarray, p0: np.ndarray,
+         f_scale: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Robust bounded fit of a single hyperbola, returns parameters and covariance."""
+
+    # zero errors would give infinite weights
+    positive = sigma > 0
+    sigma = np.where(positive, sigma, np.median(sigma[positive]) if positive.any() else 1.0)
+
+    span = np.ptp(x)
+    lower = [1e-6 * max(span, 1.0), 0.0, np.min(x) - span]
+    upper = [np.inf, np.inf, np.max(x) + span]
+    p0 = np.clip(p0, np.add(lower, 1e-12), np.subtract(upper, 1e-12))
+
+    res = least_squares(
+        lambda p: (hyperbola(x, *p) - y) / sigma,
+        p0,
+        jac=lambda p: hyperbola_jacobian(x, *p) / sigma[:, None],
+        bounds=(lower, upper),
+        loss="soft_l1",
+        f_scale=f_scale,
+        method="trf",
+    )
+    if not res.success or not np.all(np.isfinite(res.x)):
+        raise RuntimeError(f"Hyperbola fit failed: {res.message}")
+
+    # covariance from jacobian, scaled by reduced chi^2 like curve_fit does
+    try:
+        cov = np.linalg.inv(res.jac.T @ res.jac)
+    except np.linalg.LinAlgError:
+        raise RuntimeError("Singular hyperbola fit.")
+    dof = len(x) - len(p0)
+    if dof > 0:
+        cov *= np.sum(res.fun**2) / dof
+
+    return res.x, cov
+
+
+def fit_hyperbolas(
+    x_arr: np.ndarray, y_arr: np.ndarray, y_err: np.ndarray, f_scale: float = 1.0
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Fit many hyperbolas, e.g. for every camera or image region, in one call
+
+    Initial estimates are computed for all curves at once, every curve is then refined
+    independently so a single bad curve does not spoil the others.
+
+    Args:
+        x_arr: X data of shape (n_curves, n_points), padded with NaN for shorter curves.
+        y_arr: Y data of shape (n_curves, n_points).
+        y_err: Y errors of shape (n_curves, n_points).
+        f_scale: Soft margin of the robust loss in units of y_err.
+
+    Returns:
+        Arrays of minima and their uncertainties, NaN where the fit failed.
+    """
+    x_arr, y_arr, y_err = (np.atleast_2d(np.asarray(v, dtype=float))
+                           for v in (x_arr, y_arr, y_err))
+    p0 = guess_hyperbolas(x_arr, y_arr, y_err)
+
+    foc = np.full(len(x_arr), np.nan)
+    err = np.full(len(x_arr), np.nan)
+    for idx in range(len(x_arr)):
+        valid = (np.isfinite(x_arr[idx]) & np.isfinite(y_arr[idx]) & np.isfinite(y_err[idx])
+                 & (y_err[idx] > 0))
+        if np.sum(valid) < 3:
+            continue
+        try:
+            coeffs, cov = _fit(x_arr[idx, valid], y_arr[idx, valid], y_err[idx, valid], p0[idx],
+                               f_scale)
+        except RuntimeError:
+            continue
+        foc[idx] = coeffs[2]
+        err[idx] = np.sqrt(cov[2][2])
+
+    return foc, err
 
 
 def fit_hyperbola(x_arr: List[float], y_arr: List[float], y_err: List[float]) -> Tuple[float, float]:
@@ -16,22 +174,144 @@ def fit_hyperbola(x_arr: List[float], y_arr: List[float], y_err: List[float]) ->
         Minimum of hyperbola and its uncertainty
     """
 
-    # initial guess
-    ic = np.argmin(y_arr)
-    ix = np.argmax(y_arr)
-    b = y_arr[ic]
-    c = x_arr[ic]
-    x = x_arr[ix]
-    slope = np.abs((y_arr[ic] - y_arr[ix]) / (c - x))
-    a = b / slope
+    x, y, sigma = (np.asarray(v, dtype=float) for v in (x_arr, y_arr, y_err))
+    if len(x) < 3:
+        raise RuntimeError("Need at least three points to fit a hyperbola.")
 
-    # init
-    p0 = [a, b, c]
+    # initial guess
+    p0 = guess_hyperbolas(x, y, sigma)[0]
 
     # fit
-    coeffs, cov = curve_fit(
-        lambda xx, aa, bb, cc: bb * np.sqrt((xx - cc) ** 2 / aa**2 + 1.0), x_arr, y_arr, sigma=y_err, p0=p0
-    )
+    coeffs, cov = _fit(x, y, sigma, p0, f_scale=1.0)
 
     # return result
-    return coeffs[2], cov[2][2]
+    return coeffs[2], np.sqrt(cov[2][2])
+
+
+def fit_hyperbola_joint(
+    x_arrs: List[List[float]],
+    y_arrs: List[List[float]],
+    y_errs: List[List[float]],
+    offsets: Optional[List[float]] = None,
+    f_scale: float = 1.0,
+) -> Tuple[float, float, np.ndarray]:
+    """Fit hyperbolas of several cameras jointly with a shared focus minimum
+
+    Camera k is modelled as b_k * sqrt((x - c - d_k)^2 / a^2 + 1). The asymptotic width a is set by
+    the optics and shared, b_k is the minimum width of every camera and d_k its focus offset. Free
+    offsets are constrained to sum up to zero, so c is the best common focus of all cameras.
+
+    Args:
+        x_arrs: X data for every camera.
+        y_arrs: Y data for every camera.
+        y_errs: Y errors for every camera.
+        offsets: Known focus offsets of the cameras, fitted if None.
+        f_scale: Soft margin of the robust loss in units of y_err.
+
+    Cameras with less than two valid points are left out of the fit, their offset is NaN.
+
+    Returns:
+        Shared focus, its uncertainty and the offsets of the cameras.
+    """
+
+    # drop under-sampled cameras and fit the others
+    counts = [np.sum(np.isfinite(np.asarray(xv, dtype=float))
+                     & np.isfinite(np.asarray(yv, dtype=float))
+                     & np.isfinite(np.asarray(ev, dtype=float)))
+              for xv, yv, ev in zip(x_arrs, y_arrs, y_errs)]
+    keep = [k for k, n in enumerate(counts) if n >= 2]
+    if len(keep) < len(x_arrs):
+        if not keep:
+            raise RuntimeError("Not enough points for a joint hyperbola fit.")
+        c, c_err, d = fit_hyperbola_joint([x_arrs[k] for k in keep],
+                                          [y_arrs[k] for k in keep],
+                                          [y_errs[k] for k in keep],
+                                          offsets=None if offsets is None
+                                          else [offsets[k] for k in keep],
+                                          f_scale=f_scale)
+        all_offsets = np.full(len(x_arrs), np.nan)
+        all_offsets[keep] = d
+        return c, c_err, all_offsets
+
+    ncam = len(x_arrs)
+    x = np.concatenate([np.asarray(v, dtype=float) for v in x_arrs])
+    y = np.concatenate([np.asarray(v, dtype=float) for v in y_arrs])
+    sigma = np.concatenate([np.asarray(v, dtype=float) for v in y_errs])
+    cam = np.concatenate([np.full(len(v), k) for k, v in enumerate(x_arrs)])
+
+    valid = np.isfinite(x) & np.isfinite(y) & np.isfinite(sigma)
+    x, y, sigma, cam = x[valid], y[valid], sigma[valid], cam[valid]
+    positive = sigma > 0
+    sigma = np.where(positive, sigma, np.median(sigma[positive]) if positive.any() else 1.0)
+
+    fixed = offsets is not None
+    nparams = 2 + ncam + (0 if fixed else ncam - 1)
+    if len(x) <= nparams:
+        raise RuntimeError("Not enough points for a joint hyperbola fit.")
+
+    # initial guess from independent closed form estimates
+    npoints = max(len(v) for v in x_arrs)
+    def pad(arrs):
+        return np.array([np.pad(np.asarray(v, dtype=float), (0, npoints - len(v)),
+                                constant_values=np.nan) for v in arrs])
+
+    p0 = guess_hyperbolas(pad(x_arrs), pad(y_arrs), pad(y_errs))
+    if fixed:
+        d0 = np.asarray(offsets, dtype=float)
+        c0 = np.mean(p0[:, 2] - d0)
+        start = np.concatenate([[np.median(p0[:, 0]), c0], p0[:, 1]])
+    else:
+        c0 = np.mean(p0[:, 2])
+        start = np.concatenate([[np.median(p0[:, 0]), c0], p0[:, 1], p0[1:, 2] - c0])
+
+    def unpack(p):
+        a, c, b = p[0], p[1], p[2:2 + ncam]
+        if fixed:
+            d = d0
+        else:
+            d = np.concatenate([[-np.sum(p[2 + ncam:])], p[2 + ncam:]])
+        return a, c, b, d
+
+    def residuals(p):
+        a, c, b, d = unpack(p)
+        return (hyperbola(x - d[cam], a, b[cam], c) - y) / sigma
+
+    def jacobian(p):
+        a, c, b, d = unpack(p)
+        jh = hyperbola_jacobian(x - d[cam], a, 1.0, c)
+        bk = b[cam]
+        J = np.zeros((len(x), nparams))
+        J[:, 0] = bk * jh[:, 0]
+        J[:, 1] = bk * jh[:, 2]
+        J[np.arange(len(x)), 2 + cam] = jh[:, 1]
+        if not fixed:
+            # d_k for k >= 1 is a parameter, d_0 is minus their sum
+            for k in range(1, ncam):
+                J[cam == k, 1 + ncam + k] = bk[cam == k] * jh[cam == k, 2]
+            J[cam == 0, 2 + ncam:] = -(bk[cam == 0] * jh[cam == 0, 2])[:, None]
+        return J / sigma[:, None]
+
+    span = np.ptp(x)
+    lower = np.concatenate([[1e-6 * max(span, 1.0), np.min(x) - span], np.zeros(ncam),
+                            np.full(nparams - 2 - ncam, -span)])
+    upper = np.concatenate([[np.inf, np.max(x) + span], np.full(ncam, np.inf),
+                            np.full(nparams - 2 - ncam, span)])
+    start = np.clip(np.nan_to_num(start), lower + 1e-12, upper - 1e-12)
+
+    res = least_squares(residuals, start, jac=jacobian, bounds=(lower, upper), loss="soft_l1",
+                        f_scale=f_scale, method="trf")
+    if not res.success or not np.all(np.isfinite(res.x)):
+        raise RuntimeError(f"Joint hyperbola fit failed: {res.message}")
+
+    try:
+        cov = np.linalg.inv(res.jac.T @ res.jac)
+    except np.linalg.LinAlgError:
+        raise RuntimeError("Singular joint hyperbola fit.")
+    cov *= np.sum(res.fun**2) / (len(x) - nparams)
+
+    _, c, _, d = unpack(res.x)
+    return float(c), float(np.sqrt(cov[1][1])), np.asarray(d, dtype=float)
+
+
+__all__ = ["hyperbola", "fit_hyperbola", "fit_hyperbolas", "fit_hyperbola_joint",
+           "guess_hyperbolas"]
@@ -16,9 +16,11 @@ from lvmtipo.actors import lvm
 from logging import DEBUG, INFO
 from sdsstools import get_logger
 
-from lvmagp.images import Image
+from lvmagp.images import Image, ImagePipeline
 from lvmagp.images.processors.detection import DaophotSourceDetection, SepSourceDetection
 from lvmagp.focus.focusseries import PhotometryFocusSeries, ProjectionFocusSeries
+from lvmagp.focus.focuslog import FocusLog
+from lvmagp.focus.curvefit import fit_hyperbola_joint
 from lvmtipo.focus import temp2focus
 
 class Focus():
@@ -29,6 +31,7 @@ class Focus():
         guess: float = 42,
         source_detection = SepSourceDetection(threshold = 12.0, minarea = 24.0, deblend_nthresh = 1.4),
         radius_column = "fwhm",
+        focus_log: Optional[FocusLog] = None,
         logger = get_logger("lvm_tel_focus"),
         level = INFO
     ):
@@ -37,11 +40,13 @@ class Focus():
         Args:
             telsubsys: Name of subsystem.
             offset: If True, offsets are used instead of absolute focus values.
+            focus_log: Log to store focus runs in and to seed the nominal focus from.
         """
         self.telsubsys = telsubsys
         self.fine_offset = offset
         self.fine_guess = guess
         self.radius_column = radius_column
+        self.focus_log = focus_log
 
         #TODO: should go somewhere in a subclass
         self.logger=logger
@@ -49,12 +54,17 @@ class Focus():
 
         self._source_detection = source_detection
 
+    def temp2focus(self, temperature:float) -> float:
+        """Focus for temperature, from the local focus log model if available."""
+        if self.focus_log:
+            focus = self.focus_log.temp2focus(temperature)
+            if focus is not None:
+                return focus
+        return temp2focus(self.telsubsys.foc.actor, temperature)
+
     async def nominal(self, temperature:float):
         try:
-           return await self.telsubsys.foc.moveAbsolute(
-               temp2focus(self.telsubsys.foc.actor,
-                          temperature),
-               'DT')
+           return await self.telsubsys.foc.moveAbsolute(self.temp2focus(temperature), 'DT')
 
         except Exception as ex:
            self.logger.error(f"{ex}")
@@ -81,19 +91,45 @@ class Focus():
 
     async def fine(
         self,
-        guess: float = 42,
+        guess: Optional[float] = None,
         count: int = 2,
         step: float = 1.0,
         exposure_time: float = 5.0,
         source_detection = None,
+        temperature: float = nan,
+        joint: bool = False,
+        known_offsets: bool = False,
         callback: Optional[Callable[..., None]] = None
     ):
+        """Fine focus sweep.
+
+        Args:
+            guess: Center of the sweep, the guess of this focus system if None.
+            count: Number of steps on each side of the guess.
+            step: Step size.
+            exposure_time: Exposure time.
+            source_detection: Source detection, defaults to the one of this focus system.
+            temperature: Temperature, stored in the focus log.
+            joint: Fit all cameras jointly with a shared focus.
+            known_offsets: Keep the camera offsets of a recent run fixed in the joint fit instead
+                of fitting them, e.g. for short sweeps. Only fitted offsets are logged.
+            callback: Called with the images after every step.
+
+        Returns:
+            Array of (focus, error) per camera or, if joint, the shared (focus, error).
+        """
         try:
             camnum = len((await self.telsubsys.agc.status()).keys())
 
             if not source_detection: source_detection = self._source_detection
+            if guess is None: guess = self.fine_guess
 
-            focus_series = [PhotometryFocusSeries(source_detection, radius_column=self.radius_column) for c in range(camnum)]
+            # detection runs for all cameras concurrently, the focus series only analyse the
+            # catalogs
+            if not isinstance(source_detection, ImagePipeline):
+                source_detection = ImagePipeline([source_detection])
+            focus_series = [PhotometryFocusSeries(None, radius_column=self.radius_column)
+                            for c in range(camnum)]
 
             # define array of focus values to iterate
             if self.fine_offset:
@@ -111,7 +147,7 @@ class Focus():
 
                 file_names = (await self.telsubsys.agc.expose(exposure_time)).flatten().unpack("*.filename")
                 if isinstance(file_names, str): file_names=[file_names]
-                imgs = [Image.from_file(f) for f in file_names]
+                imgs = await source_detection.run([Image.from_file(f) for f in file_names])
 
                 for idx, img in enumerate(imgs):
                     imgs[idx] = focus_series[idx].analyse_image(img, foc)
@@ -130,13 +166,96 @@ class Focus():
                 except Exception as ex:
                     foc.append((nan,nan))
 
-            return np.array(foc)
+            camnames = [img.header["CAMNAME"] for img in imgs]
+            known = None
+            if self.focus_log and known_offsets:
+                known = self.focus_log.camera_offsets(camnames)
+            offsets = None
+            try:
+                *best, offsets = self.fit_joint(focus_series, offsets=known)
+            except Exception as ex:
+                self.logger.warning(f"joint focus fit failed: {ex}")
+                best = (nan, nan)
+
+            if self.focus_log:
+                self._log_run(focus_values, temperature, camnames, focus_series, foc, best,
+                              offsets if known is None else None)
+
+            return np.array(best) if joint else np.array(foc)
 #            return [focus_series[idx].fit_focus() for idx in range(camnum)]
 
         except Exception as ex:
            self.logger.error(ex)
            raise ex
 
+    async def confirm(
+        self,
+        temperature: float,
+        count: int = 1,
+        step: float = 1.0,
+        exposure_time: float = 5.0,
+        callback: Optional[Callable[..., None]] = None
+    ):
+        """Short sweep around the focus predicted for temperature instead of a full fine sweep.
+
+        In offset mode the focus is moved to the prediction first and the sweep is done
+        relative to it, as fine() does around the current position. The sweep is too short
+        to fit the camera offsets, the ones of a recent fine sweep are used.
+        """
+        guess = self.temp2focus(temperature)
+        if self.fine_offset:
+            await self.telsubsys.foc.moveAbsolute(guess, 'DT')
+            guess = 0.0
+
+        return await self.fine(guess,
+                               count=count,
+                               step=step,
+                               exposure_time=exposure_time,
+                               temperature=temperature,
+                               joint=True,
+                               known_offsets=True,
+                               callback=callback)
+
+    @staticmethod
+    def fit_joint(focus_series, offsets=None):
+        """Fit the sweeps of all cameras with a shared focus minimum and per camera offsets.
+
+        Args:
+            focus_series: Photometry focus series of every camera.
+            offsets: Known focus offsets of the cameras, fitted if None.
+
+        Returns:
+            Tuple of shared focus, its error and the camera offsets.
+        """
+        data = [fs._data for fs in focus_series]
+        foc, err, offsets = fit_hyperbola_joint([[d["focus"] for d in dd] for dd in data],
+                                                [[d["r"] for d in dd] for dd in data],
+                                                [[d["rerr"] for d in dd] for dd in data],
+                                                offsets=offsets)
+
+        focus = np.concatenate([[d["focus"] for d in dd] for dd in data])
+        if foc < np.min(focus) or foc > np.max(focus):
+            raise ValueError("New focus out of bounds: {0:.3f}+-{1:.3f}mm.".format(foc, err))
+
+        return foc, err, offsets
+
+    def _log_run(self, focus_values, temperature, camnames, focus_series, foc, best, offsets=None):
+        try:
+            self.focus_log.append(
+                focus_values,
+                temperature=temperature,
+                radii={cam: [(d["focus"], d["r"], d["rerr"]) for d in fs._data]
+                       for cam, fs in zip(camnames, focus_series)},
+                result={cam: tuple(f) for cam, f in zip(camnames, foc)},
+                best=best,
+                offset=self.fine_offset,
+                camera_offsets=None if offsets is None else dict(zip(camnames, offsets)),
+                telescope=self.telsubsys.foc.actor,
+            )
+
+        except Exception as ex:
+           self.logger.warning(f"focus run not logged: {ex}")
+
 
 
 async def main():
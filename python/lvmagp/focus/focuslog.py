@@ -0,0 +1,169 @@
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from math import nan, isfinite
+
+
+def _sanitize(value: Any) -> Any:
+    """Convert numpy types to python and NaN to None, which is valid json."""
+    if isinstance(value, dict):
+        return {str(k): _sanitize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [_sanitize(v) for v in value]
+    if isinstance(value, (float, np.floating)):
+        return float(value) if isfinite(value) else None
+    if isinstance(value, np.integer):
+        return int(value)
+    return value
+
+
+class FocusLog():
+    """Append-only on-disk log of focus runs.
+
+    Every run is stored as one compact JSON line, older entries are never rewritten.
+    The log can fit a local temperature model focus = a + b * temperature.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        min_runs: int = 3,
+        max_age: float = 180 * 86400.0,
+        offsets_max_age: float = 14 * 86400.0,
+    ):
+        """Initialize a focus log.
+
+        Args:
+            filename: Path of the log file, created on first append.
+            min_runs: Minimum number of runs needed for a temperature model.
+            max_age: Only runs younger than this (in seconds) are used for the model.
+            offsets_max_age: Only camera offsets younger than this (in seconds) are reused.
+        """
+        self.filename = filename
+        self.min_runs = min_runs
+        self.max_age = max_age
+        self.offsets_max_age = offsets_max_age
+        self._model: Optional[Tuple[float, float]] = None
+
+    def append(
+        self,
+        focus: List[float],
+        temperature: float = nan,
+        radii: Optional[Dict[str, List[Tuple[float, float]]]] = None,
+        result: Optional[Dict[str, Tuple[float, float]]] = None,
+        best: Tuple[float, float] = (nan, nan),
+        offset: bool = False,
+        camera_offsets: Optional[Dict[str, float]] = None,
+        **kwargs: Any,
+    ) -> Dict[str, Any]:
+        """Append a focus run to the log.
+
+        Args:
+            focus: Focus positions of the sweep.
+            temperature: Temperature during the run.
+            radii: Per camera list of (focus, radius, error) for every focus position.
+            result: Per camera fitted (focus, error).
+            best: Combined best focus and its error.
+            offset: True if focus positions are offsets.
+            camera_offsets: Per camera focus offset of the joint fit.
+
+        Returns:
+            The stored entry.
+        """
+        entry = {
+            "time": time.time(),
+            "temperature": temperature,
+            "offset": offset,
+            "focus": [float(f) for f in focus],
+            "radii": radii or {},
+            "result": result or {},
+            "best": [float(b) for b in best],
+            "camera_offsets": camera_offsets or {},
+            **kwargs,
+        }
+
+        dirname = os.path.dirname(self.filename)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+
+        line = json.dumps(_sanitize(entry), separators=(",", ":"))
+        with open(self.filename, "a") as f:
+            f.write(line + "\n")
+
+        self._model = None
+        return entry
+
+    def runs(self) -> List[Dict[str, Any]]:
+        """Read all runs from the log, skipping broken lines."""
+        if not os.path.exists(self.filename):
+            return []
+
+        runs = []
+        with open(self.filename) as f:
+            for line in f:
+                try:
+                    runs.append(json.loads(line))
+                except ValueError:
+                    continue
+        return runs
+
+    def camera_offsets(self, cameras: List[str]) -> Optional[List[float]]:
+        """Camera focus offsets of the latest run younger than offsets_max_age with all of them.
+
+        Args:
+            cameras: Camera names.
+
+        Returns:
+            Offsets in the order of cameras or None if there is no such run.
+        """
+        now = time.time()
+        for run in reversed(self.runs()):
+            if now - run.get("time", 0) > self.offsets_max_age:
+                break
+            offsets = run.get("camera_offsets") or {}
+            values = [offsets.get(cam) for cam in cameras]
+            if all(v is not None and isfinite(v) for v in values):
+                return [float(v) for v in values]
+        return None
+
+    def fit_temperature_model(self) -> Optional[Tuple[float, float]]:
+        """Fit a linear temperature model to recent absolute focus runs.
+
+        Returns:
+            Tuple of (a, b) with focus = a + b * temperature, or None if there is not enough data.
+        """
+        now = time.time()
+        temp, foc, err = [], [], []
+        for run in self.runs():
+            if run.get("offset") or now - run.get("time", 0) > self.max_age:
+                continue
+            t = run.get("temperature")
+            f, e = (run.get("best") or [None, None])[:2]
+            if t is None or f is None or not isfinite(t) or not isfinite(f):
+                continue
+            temp.append(t)
+            foc.append(f)
+            err.append(e if e is not None and isfinite(e) and e > 0 else 1.0)
+
+        if len(foc) < self.min_runs or np.ptp(temp) == 0:
+            return None
+
+        w = 1.0 / np.asarray(err)
+        A = np.column_stack([np.ones(len(temp)), temp])
+        coeffs, *_ = np.linalg.lstsq(A * w[:, None], np.asarray(foc) * w, rcond=None)
+
+        self._model = (float(coeffs[0]), float(coeffs[1]))
+        return self._model
+
+    def temp2focus(self, temperature: float) -> Optional[float]:
+        """Predict focus for given temperature from the local model, None without a model."""
+        model = self._model or self.fit_temperature_model()
+        if model is None:
+            return None
+        return model[0] + model[1] * temperature
+
+
+__all__ = ["FocusLog"]
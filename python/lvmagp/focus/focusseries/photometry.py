@@ -1,10 +1,11 @@
-from typing import Tuple, Dict, List, Any
+from typing import Tuple, Dict, List, Any, Optional
 import numpy as np
 import logging
 
 from lvmagp.images.processors.detection import SourceDetection
 from lvmagp.focus.focusseries.base import FocusSeries
-from lvmagp.focus.curvefit import fit_hyperbola
+from lvmagp.focus.curvefit import fit_hyperbola, fit_hyperbolas
+from lvmagp.focus.metric import select_sources, robust_size, region_sizes, fit_tilt
 from lvmagp.images import Image
 from lvmagp.images.processors.detection import DaophotSourceDetection, SepSourceDetection
 
@@ -17,30 +18,52 @@ class PhotometryFocusSeries(FocusSeries):
 
     __module__ = "lvmagp.utils.focusseries"
 
-    def __init__(self, source_detection, radius_column: str = "flux", **kwargs: Any):
+    def __init__(
+        self,
+        source_detection,
+        radius_column: str = "flux",
+        source_count: int = 20,
+        saturation: float = 60000.0,
+        min_distance: float = 10.0,
+        grid: Tuple[int, int] = (3, 3),
+        **kwargs: Any,
+    ):
         """Initialize a new projection focus series.
 
         Args:
-            source_detection: Photometry to use for estimating PSF sizes
+            source_detection: Photometry to use for estimating PSF sizes, None if images already
+                have a catalog
+            radius_column: Catalog column used as PSF size.
+            source_count: Number of brightest sources to use.
+            saturation: Peak value above which sources are ignored.
+            min_distance: Minimum distance to nearest neighbour in pixels.
+            grid: Number of image regions as (nx, ny) for field dependent focus.
         """
 
         # stuff
         self._source_detection: SourceDetection = source_detection
         self._source_filter = self.source_filter
         self._radius_col = radius_column
-        self._data: List[Dict[str, float]] = []
+        self._source_count = source_count
+        self._saturation = saturation
+        self._min_distance = min_distance
+        self._grid = grid
+        self._data: List[Dict[str, Any]] = []
 
     def reset(self) -> None:
         """Reset focus series."""
         self._data = []
 
-    def source_filter(self, sources):
+    def source_filter(self, sources, count: Optional[int] = None):
+        """Usable sources, brightest first, all of them if count is None."""
 
-        sources.sort(self._radius_col)
-        sources.reverse()
-        sources = sources[sources["ellipticity"] < 0.5]
-#        sources = sources[sources["peak"] > 1000]
-        return sources[sources[self._radius_col] > 0]
+        sources = sources[sources[self._radius_col] > 0]
+        return select_sources(
+            sources,
+            count=len(sources) if count is None else count,
+            saturation=self._saturation,
+            min_distance=self._min_distance,
+        )
 
 
     def analyse_image(self, image: Image, focus_value: float) -> None:
@@ -51,27 +74,31 @@ class PhotometryFocusSeries(FocusSeries):
             focus_value: Value to fit along, e.g. focus value or its offset
         """
 
-        # do photometry
-        image = self._source_detection(image)
+        # do photometry, unless done before
+        if self._source_detection is not None:
+            image = self._source_detection(image)
 
         sources = image.catalog
         if sources is None:
             return image
 
-        # filter
+        # filter, the regions need all usable sources
         sources = self._source_filter(sources)
         if len(sources) <= 6:
             return image
 
-        # calculate median radius
-        radius = np.median(sources[self._radius_col[:20]])
-        radius_err = np.std(sources[self._radius_col[:20]])
+        # calculate clipped median radius of the brightest
+        radius, radius_err, _ = robust_size(sources[:self._source_count][self._radius_col])
+
+        # and per image region
+        regions = region_sizes(sources, self._radius_col, image.data.shape, self._grid)
 
         # log it
         log.info("Found median radius of %.1f+-%.1f.", radius, radius_err)
 
         # add to list
-        self._data.append({"focus": focus_value, "r": radius, "rerr": radius_err})
+        self._data.append({"focus": focus_value, "r": radius, "rerr": radius_err,
+                           "regions": regions})
 
         return image
 
@@ -102,5 +129,57 @@ class PhotometryFocusSeries(FocusSeries):
         # return it
         return float(foc), float(err)
 
+    def fit_focus_regions(self) -> List[Dict[str, float]]:
+        """Fit focus for every image region that has been measured in all images
+
+        Returns:
+            List of dicts with region center, focus and its error.
+        """
+
+        # collect data per region
+        regions: Dict[int, Dict[str, Any]] = {}
+        for d in self._data:
+            for reg in d.get("regions", []):
+                entry = regions.setdefault(reg["region"],
+                                           {"x": reg["x"], "y": reg["y"], "data": []})
+                entry["data"].append((d["focus"], reg["r"], reg["rerr"]))
+
+        entries = [(reg, entry) for reg, entry in sorted(regions.items())
+                   if len(entry["data"]) >= 3]
+        if not entries:
+            return []
+
+        # fit all regions in one go, padding shorter curves
+        npoints = max(len(entry["data"]) for _, entry in entries)
+        data = np.full((len(entries), 3, npoints), np.nan)
+        for idx, (_, entry) in enumerate(entries):
+            data[idx, :, :len(entry["data"])] = np.array(entry["data"]).T
+        focus, r, rerr = data[:, 0], data[:, 1], np.maximum(data[:, 2], 1e-3)
+        foc, err = fit_hyperbolas(focus, r, rerr)
+
+        result = []
+        for idx, (reg, entry) in enumerate(entries):
+            inside = np.nanmin(focus[idx]) <= foc[idx] <= np.nanmax(focus[idx])
+            if np.isfinite(foc[idx]) and inside:
+                result.append({"region": reg, "x": entry["x"], "y": entry["y"],
+                               "focus": float(foc[idx]), "err": float(err[idx])})
+
+        return result
+
+    def fit_tilt(self) -> Tuple[float, float, float]:
+        """Fit field dependent focus as a tilted plane
+
+        Returns:
+            Tuple of focus at the field center and tilt in x and y per pixel.
+        """
+
+        regions = self.fit_focus_regions()
+        return fit_tilt(
+            [r["x"] for r in regions],
+            [r["y"] for r in regions],
+            [r["focus"] for r in regions],
+            [r["err"] for r in regions],
+        )
+
 
 __all__ = ["PhotometryFocusSeries"]
@@ -5,7 +5,7 @@ import logging
 from scipy import ndimage
 
 from lvmagp.focus.focusseries.base import FocusSeries
-from lvmagp.focus.curvefit import fit_hyperbola
+from lvmagp.focus.curvefit import fit_hyperbola_joint
 from lvmagp.images import Image
 
 
@@ -117,16 +117,9 @@ class ProjectionFocusSeries(FocusSeries):
         yfwhm = [d["y"] for d in self._data]
         ysig = [d["yerr"] for d in self._data]
 
-        # fit focus
+        # fit focus, both projections share the focus minimum
         try:
-            xfoc, xerr = fit_hyperbola(focus, xfwhm, xsig)
-            yfoc, yerr = fit_hyperbola(focus, yfwhm, ysig)
-
-            # weighted mean
-            xerr = np.sqrt(xerr)
-            yerr = np.sqrt(yerr)
-            foc = (xfoc / xerr + yfoc / yerr) / (1.0 / xerr + 1.0 / yerr)
-            err = 2.0 / (1.0 / xerr + 1.0 / yerr)
+            foc, err, _ = fit_hyperbola_joint([focus, focus], [xfwhm, yfwhm], [xsig, ysig])
         except (RuntimeError, RuntimeWarning):
             raise ValueError("Could not find best focus.")
 
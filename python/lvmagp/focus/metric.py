@@ -0,0 +1,174 @@
+from typing import Tuple, Dict, List, Optional
+
+import numpy as np
+from astropy.table import Table
+
+
+def select_sources(
+    sources: Table,
+    count: int = 20,
+    sort_by: str = "flux",
+    saturation: float = 60000.0,
+    min_distance: float = 10.0,
+    max_ellipticity: float = 0.5,
+) -> Table:
+    """Select the brightest unsaturated and unblended sources of a catalog.
+
+    Only a partial selection (argpartition) is done for the top N sources,
+    the catalog is never fully sorted.
+
+    Args:
+        sources: Source catalog.
+        count: Number of sources to select.
+        sort_by: Column to select brightest sources by, falls back to "peak".
+        saturation: Sources with a peak above this are considered saturated.
+        min_distance: Minimum distance in pixels to the nearest neighbour.
+        max_ellipticity: Maximum ellipticity of a source.
+
+    Returns:
+        Catalog with at most count sources, brightest first.
+    """
+
+    good = np.ones(len(sources), dtype=bool)
+    if "peak" in sources.colnames:
+        good &= np.asarray(sources["peak"]) < saturation
+    if "dist" in sources.colnames:
+        good &= np.asarray(sources["dist"]) > min_distance
+    if "ellipticity" in sources.colnames:
+        good &= np.asarray(sources["ellipticity"]) < max_ellipticity
+    sources = sources[good]
+
+    if sort_by not in sources.colnames:
+        sort_by = "peak"
+    brightness = -np.asarray(sources[sort_by], dtype=float)
+
+    # partial selection of the N brightest, only those get sorted
+    if len(sources) > count:
+        idx = np.argpartition(brightness, count - 1)[:count]
+    else:
+        idx = np.arange(len(sources))
+    idx = idx[np.argsort(brightness[idx])]
+
+    return sources[idx]
+
+
+def robust_size(values: np.ndarray, sigma: float = 3.0,
+                maxiters: int = 5) -> Tuple[float, float, int]:
+    """Sigma clipped size statistics.
+
+    Args:
+        values: Size values, e.g. fwhm of sources.
+        sigma: Clipping threshold in standard deviations.
+        maxiters: Maximum number of clipping iterations.
+
+    Returns:
+        Tuple of median, standard deviation and number of used values.
+    """
+
+    values = np.asarray(values, dtype=float)
+    values = values[np.isfinite(values) & (values > 0)]
+    if len(values) == 0:
+        return np.nan, np.nan, 0
+
+    for _ in range(maxiters):
+        median = np.median(values)
+        std = np.std(values)
+        keep = np.abs(values - median) <= sigma * std
+        if std == 0 or keep.all():
+            break
+        values = values[keep]
+
+    return float(np.median(values)), float(np.std(values)), len(values)
+
+
+def region_index(x: np.ndarray, y: np.ndarray, shape: Tuple[int, int],
+                 grid: Tuple[int, int] = (3, 3)) -> np.ndarray:
+    """Region index of positions in an image divided into a grid.
+
+    Args:
+        x: X positions in pixels, fits convention.
+        y: Y positions in pixels, fits convention.
+        shape: Image shape as (ny, nx).
+        grid: Number of regions as (nx, ny).
+
+    Returns:
+        Flat region index for every position, iy * nx + ix.
+    """
+
+    ny, nx = shape
+    ix = np.clip(((np.asarray(x) - 1) * grid[0] / nx).astype(int), 0, grid[0] - 1)
+    iy = np.clip(((np.asarray(y) - 1) * grid[1] / ny).astype(int), 0, grid[1] - 1)
+    return iy * grid[0] + ix
+
+
+def region_sizes(
+    sources: Table,
+    column: str,
+    shape: Tuple[int, int],
+    grid: Tuple[int, int] = (3, 3),
+    min_sources: int = 3,
+) -> List[Dict[str, float]]:
+    """Robust size statistics per image region.
+
+    Args:
+        sources: Source catalog with x and y columns.
+        column: Column with source size.
+        shape: Image shape as (ny, nx).
+        grid: Number of regions as (nx, ny).
+        min_sources: Minimum number of sources for a region to be used.
+
+    Returns:
+        List of dicts with region center, size and its error.
+    """
+
+    ny, nx = shape
+    regions = region_index(sources["x"], sources["y"], shape, grid)
+    values = np.asarray(sources[column], dtype=float)
+
+    result = []
+    for reg in np.unique(regions):
+        r, rerr, n = robust_size(values[regions == reg])
+        if n < min_sources:
+            continue
+        ix, iy = reg % grid[0], reg // grid[0]
+        result.append(
+            {
+                "region": int(reg),
+                "x": float((ix + 0.5) * nx / grid[0]),
+                "y": float((iy + 0.5) * ny / grid[1]),
+                "r": r,
+                "rerr": rerr,
+                "n": n,
+            }
+        )
+    return result
+
+
+def fit_tilt(x: np.ndarray, y: np.ndarray, focus: np.ndarray,
+             err: Optional[np.ndarray] = None) -> Tuple[float, float, float]:
+    """Fit a plane to focus values measured at different field positions.
+
+    Args:
+        x: X positions of measurements.
+        y: Y positions of measurements.
+        focus: Best focus at positions.
+        err: Errors of focus values.
+
+    Returns:
+        Tuple of focus at the mean position and tilt in x and y per pixel.
+    """
+
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    focus = np.asarray(focus, dtype=float)
+    if len(focus) < 3:
+        raise ValueError("Need at least three regions to fit a tilt.")
+
+    w = np.ones_like(focus) if err is None else \
+        1.0 / np.maximum(np.asarray(err, dtype=float), 1e-12)
+    A = np.column_stack([np.ones_like(x), x - x.mean(), y - y.mean()])
+    coeffs, *_ = np.linalg.lstsq(A * w[:, None], focus * w, rcond=None)
+
+    return float(coeffs[0]), float(coeffs[1]), float(coeffs[2])
+
+
+__all__ = ["select_sources", "robust_size", "region_index", "region_sizes", "fit_tilt"]
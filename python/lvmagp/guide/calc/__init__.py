@@ -6,3 +6,6 @@ __title__ = "Guide Calc"
 from .base import GuideCalc
 from .simple import GuideCalcSimple
 from .astrometry import GuideCalcAstrometry
+from .pixel import GuideCalcPixel
+from .correlation import GuideCalcCorrelation
+from .cameramodel import CameraModel
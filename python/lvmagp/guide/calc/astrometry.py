@@ -1,27 +1,25 @@
-from typing import Tuple, Dict, List, Any
+from typing import Tuple, Dict, List, Any, Optional
 
+import asyncio
 import logging
-
-from asyncio import gather
-from threading import Thread
+from concurrent.futures import Executor
 
 import numpy as np
-import astrometry
 
-from scipy.ndimage import gaussian_filter
-from scipy.ndimage import median_filter
-from astropy.wcs import WCS
-from astropy.stats import mad_std
 from astropy.coordinates import SkyCoord, Angle
 
 from sdsstools import get_logger
 from sdsstools.logger import SDSSLogger
 
-from lvmagp.images import Image
+from lvmagp.images import Image, ImagePipeline
+from lvmagp.images.processors.filters import MedianFilter
 
 from lvmagp.guide.calc.base import GuideCalc
+from lvmagp.guide.solverqueue import SolverQueue
+from lvmagp.exceptions import LvmagpSolveDropped
 from lvmagp.images.processors.astrometry import Astrometry, AstrometryDotLocal
-from lvmagp.images.processors.detection import DaophotSourceDetection, SepSourceDetection
+from lvmagp.images.processors.detection import (SourceDetection, DaophotSourceDetection,
+                                                SepSourceDetection)
 
 log = logging.getLogger(__name__)
 log.setLevel(logging.DEBUG)
@@ -30,82 +28,108 @@ log.setLevel(logging.DEBUG)
 class GuideCalcAstrometry(GuideCalc):
     """Guide offset based on source detection."""
 
-    solver = astrometry.Solver(
-        astrometry.series_5200.index_files(
-            cache_directory="astrometry_cache",
-            scales={5,6},
-        )
-    )
-
     def __init__(self,
                  source_count = 42,
                  sort_by = "peak",
+                 source_detection: Optional[SourceDetection] = None,
+                 source_astrometry: Optional[Astrometry] = None,
+                 median_filter: int = 2,
+                 executor: Optional[Executor] = None,
+                 solver_queue: Optional[SolverQueue] = None,
+                 deadline: Optional[float] = None,
+                 camera_positions: Optional[Dict[str, Tuple[float, float]]] = None,
                  logger: SDSSLogger = get_logger("guideastrocalc"),
                  **kwargs: Any):
-        """Initialize"""
+        """Initialize
+
+        Args:
+            source_count: Number of sources used for astrometry.
+            sort_by: Catalog column to pick the brightest sources by.
+            source_detection: Source detection, Daophot if None.
+            source_astrometry: Astrometry, local astrometry.net if None.
+            median_filter: Size of median filter before detection, 0 to disable.
+            executor: Executor to analyse the cameras in.
+            solver_queue: Queue shared with other calcs, a queue running all cameras at once if
+                None.
+            deadline: Seconds a guide frame may wait in the solver queue, no limit if None.
+            camera_positions: Offsets of the camera centers from the pointing, east/north in
+                arcsec, needed for the pointing of a single camera.
+
+        A solve cache of the astrometry is only used for references and pointings, guide frames
+        are always solved.
+        """
 
         self.reference_images = None
         self.reference_midpoint = None
         self.source_count = source_count
         self.sort_by = sort_by
         self.logger = logger
-        self.source_detection = DaophotSourceDetection(fwhm=8, threshold=8)
-        self.source_astrometry = AstrometryDotLocal(source_count=source_count, radius=1.0)
-
-    def calc_midpoint(self, images):
-        cams={img.header["CAMNAME"]: idx for idx, img in enumerate(images)}
-        image_num = len(images)
-        if "east" in cams.keys() and "west" in cams.keys():
-            pa = images[cams["east"]].center.position_angle(images[cams["west"]].center)
-            sep = images[cams["east"]].center.separation(images[cams["west"]].center)
-            return images[cams["east"]].center.directional_offset_by(pa, -sep/2)
-
-        elif image_num == 1 and not cam.keys().isdisjoint(["east", "west"]):
-            log.warning("single camera not implemented")
-        else:
-            raise Exception("unsupported camera image set: {cams}")
-
-
-    # we do threading instead of asyncio tasks, because astrometry is written in C
-    async def astrometric(self, images, sort_by="peak", source_count=42):
-        class AstrometryThread(Thread):
-            # constructor
-            def __init__(self, parent, img):
-                # execute the base constructor
-                Thread.__init__(self)
-                self.parent = parent
-                self.image = img
-                self.image.center = None
-
-            # override the run function
-            def run(self):
-                self.image.data = median_filter(self.image.data, size=2)
-
-#                self.parent.logger.debug(f"astrometric source detect {self.image.header['CAMNAME']}")
-                self.image = self.parent.source_detection(self.image)
-#                self.parent.logger.debug(f"astrometric astronometry {self.image.header['CAMNAME']}")
-                self.image = self.parent.source_astrometry(self.image)
-#                self.parent.logger.debug(f"astrometric done {self.image.header['CAMNAME']}")
-                if hasattr(self.image, "astrometric_wcs") and self.image.astrometric_wcs:
-                    self.image.center = self.image.astrometric_wcs.pixel_to_world(self.image.header['NAXIS1']//2, self.image.header['NAXIS2']//2)
-                else:
-                    self.image.center = None
-
-        worker = [AstrometryThread(self, img) for img in images]
-        [w.start() for w in worker]
-        [w.join() for w in worker]
-        images = [w.image for w in worker]
+        self.source_detection = source_detection or DaophotSourceDetection(fwhm=8, threshold=8)
+        self.source_astrometry = source_astrometry or AstrometryDotLocal(source_count=source_count,
+                                                                         radius=1.0)
+        filters = [MedianFilter(size=median_filter)] if median_filter else []
+        self.pipeline = ImagePipeline(filters + [self.source_detection, self.source_astrometry],
+                                      executor=executor)
+        guide_astrometry = self.source_astrometry
+        if getattr(guide_astrometry, "solve_cache", None):
+            guide_astrometry = guide_astrometry.without_cache()
+        self.guide_pipeline = ImagePipeline(filters + [self.source_detection, guide_astrometry],
+                                            executor=executor)
+        # an own queue grows to the number of cameras, a shared one is sized by its owner
+        self.solver_queue = solver_queue or SolverQueue(concurrency=1, executor=executor)
+        self._own_queue = solver_queue is None
+        self.deadline = deadline
+        self.camera_positions = camera_positions or {}
+
+    # the pipeline runs the cameras in threads, because astrometry is written in C
+    async def astrometric(self, images, sort_by="peak", source_count=42,
+                          priority=SolverQueue.GUIDE):
+        deadline = self.deadline if priority == SolverQueue.GUIDE else None
+        pipeline = self.guide_pipeline if priority == SolverQueue.GUIDE else self.pipeline
+        if self._own_queue:
+            self.solver_queue.concurrency = max(self.solver_queue.concurrency, len(images))
+        jobs = [asyncio.ensure_future(
+                    self.solver_queue.submit(pipeline, img, priority=priority, deadline=deadline,
+                                             key=(id(self), img.header.get("CAMNAME"))))
+                for img in images]
+        try:
+            images = list(await asyncio.gather(*jobs))
+        except BaseException:
+            # waiting cameras are not solved for nothing, running ones cannot be stopped
+            for job in jobs:
+                job.cancel()
+            raise
+
+        for img in images:
+            if hasattr(img, "astrometric_wcs") and img.astrometric_wcs:
+                img.center = img.astrometric_wcs.pixel_to_world(img.header['NAXIS1']//2,
+                                                                img.header['NAXIS2']//2)
+            else:
+                img.center = None
 
         midpoint = self.calc_midpoint(images)
 #        self.logger.debug(f"midpoint: {midpoint}")
         return images, midpoint
 
 
+    async def set_target(self, ra: float, dec: float) -> None:
+        """Prepare the astrometry for a target, e.g. fetch its guide stars."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.pipeline.executor, self.source_astrometry.set_target,
+                                   ra, dec)
+
+    async def pointing(self, images: List[Image]) -> Tuple[List[Image], SkyCoord]:
+        """Solve images and find the telescope pointing."""
+        return await self.astrometric(images, sort_by=self.sort_by, source_count=self.source_count,
+                                      priority=SolverQueue.REFERENCE)
+
     async def reference_target(self, images: List[Image]) -> SkyCoord:
         """Analyse given images."""
 
 #        self.logger.debug(f"astrometric start")
-        self.reference_images, self.reference_midpoint = await self.astrometric(images, sort_by=self.sort_by, source_count=self.source_count)
+        self.reference_images, self.reference_midpoint = await self.astrometric(
+            images, sort_by=self.sort_by, source_count=self.source_count,
+            priority=SolverQueue.REFERENCE)
 #        self.logger.debug(f"astrometric done")
 
         return self.reference_images, self.reference_midpoint
@@ -114,11 +138,14 @@ class GuideCalcAstrometry(GuideCalc):
     async def find_offset(self, images: List[Image]) -> SkyCoord:
         """ Find guide offset """
 
+        self.check_cameras(images, [img.header["CAMNAME"] for img in self.reference_images or []])
         try:
             new_images, new_midpoint = await self.astrometric(images, sort_by=self.sort_by, source_count=self.source_count)
 
             return new_images, new_midpoint
 
+        except LvmagpSolveDropped:
+            raise
         except Exception as ex:
             print(f"error: {type(ex)} {ex}")
 
@@ -1,10 +1,106 @@
-from typing import Tuple, List
+from typing import Dict, Iterable, List, Optional, Tuple, TYPE_CHECKING
+import logging
+
 from lvmagp.images import Image
 
+if TYPE_CHECKING:
+    from astropy.coordinates import SkyCoord
+
+log = logging.getLogger(__name__)
+
 
 class GuideCalc:
     """Base class for guide series helper classes."""
 
+    # offsets of the camera centers from the telescope pointing, east/north in arcsec
+    camera_positions: Dict[str, Tuple[float, float]] = {}
+
+    def camera_position(self, name: str) -> Optional[Tuple[float, float]]:
+        """Offset of a camera center from the telescope pointing, None if unknown."""
+        return self.camera_positions.get(name)
+
+    @staticmethod
+    def check_cameras(images: List[Image], reference: Iterable[str]) -> None:
+        """Raise if the images are not from the cameras of the reference."""
+        cameras, reference = {img.header["CAMNAME"] for img in images}, set(reference)
+        if cameras != reference:
+            raise ValueError(f"cameras {sorted(cameras)} differ from the reference cameras "
+                             f"{sorted(reference)}")
+
+    def calc_midpoint(self, images: List[Image]) -> "SkyCoord":
+        """Pointing of the telescope from the centers of the camera images.
+
+        If the positions of all cameras are known, every center is moved back to the pointing
+        by its position and the results are averaged, which works for any subset of cameras.
+        Otherwise the pointing is the mean of the camera centers on the sphere, e.g. the
+        midpoint of an east/west pair. A single camera needs its position.
+
+        Args:
+            images: Images with center set from their astrometric solution.
+
+        Returns:
+            Pointing of the telescope.
+        """
+        import numpy as np
+        from astropy.coordinates import SkyCoord
+
+        centers = [img.center for img in images if getattr(img, "center", None) is not None]
+        if len(centers) < len(images):
+            missing = [img.header.get("CAMNAME") for img in images
+                       if getattr(img, "center", None) is None]
+            raise ValueError(f"no astrometric solution for camera {', '.join(map(str, missing))}")
+        if not centers:
+            raise ValueError("no camera images")
+
+        positions = [self.camera_position(img.header.get("CAMNAME")) for img in images]
+        if all(p is not None for p in positions):
+            centers = [self._pointing(c, p) for c, p in zip(centers, positions)]
+        elif len(centers) == 1:
+            raise ValueError(f"position of camera {images[0].header.get('CAMNAME')} unknown, "
+                             "the pointing of a single camera needs it")
+        if len(centers) == 1:
+            return centers[0]
+
+        ra = np.radians([c.ra.deg for c in centers])
+        dec = np.radians([c.dec.deg for c in centers])
+        x, y, z = np.mean([np.cos(dec) * np.cos(ra), np.cos(dec) * np.sin(ra), np.sin(dec)],
+                          axis=1)
+        return SkyCoord(np.degrees(np.arctan2(y, x)) % 360.0,
+                        np.degrees(np.arctan2(z, np.hypot(x, y))),
+                        unit="deg", frame=centers[0].frame)
+
+    @staticmethod
+    def _pointing(center: "SkyCoord", position: Tuple[float, float],
+                  iterations: int = 5) -> "SkyCoord":
+        """Pointing at which a camera center has the given position in the tangent plane."""
+        import astropy.units as u
+        from lvmagp.guide.offset.transform import sky_offset
+
+        pointing = center
+        for _ in range(iterations):
+            east, north = sky_offset(pointing.ra.deg, pointing.dec.deg,
+                                     center.ra.deg, center.dec.deg)
+            pointing = pointing.spherical_offsets_by((east - position[0]) * u.arcsec,
+                                                     (north - position[1]) * u.arcsec)
+        return pointing
+
+    async def set_target(self, ra: float, dec: float) -> None:
+        """Prepare the analysis for a target, e.g. fetch its guide stars.
+
+        Args:
+            ra: Right ascension in degrees.
+            dec: Declination in degrees.
+        """
+        pass
+
+    async def pointing(self, images: List[Image]) -> Tuple[List[Image], "SkyCoord"]:
+        """Find the pointing of the telescope from images, without changing the reference.
+
+        Returns:
+            Tuple of analysed images and telescope pointing
+        """
+        raise NotImplementedError
+
     async def reference_target(self, images: List[Image]) -> None:
         """Analyse given images.
         """
@@ -0,0 +1,104 @@
+import json
+import os
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from lvmagp.guide.offset.transform import sky_offset
+
+
+class CameraModel:
+    """Pixel to sky calibration of a guide camera.
+
+    Holds the linear part of the camera WCS (rotation and scale as CD matrix in degrees per pixel)
+    and the position of the camera center relative to the telescope pointing, so pixel shifts can
+    be converted to pointing offsets without solving the images.
+    """
+
+    def __init__(self, name: str, cd: Any, position: Tuple[float, float] = (0.0, 0.0)):
+        """Init new camera model.
+
+        Args:
+            name: Camera name as in the CAMNAME header keyword.
+            cd: 2x2 CD matrix in degrees per pixel.
+            position: Offset of the camera center from the telescope pointing, east/north in
+                arcsec.
+        """
+        self.name = name
+        self.cd = np.asarray(cd, dtype=float).reshape(2, 2)
+        self.position = (float(position[0]), float(position[1]))
+
+    @classmethod
+    def from_wcs(cls, name: str, wcs: Any, shape: Tuple[int, int], pointing: Any) -> "CameraModel":
+        """Calibrate a camera from a solved image.
+
+        Args:
+            name: Camera name.
+            wcs: Astrometric solution of the image.
+            shape: Image shape as (ny, nx).
+            pointing: SkyCoord of the telescope pointing, e.g. the midpoint of all cameras.
+
+        Returns:
+            The camera model.
+        """
+        center = wcs.pixel_to_world(shape[1] // 2, shape[0] // 2)
+        position = sky_offset(pointing.ra.deg, pointing.dec.deg, center.ra.deg, center.dec.deg)
+        return cls(name, wcs.pixel_scale_matrix, position)
+
+    def sky_shift(self, shift: Any) -> np.ndarray:
+        """Convert pixel shifts to sky offsets, east/north in arcsec."""
+        return np.asarray(shift) @ self.cd.T * 3600.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"cd": self.cd.tolist(), "position": list(self.position)}
+
+
+def fit_pointing_offset(models: Dict[str, CameraModel],
+                        shifts: Dict[str, Any]) -> Tuple[float, float, float]:
+    """Fit the pointing offset from the pixel shifts of several cameras.
+
+    Every camera moves by the translation plus the rotation around the pointing at its position,
+    the rotation is only fitted with two or more cameras.
+
+    Args:
+        models: Camera models by name.
+        shifts: Pixel shifts of the stars, reference minus current, by camera name.
+
+    Returns:
+        Tuple of the offset east/north in arcsec and the field rotation in radians.
+    """
+    rows, values = [], []
+    for name, shift in shifts.items():
+        model = models[name]
+        px, py = model.position
+        rows += [[1.0, 0.0, -py], [0.0, 1.0, px]]
+        values += list(model.sky_shift(shift))
+
+    A, b = np.array(rows), np.array(values)
+    if len(shifts) < 2:
+        A = A[:, :2]
+    coeffs, *_ = np.linalg.lstsq(A, b, rcond=None)
+    return float(coeffs[0]), float(coeffs[1]), float(coeffs[2]) if len(coeffs) > 2 else 0.0
+
+
+def load_camera_models(filename: str) -> Optional[Dict[str, CameraModel]]:
+    """Load camera models from a calibration file, None if it does not exist."""
+    if not os.path.exists(filename):
+        return None
+    with open(filename) as f:
+        data = json.load(f)
+    return {name: CameraModel(name, **model) for name, model in data["cameras"].items()}
+
+
+def save_camera_models(filename: str, models: Dict[str, CameraModel]) -> None:
+    """Save camera models to a calibration file."""
+    dirname = os.path.dirname(filename)
+    if dirname:
+        os.makedirs(dirname, exist_ok=True)
+    with open(filename, "w") as f:
+        json.dump({"time": time.time(),
+                   "cameras": {name: m.to_dict() for name, m in models.items()}}, f, indent=2)
+
+
+__all__ = ["CameraModel", "fit_pointing_offset", "load_camera_models", "save_camera_models"]
@@ -0,0 +1,122 @@
+from typing import Tuple, Dict, List, Any, Optional
+import logging
+
+import numpy as np
+
+import astropy.units as u
+from astropy.coordinates import SkyCoord
+
+from lvmagp.images import Image
+from lvmagp.guide.calc.pixel import GuideCalcPixel
+
+
+log = logging.getLogger(__name__)
+log.setLevel(logging.DEBUG)
+
+
+def _bin(data: np.ndarray, binning: int) -> np.ndarray:
+    """Average data in binning x binning blocks, cutting off the remainder."""
+    if binning <= 1:
+        return data
+    ny, nx = data.shape[0] // binning, data.shape[1] // binning
+    return data[:ny * binning, :nx * binning].reshape(ny, binning, nx, binning).mean(axis=(1, 3))
+
+
+def _peak_offset(minus: float, center: float, plus: float) -> float:
+    """Sub pixel offset of a peak from a parabola through three values."""
+    denom = minus - 2 * center + plus
+    return 0.0 if denom == 0 else float(np.clip(0.5 * (minus - plus) / denom, -0.5, 0.5))
+
+
+class GuideCalcCorrelation(GuideCalcPixel):
+    """Guide offset from FFT phase correlation of the whole frames with the reference.
+
+    Needs no isolated stars, so it works in crowded fields and bad seeing where source
+    detection fails. The FFT of the reference is cached, every guide frame costs one forward
+    and one inverse FFT. Pixel shifts are converted to pointing offsets with the camera models,
+    see GuideCalcPixel.
+    """
+
+    def __init__(self, binning: int = 1, window: bool = True, smoothing: float = 2.0,
+                 **kwargs: Any):
+        """Initialize
+
+        Args:
+            binning: Downsample the frames by this factor before correlating.
+            window: Apply a Hann window against edge effects.
+            smoothing: Sigma of the Gaussian the correlation peak is smoothed with in (binned)
+                pixels, suppresses noise and makes the sub pixel peak fit more accurate.
+            kwargs: Parameters of GuideCalcPixel.
+        """
+        super().__init__(**kwargs)
+
+        self.binning = binning
+        self.window = window
+        self.smoothing = smoothing
+        self.reference_ffts: Dict[str, np.ndarray] = {}
+        self._windows: Dict[Tuple[int, int], np.ndarray] = {}
+
+    def _prepare(self, data: np.ndarray) -> np.ndarray:
+        data = _bin(np.asarray(data, dtype=np.float32), self.binning)
+        data = data - np.median(data)
+        if self.window:
+            if data.shape not in self._windows:
+                self._windows[data.shape] = np.outer(np.hanning(data.shape[0]),
+                                                     np.hanning(data.shape[1])).astype(np.float32)
+            data = data * self._windows[data.shape]
+        return data
+
+    def _reference_fft(self, data: np.ndarray) -> np.ndarray:
+        """Conjugate FFT of the reference, divided by its amplitude and smoothed."""
+        data = self._prepare(data)
+        ref = np.conj(np.fft.rfft2(data))
+        ref /= np.abs(ref) + 1e-12
+        if self.smoothing > 0:
+            fy = np.fft.fftfreq(data.shape[0])[:, None]
+            fx = np.fft.rfftfreq(data.shape[1])[None, :]
+            ref *= np.exp(-2 * (np.pi * self.smoothing) ** 2 * (fx ** 2 + fy ** 2))
+        return ref.astype(np.complex64)
+
+    async def reference_target(self, images: List[Image]) -> Tuple[List[Image], SkyCoord]:
+        """Analyse given images."""
+
+        if any(img.header["CAMNAME"] not in self.models for img in images):
+            analysed, self.reference_midpoint = await self.calibrate(images)
+        else:
+            analysed = images
+            self.reference_midpoint = SkyCoord(ra=float(images[0].header["RA"]) * u.deg,
+                                               dec=float(images[0].header["DEC"]) * u.deg)
+
+        self.reference_ffts = {img.header["CAMNAME"]: self._reference_fft(img.data)
+                               for img in images}
+
+        # only a calibration detects sources, otherwise reference and guide frames have no catalog
+        self.reference_images = {img.header["CAMNAME"]: img for img in analysed
+                                 if img.catalog is not None}
+        return analysed, self.reference_midpoint
+
+    def _reference_cameras(self) -> List[str]:
+        return list(self.reference_ffts)
+
+    def _shift(self, image: Image) -> np.ndarray:
+        ref = self.reference_ffts[image.header["CAMNAME"]]
+        data = self._prepare(image.data)
+
+        cross = np.fft.rfft2(data)
+        cross *= ref / (np.abs(cross) + 1e-12)
+        corr = np.fft.irfft2(cross, s=data.shape)
+
+        iy, ix = np.unravel_index(np.argmax(corr), corr.shape)
+        ny, nx = corr.shape
+        dy = iy + _peak_offset(corr[iy - 1, ix], corr[iy, ix], corr[(iy + 1) % ny, ix])
+        dx = ix + _peak_offset(corr[iy, ix - 1], corr[iy, ix], corr[iy, (ix + 1) % nx])
+
+        # peaks beyond half the frame are negative shifts
+        dx = dx - nx if dx > nx / 2 else dx
+        dy = dy - ny if dy > ny / 2 else dy
+
+        # reference minus current, as for star centroids
+        return -np.array([dx, dy]) * self.binning
+
+
+__all__ = ["GuideCalcCorrelation"]
@@ -0,0 +1,92 @@
+from typing import Tuple, Dict, List, Any, Optional
+import logging
+
+import astropy.units as u
+from astropy.coordinates import SkyCoord
+
+from lvmagp.images import Image
+from lvmagp.guide.calc.simple import GuideCalcSimple
+from lvmagp.guide.calc.cameramodel import (CameraModel, fit_pointing_offset, load_camera_models,
+                                           save_camera_models)
+
+
+log = logging.getLogger(__name__)
+log.setLevel(logging.DEBUG)
+
+
+class GuideCalcPixel(GuideCalcSimple):
+    """Guide offset from pixel shifts of the reference stars and calibrated camera models.
+
+    The camera models are calibrated once by solving a reference, afterwards neither the references
+    nor the guide frames are solved. The pointing offset is fitted from the shifts of all cameras,
+    the reference position is the telescope pointing from the image header.
+    """
+
+    def __init__(self, calibration: Optional[str] = None, **kwargs: Any):
+        """Initialize
+
+        Args:
+            calibration: File of the camera models, written by the first calibration solve.
+            kwargs: Parameters of GuideCalcSimple.
+        """
+        super().__init__(**kwargs)
+
+        self.calibration = calibration
+        self.models: Dict[str, CameraModel] = \
+            (load_camera_models(calibration) if calibration else None) or {}
+        self.rotation = 0.0
+
+    def camera_position(self, name: str) -> Optional[Tuple[float, float]]:
+        """Position of a calibrated camera, else the configured one."""
+        model = self.models.get(name)
+        return model.position if model is not None else super().camera_position(name)
+
+    async def calibrate(self, images: List[Image]) -> Tuple[List[Image], SkyCoord]:
+        """Solve images and calibrate the camera models from them."""
+
+        solved, midpoint = await self.pointing(images)
+        for img in solved:
+            wcs = getattr(img, "astrometric_wcs", None)
+            if not wcs:
+                raise ValueError(f"calibration of {img.header['CAMNAME']} failed, "
+                                 "no astrometric solution")
+            name = img.header["CAMNAME"]
+            self.models[name] = CameraModel.from_wcs(name, wcs, img.data.shape, midpoint)
+            log.debug(f"{name}: calibrated, cd {self.models[name].cd.tolist()} "
+                      f"position {self.models[name].position}")
+
+        if self.calibration:
+            save_camera_models(self.calibration, self.models)
+        return solved, midpoint
+
+    async def reference_target(self, images: List[Image]) -> Tuple[List[Image], SkyCoord]:
+        """Analyse given images."""
+
+        if any(img.header["CAMNAME"] not in self.models for img in images):
+            analysed, self.reference_midpoint = await self.calibrate(images)
+        else:
+            analysed = await self.detection_pipeline.run(images)
+            self.reference_midpoint = SkyCoord(ra=float(images[0].header["RA"]) * u.deg,
+                                               dec=float(images[0].header["DEC"]) * u.deg)
+
+        self._set_reference(images, analysed)
+        return analysed, self.reference_midpoint
+
+    async def find_offset(self, images: List[Image]) -> Tuple[List[Image], SkyCoord]:
+        """ Find guide offset, the frames get their reference catalog as reference_catalog """
+
+        shifts = await self._shifts(images)
+        for img, shift in zip(images, shifts):
+            img.shift = shift
+            ref = self.reference_images.get(img.header["CAMNAME"])
+            img.reference_catalog = None if ref is None else ref.catalog
+        shifts = {img.header["CAMNAME"]: shift for img, shift in zip(images, shifts)}
+
+        east, north, self.rotation = fit_pointing_offset(self.models, shifts)
+        log.debug(f"offset: {east:.2f} {north:.2f} arcsec, rotation {self.rotation:.2e} rad")
+
+        position = self.reference_midpoint.spherical_offsets_by(east * u.arcsec, north * u.arcsec)
+        return images, position
+
+
+__all__ = ["GuideCalcPixel"]
@@ -1,73 +1,157 @@
-from typing import Tuple, Dict, List, Any
+from typing import Tuple, Dict, List, Any, Optional
+import asyncio
 import logging
+from concurrent.futures import Executor
 
 import numpy as np
 
+from astropy.coordinates import SkyCoord
 
-from lvmagp.images import Image
-from lvmagp.images.processors.detection import SourceDetection
+from lvmagp.images import Image, ImagePipeline
+from lvmagp.images.processors.astrometry import Astrometry, AstrometryDotLocal
+from lvmagp.images.processors.detection import SourceDetection, DaophotSourceDetection
+from lvmagp.images.processors.filters import MedianFilter
 from lvmagp.guide.calc.base import GuideCalc
 
-from photutils.centroids import centroid_quadratic
-
 
 log = logging.getLogger(__name__)
 log.setLevel(logging.DEBUG)
 
 
 class GuideCalcSimple(GuideCalc):
-    """Guide offset based on source detection."""
-
-    def __init__(self, source_detection: SourceDetection, **kwargs: Any):
-        """Initialize"""
+    """Guide offset based on centroids of the reference stars.
+
+    Astrometry is only done once for the reference images, every following frame only
+    measures the shift of the reference stars and converts it with the reference solution.
+    """
+
+    def __init__(self,
+                 source_detection: Optional[SourceDetection] = None,
+                 source_astrometry: Optional[Astrometry] = None,
+                 max_sources: int = 42,
+                 search_boxsize: int = 9,
+                 median_filter: int = 2,
+                 executor: Optional[Executor] = None,
+                 camera_positions: Optional[Dict[str, Tuple[float, float]]] = None,
+                 **kwargs: Any):
+        """Initialize
+
+        Args:
+            source_detection: Source detection or its class, Daophot if None.
+            source_astrometry: Astrometry for the reference images, local astrometry.net if None.
+            max_sources: Maximum number of reference stars per camera.
+            search_boxsize: Box size for centroiding in pixels.
+            median_filter: Size of median filter before detection, 0 to disable.
+            executor: Executor to analyse the cameras in.
+            camera_positions: Offsets of the camera centers from the pointing, east/north in
+                arcsec, needed for the pointing of a single camera.
+        """
+
+        if source_detection is None:
+            source_detection = DaophotSourceDetection(fwhm=8, threshold=8)
+        elif isinstance(source_detection, type):
+            source_detection = source_detection()
+
+        self.source_detection: SourceDetection = source_detection
+        self.source_astrometry = source_astrometry or AstrometryDotLocal(source_count=max_sources,
+                                                                         radius=1.0)
+        filters = [MedianFilter(size=median_filter)] if median_filter else []
+        self.detection_pipeline = ImagePipeline(filters + [self.source_detection],
+                                                executor=executor)
+        self.pipeline = ImagePipeline(filters + [self.source_detection, self.source_astrometry],
+                                      executor=executor)
+        self.executor = executor
+        self.reference_centroids: Dict[str, np.ndarray] = {}
+        self.reference_images: Dict[str, Image] = {}
+        self.reference_midpoint = None
+        self.max_sources = max_sources
+        self.search_boxsize = search_boxsize
+        self.camera_positions = camera_positions or {}
+
+    def _centroids(self, data, positions):
+        from photutils.centroids import centroid_quadratic
+
+        return np.array([centroid_quadratic(data, xpeak=x, ypeak=y,
+                                            search_boxsize=self.search_boxsize)
+                         for x, y in positions]).reshape(-1, 2)
+
+    @staticmethod
+    def _center(image: Image, shift=(0.0, 0.0)) -> Optional[SkyCoord]:
+        wcs = getattr(image, "astrometric_wcs", None)
+        if not wcs:
+            return None
+        return wcs.pixel_to_world(image.header['NAXIS1']//2 + shift[0],
+                                  image.header['NAXIS2']//2 + shift[1])
+
+    async def set_target(self, ra: float, dec: float) -> None:
+        """Prepare the astrometry for a target, e.g. fetch its guide stars."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.pipeline.executor, self.source_astrometry.set_target,
+                                   ra, dec)
+
+    async def pointing(self, images: List[Image]) -> Tuple[List[Image], SkyCoord]:
+        """Solve images and find the telescope pointing."""
+
+        solved = await self.pipeline.run(images)
+        for img in solved:
+            img.center = self._center(img)
+        return solved, self.calc_midpoint(solved)
+
+    def _set_reference(self, images: List[Image], analysed: List[Image]) -> None:
+        """Centroid the brightest detected sources of the analysed images on the raw images."""
+        self.reference_centroids = {}
+        self.reference_images = {}
+        for raw, img in zip(images, analysed):
+            cam = img.header["CAMNAME"]
+            sources = img.catalog
+            if sources is None or len(sources) == 0:
+                raise ValueError(f"no reference stars found on {cam}")
 
-        self.source_detection: SourceDetection = source_detection()
-        self.reference_centroids = None
-        self.max_sources = 42
-        self.search_boxsize = 9
+            # filter
+            sources = sources[np.argsort(-np.asarray(sources["peak"]))[:self.max_sources]]
+            ref = np.array([sources['x'], sources['y']]).transpose()
+            self.reference_centroids[cam] = self._centroids(raw.data, ref)
+            self.reference_images[cam] = img
+            log.debug(f"{cam}: {len(self.reference_centroids[cam])} reference stars")
 
-    async def reference_target(self, images: List[Image]) -> None:
+    async def reference_target(self, images: List[Image]) -> Tuple[List[Image], SkyCoord]:
         """Analyse given images."""
 
-        self.reference_centroids = []
+        solved, self.reference_midpoint = await self.pointing(images)
+        self._set_reference(images, solved)
 
-        # do photometry
-        for img in images:
-            image = self.source_detection(img)
-            # filter
-            sources = image.catalog
-            sources.sort("peak")
-            sources.reverse()
-            sources = sources[:self.max_sources]
-            ref = np.array([sources['x'], sources['y']]).transpose()
-            self.reference_centroids.append(
-                np.array(
-                    [centroid_quadratic(img.data, xpeak=x, ypeak=y, search_boxsize=self.search_boxsize) 
-                        for x, y in ref]))
-        print(f"{len(self.reference_centroids[0])} {len(self.reference_centroids[1])}")
+        return solved, self.reference_midpoint
 
-    async def find_offset(self, images: List[Image]) -> float:
+    def _reference_cameras(self) -> List[str]:
+        return list(self.reference_centroids)
+
+    async def _shifts(self, images: List[Image]) -> List[np.ndarray]:
+        """Pixel shifts of the reference stars, reference minus current, per image."""
+        self.check_cameras(images, self._reference_cameras())
+        loop = asyncio.get_running_loop()
+        return await asyncio.gather(*[loop.run_in_executor(self.executor, self._shift, img)
+                                      for img in images])
+
+    def _shift(self, image: Image) -> np.ndarray:
+        ref_cen = self.reference_centroids[image.header["CAMNAME"]]
+        centroids = self._centroids(image.data, ref_cen)
+        good = ~np.isnan(centroids).any(axis=1)
+        if not good.any():
+            raise ValueError(f"no reference stars found on {image.header['CAMNAME']}")
+        return np.median(ref_cen[good] - centroids[good], axis=0)
+
+    async def find_offset(self, images: List[Image]) -> Tuple[List[Image], SkyCoord]:
         """ Find guide offset """
 
-        diff_centroids = []
-
-        try:
-            for im_idx, img in enumerate(images):
-                ref_cen = self.reference_centroids[im_idx]
-                diff_cen = []
-                for c_idx, xy in enumerate(ref_cen):
-                   x, y = xy
-                   centroid = centroid_quadratic(img.data, xpeak=x, ypeak=y, search_boxsize=self.search_boxsize)
-                   if not np.isnan(centroid).any():
-                       diff_cen.append(ref_cen[c_idx] - centroid)
-                diff_centroids.append(np.array(diff_cen))
-            print(f"{images[0].header['CAMNAME']}: {np.median(diff_centroids[0], axis=0)} {images[1].header['CAMNAME']}: {np.median(diff_centroids[1], axis=0)}px")
-            diff =  np.median(np.concatenate((diff_centroids[0], diff_centroids[1])), axis=0)
-            return diff
-        
-
-        except Exception as ex:
-            print(f"error: {type(ex)} {ex}")
+        shifts = await self._shifts(images)
+
+        for img, diff in zip(images, shifts):
+            ref = self.reference_images[img.header["CAMNAME"]]
+            log.debug(f"{img.header['CAMNAME']}: {diff}px")
+            img.shift = diff
+            img.center = self._center(ref, diff)
+
+        return images, self.calc_midpoint(images)
 
 
 __all__ = ["GuideCalcSimple"]
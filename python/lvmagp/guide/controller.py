@@ -0,0 +1,230 @@
+import time
+from math import inf
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+class DriftFilter:
+    """Kalman filter for the guide error and its drift rate on one axis.
+
+    The state is the error and its rate, corrections sent to the mount are subtracted
+    from the error in the prediction.
+    """
+
+    def __init__(self, measurement_noise: float = 0.5, drift_noise: float = 0.001,
+                 position_noise: float = 0.05):
+        """Init new filter.
+
+        Args:
+            measurement_noise: Noise of a single error measurement, e.g. from seeing.
+            drift_noise: Random walk of the drift rate per sqrt(second).
+            position_noise: Random walk of the error per sqrt(second), e.g. from wind.
+        """
+        self.measurement_var = measurement_noise ** 2
+        self.drift_var = drift_noise ** 2
+        self.position_var = position_noise ** 2
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget the state."""
+        self.x = np.zeros(2)
+        self.P = np.diag([inf, inf])
+        self.initialized = False
+
+    @property
+    def position(self) -> float:
+        """Filtered error."""
+        return float(self.x[0])
+
+    @property
+    def rate(self) -> float:
+        """Filtered drift rate of the error per second."""
+        return float(self.x[1]) if self.initialized else 0.0
+
+    def predict(self, dt: float, correction: float = 0.0) -> None:
+        """Propagate the state by dt seconds after a correction was applied."""
+        F = np.array([[1.0, dt], [0.0, 1.0]])
+        Q = self.drift_var * np.array([[dt ** 3 / 3, dt ** 2 / 2], [dt ** 2 / 2, dt]])
+        Q[0, 0] += self.position_var * dt
+        self.x = F @ self.x - np.array([correction, 0.0])
+        if self.initialized:
+            self.P = F @ self.P @ F.T + Q
+
+    def update(self, error: float) -> float:
+        """Add a measurement and return the filtered error."""
+        if not self.initialized:
+            # the first measurement fixes the error, the rate stays unknown until the second
+            self.x = np.array([error, 0.0])
+            self.P = np.diag([self.measurement_var, 1.0])
+            self.initialized = True
+            return self.position
+
+        S = self.P[0, 0] + self.measurement_var
+        K = self.P[:, 0] / S
+        self.x = self.x + K * (error - self.x[0])
+        self.P = self.P - np.outer(K, self.P[0, :])
+        return self.position
+
+
+class AxisController:
+    """PID controller for the guide error on one mount axis.
+
+    Anti-windup by conditional integration, the integral is not increased while the output
+    is limited. Optionally the error is filtered by a DriftFilter and the estimated drift
+    over the next cycle is fed forward.
+    """
+
+    def __init__(
+        self,
+        kp: float = 0.8,
+        ki: float = 0.0,
+        kd: float = 0.0,
+        max_step: float = inf,
+        max_integral: float = inf,
+        drift_filter: Optional[DriftFilter] = None,
+        feed_forward: bool = True,
+    ):
+        """Init new axis controller.
+
+        Args:
+            kp: Proportional gain.
+            ki: Integral gain per second.
+            kd: Derivative gain in seconds.
+            max_step: Largest correction per cycle.
+            max_integral: Limit of the error integral.
+            drift_filter: Filter for the error, raw measurements are used if None.
+            feed_forward: Add the drift expected until the next cycle, needs a drift filter.
+        """
+        self.kp = kp
+        self.ki = ki
+        self.kd = kd
+        self.max_step = max_step
+        self.max_integral = max_integral
+        self.drift_filter = drift_filter
+        self.feed_forward = feed_forward
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget integral, last error and filter state."""
+        self.integral = 0.0
+        self.last_error: Optional[float] = None
+        self.last_output = 0.0
+        if self.drift_filter:
+            self.drift_filter.reset()
+
+    def update(self, error: float, dt: float) -> float:
+        """Compute correction for a new error measurement.
+
+        Args:
+            error: Measured error.
+            dt: Time since the last measurement in seconds, 0 for the first.
+
+        Returns:
+            Correction to apply.
+        """
+        if self.drift_filter:
+            if self.drift_filter.initialized:
+                self.drift_filter.predict(dt, self.last_output)
+            error = self.drift_filter.update(error)
+
+        output = self.kp * error
+        integral = np.clip(self.integral + error * dt, -self.max_integral, self.max_integral)
+        output += self.ki * integral
+        if self.kd and self.last_error is not None and dt > 0:
+            output += self.kd * (error - self.last_error) / dt
+        if self.drift_filter and self.feed_forward:
+            output += self.drift_filter.rate * dt
+
+        limited = float(np.clip(output, -self.max_step, self.max_step))
+        if limited == output or np.sign(error) != np.sign(output):
+            self.integral = float(integral)
+
+        self.last_error = error
+        self.last_output = limited
+        return limited
+
+
+class GuideController:
+    """Guide controller for both mount axes.
+
+    With the defaults this is the plain proportional correction with a deadband the
+    guider always used.
+    """
+
+    def __init__(
+        self,
+        kp: float = 0.8,
+        ki: float = 0.0,
+        kd: float = 0.0,
+        deadband: float = 0.8,
+        max_step: float = inf,
+        max_integral: float = inf,
+        kalman: bool = False,
+        measurement_noise: float = 0.5,
+        drift_noise: float = 0.001,
+        position_noise: float = 0.05,
+        feed_forward: bool = True,
+        **kwargs,
+    ):
+        """Init new controller.
+
+        Args:
+            kp: Proportional gain.
+            ki: Integral gain per second.
+            kd: Derivative gain in seconds.
+            deadband: No correction is sent if it is smaller than this on both axes.
+            max_step: Largest correction per axis and cycle.
+            max_integral: Limit of the error integral.
+            kalman: Filter the error and estimate the drift rate with a Kalman filter.
+            measurement_noise: Noise of a single error measurement for the Kalman filter.
+            drift_noise: Random walk of the drift rate per sqrt(second) for the Kalman filter.
+            position_noise: Random walk of the error per sqrt(second) for the Kalman filter.
+            feed_forward: Add the estimated drift until the next cycle, needs kalman.
+        """
+        self.deadband = deadband
+        self.axes = [
+            AxisController(kp, ki, kd, max_step, max_integral,
+                           DriftFilter(measurement_noise, drift_noise, position_noise)
+                           if kalman else None,
+                           feed_forward)
+            for _ in range(2)
+        ]
+        self.last_time: Optional[float] = None
+
+    def reset(self) -> None:
+        """Reset the controller, e.g. for a new guide reference."""
+        for axis in self.axes:
+            axis.reset()
+        self.last_time = None
+
+    @property
+    def drift_rate(self) -> Tuple[float, float]:
+        """Estimated drift rate per axis and second, zero without kalman."""
+        return tuple(axis.drift_filter.rate if axis.drift_filter else 0.0 for axis in self.axes)
+
+    def update(self, error: Tuple[float, float],
+               now: Optional[float] = None) -> Tuple[float, float]:
+        """Compute corrections for a new error measurement.
+
+        Args:
+            error: Measured error per axis.
+            now: Time of the measurement in seconds, time.monotonic() if None.
+
+        Returns:
+            Corrections per axis, both zero if within the deadband.
+        """
+        now = time.monotonic() if now is None else now
+        dt = 0.0 if self.last_time is None else now - self.last_time
+        self.last_time = now
+
+        output = [axis.update(e, dt) for axis, e in zip(self.axes, error)]
+        if all(abs(o) <= self.deadband for o in output):
+            # nothing sent to the mount, the filters must not expect a correction
+            for axis in self.axes:
+                axis.last_output = 0.0
+            return 0.0, 0.0
+        return output[0], output[1]
+
+
+__all__ = ["DriftFilter", "AxisController", "GuideController"]
@@ -0,0 +1,147 @@
+import importlib
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+from lvmagp.guide.calc import GuideCalc
+from lvmagp.guide.offset import GuideOffset
+
+
+# Short names usable as "type" in the guide configuration, anything else has to be a dotted path.
+GUIDE_CLASSES = {
+    "GuideCalcAstrometry": "lvmagp.guide.calc.GuideCalcAstrometry",
+    "GuideCalcSimple": "lvmagp.guide.calc.GuideCalcSimple",
+    "GuideCalcPixel": "lvmagp.guide.calc.GuideCalcPixel",
+    "GuideCalcCorrelation": "lvmagp.guide.calc.GuideCalcCorrelation",
+    "GuideOffsetPWI": "lvmagp.guide.offset.GuideOffsetPWI",
+    "GuideController": "lvmagp.guide.controller.GuideController",
+    "AxisTransform": "lvmagp.guide.offset.transform.AxisTransform",
+    "DaophotSourceDetection": "lvmagp.images.processors.detection.DaophotSourceDetection",
+    "SepSourceDetection": "lvmagp.images.processors.detection.SepSourceDetection",
+    "AstrometryDotLocal": "lvmagp.images.processors.astrometry.AstrometryDotLocal",
+    "CatalogMatchAstrometry": "lvmagp.images.processors.astrometry.CatalogMatchAstrometry",
+    "SolveCache": "lvmagp.images.processors.astrometry.SolveCache",
+    "MedianFilter": "lvmagp.images.processors.filters.MedianFilter",
+    "FrameQualityCheck": "lvmagp.images.processors.quality.FrameQualityCheck",
+    "SeeingMonitor": "lvmagp.guide.seeing.SeeingMonitor",
+}
+
+# Used if the configuration has no guide section, same as the hard coded stack before.
+# Quality check and seeing monitor are off unless configured.
+DEFAULT_GUIDE_CONFIG = {
+    "calc": {"type": "GuideCalcAstrometry"},
+    "offset": {"type": "GuideOffsetPWI"},
+    "quality": None,
+    "seeing": None,
+}
+
+
+def get_class(name: str) -> type:
+    """Class for a short name from GUIDE_CLASSES or a dotted path."""
+    path = GUIDE_CLASSES.get(name, name)
+    module, _, cls = path.rpartition(".")
+    if not module:
+        raise ValueError(f"unknown guide class: {name}")
+    return getattr(importlib.import_module(module), cls)
+
+
+def create(config: Dict[str, Any], **kwargs: Any) -> Any:
+    """Create an object from a config dict with a "type" key.
+
+    Nested dicts with a "type" key are created first and passed as parameters.
+
+    Args:
+        config: Config with class in "type" and the parameters of the class.
+        kwargs: Additional parameters, config values take precedence.
+
+    Returns:
+        The new object.
+    """
+    params = dict(config)
+    cls = get_class(params.pop("type"))
+    for key, value in params.items():
+        if isinstance(value, dict) and "type" in value:
+            params[key] = create(value)
+    return cls(**{**kwargs, **params})
+
+
+def create_quality_check(config: Optional[Dict[str, Any]]) -> Optional[Any]:
+    """Create the frame quality check from the "guide" section of the actor config.
+
+    Args:
+        config: Guide config.
+
+    Returns:
+        The quality check, None if quality is missing or null.
+    """
+    config = {**DEFAULT_GUIDE_CONFIG, **(config or {})}
+    return create(config["quality"]) if config["quality"] else None
+
+
+def create_seeing_monitor(config: Optional[Dict[str, Any]]) -> Optional[Any]:
+    """Create the seeing and transparency monitor from the "guide" section of the actor config.
+
+    Args:
+        config: Guide config.
+
+    Returns:
+        The monitor, None if seeing is missing or null.
+    """
+    config = {**DEFAULT_GUIDE_CONFIG, **(config or {})}
+    return create(config["seeing"]) if config["seeing"] else None
+
+
+def create_guide_stack(
+    config: Optional[Dict[str, Any]],
+    telescope_mount: Any,
+    executor: Optional[Executor] = None,
+    **kwargs: Any,
+) -> Tuple[GuideCalc, GuideOffset]:
+    """Create guide offset calculation and mount offset from the "guide" section of the config.
+
+    Example:
+
+        guide:
+          pool_size: 2
+          cameras: [east, west]
+          exposure: {readout_timeout: 30, retries: 2, retry_delay: 1, max_skipped: 5}
+          solver_queue: {concurrency: 2}
+          calc:
+            type: GuideCalcAstrometry
+            source_count: 42
+            source_detection: {type: SepSourceDetection, threshold: 12.0, minarea: 24}
+            source_astrometry: {type: AstrometryDotLocal, radius: 1.0}
+          offset:
+            type: GuideOffsetPWI
+            corr_factor: 0.8
+            min_offset: 0.8
+          quality:
+            type: FrameQualityCheck
+            min_sources: 3
+            max_ellipticity: 0.4
+          seeing:
+            type: SeeingMonitor
+            window: 20
+            pixel_scale: 1.0
+
+    Args:
+        config: Guide config, defaults to DEFAULT_GUIDE_CONFIG.
+        telescope_mount: Proxy of the mount, passed to the offset.
+        executor: Executor for the image processing, a thread pool of pool_size if None.
+        kwargs: Additional parameters for the calc, e.g. logger.
+
+    Returns:
+        Tuple of guide calc and guide offset.
+    """
+    config = {**DEFAULT_GUIDE_CONFIG, **(config or {})}
+
+    if executor is None and "pool_size" in config:
+        executor = ThreadPoolExecutor(config["pool_size"], thread_name_prefix="guide")
+
+    calc = create(config["calc"], executor=executor, **kwargs)
+    offset = create(config["offset"], telescope_mount=telescope_mount)
+
+    return calc, offset
+
+
+__all__ = ["GUIDE_CLASSES", "DEFAULT_GUIDE_CONFIG", "get_class", "create", "create_guide_stack",
+           "create_quality_check", "create_seeing_monitor"]
@@ -10,5 +10,9 @@ class GuideOffset:
         """
         raise NotImplementedError
 
+    def reset(self) -> None:
+        """Reset state kept between offsets, e.g. for a new guide reference."""
+        pass
+
 
 __all__ = ["GuideOffset"]
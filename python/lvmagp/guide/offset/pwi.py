@@ -1,9 +1,11 @@
-from typing import Tuple, Dict, List, Any
+from typing import Tuple, Dict, List, Any, Optional
 import logging
 
 import numpy as np
 
 from lvmagp.guide.offset.base import GuideOffset
+from lvmagp.guide.controller import GuideController
+from lvmagp.guide.offset.transform import AxisTransform
 from astropy.coordinates import Angle, SkyCoord
 from lvmtipo.pwimount import delta_radec2mot_axis
 
@@ -14,29 +16,72 @@ log.setLevel(logging.DEBUG)
 class GuideOffsetPWI(GuideOffset):
     """Guide offset based on source detection."""
 
-    def __init__(self, telescope_mount, corr_factor:float=0.8, min_offset:float=0.8):
-        """ Initialize """
+    def __init__(self, telescope_mount, corr_factor:float=0.8, min_offset:float=0.8,
+                 controller:Optional[GuideController]=None,
+                 transform:Optional[AxisTransform]=None):
+        """ Initialize
+
+        Args:
+            telescope_mount: Proxy of the mount.
+            corr_factor: Fraction of the offset to correct, if no controller is given.
+            min_offset: Deadband of the correction, if no controller is given.
+            controller: Controller computing the corrections while guiding.
+            transform: Linearized sky to axis transform used while guiding.
+        """
 
         self.telescope_mount = telescope_mount
         self.corr_factor = corr_factor
         self.min_offset = min_offset
-
-    async def offset(self, reference_position:SkyCoord, current_position:SkyCoord):
-        """ offset mount """
+        self.controller = controller or GuideController(kp=corr_factor, deadband=min_offset)
+        self.transform = transform or AxisTransform(delta_radec2mot_axis)
+
+    def reset(self):
+        """ reset controller and transform """
+        self.controller.reset()
+        self.transform.reset()
+
+    async def offset(self, reference_position:SkyCoord, current_position:SkyCoord,
+                     corr_factor:Optional[float]=None, min_offset:Optional[float]=None):
+        """ offset mount
+
+        Args:
+            reference_position: Position the telescope should point to.
+            current_position: Position the telescope points to.
+            corr_factor: Fraction of the offset to correct, default of the instance if None.
+            min_offset: Smaller offsets in arcsec are not corrected, default of the instance if
+                None.
+        """
+        # explicit factors bypass the controller, e.g. for acquisition
+        use_controller = corr_factor is None and min_offset is None
+        corr_factor = self.corr_factor if corr_factor is None else corr_factor
+        min_offset = self.min_offset if min_offset is None else min_offset
 
         status = None
         try:
-            ra_diff, dec_diff = [f.arcsecond for f in reference_position.spherical_offsets_to(current_position)]
+            if use_controller:
+                # small guide offsets, linearized around the reference
+                (ra_diff, dec_diff), (axis0_diff, axis1_diff) = self.transform(reference_position,
+                                                                               current_position)
+            else:
+                ra_diff, dec_diff = [f.arcsecond for f in
+                                     reference_position.spherical_offsets_to(current_position)]
+                axis_diff = delta_radec2mot_axis(reference_position, current_position)
+                axis0_diff, axis1_diff = [a.deg for a in axis_diff]
             log.debug(f"radec: {ra_diff} {dec_diff}")
-
-            axis0_diff, axis1_diff = delta_radec2mot_axis(reference_position, current_position)
             log.debug(f"axis: {axis0_diff} {axis1_diff}")
 
-            status = {"radec_diff": (ra_diff, dec_diff), "axis_diff": (axis0_diff.deg, axis1_diff.deg)}
-            axis0_offset = axis0_diff.deg * self.corr_factor
-            axis1_offset = axis1_diff.deg * self.corr_factor
-
-            if(abs(axis0_offset) > self.min_offset or abs(axis1_offset) > self.min_offset):
+            status = {"radec_diff": (ra_diff, dec_diff), "axis_diff": (axis0_diff, axis1_diff)}
+            if use_controller:
+                # the controller applies its own deadband
+                axis0_offset, axis1_offset = self.controller.update((axis0_diff, axis1_diff))
+                status.update({"drift_rate": self.controller.drift_rate})
+                correct = axis0_offset != 0 or axis1_offset != 0
+            else:
+                axis0_offset = axis0_diff * corr_factor
+                axis1_offset = axis1_diff * corr_factor
+                correct = abs(axis0_offset) > min_offset or abs(axis1_offset) > min_offset
+
+            if correct:
                 log.debug(f"correct axis: {axis0_offset} {axis1_offset}")
                 await self.telescope_mount.offset(axis0_add_arcsec = axis0_offset,
                                                   axis1_add_arcsec = axis1_offset)
@@ -45,7 +90,8 @@ class GuideOffsetPWI(GuideOffset):
             return status
 
         except Exception as ex:
-            print(f"error: {type(ex)} {ex}")
+            log.error(f"mount offset failed: {type(ex).__name__} {ex}")
+            raise
 
 
 __all__ = ["GuideOffsetPWI"]
@@ -0,0 +1,122 @@
+import time
+from math import radians, degrees, sin, cos, hypot
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+
+def sky_offset(ra0: float, dec0: float, ra1: float, dec1: float) -> Tuple[float, float]:
+    """Offset of a position in the tangent plane of a reference.
+
+    Args:
+        ra0: Right ascension of the reference in degrees.
+        dec0: Declination of the reference in degrees.
+        ra1: Right ascension of the position in degrees.
+        dec1: Declination of the position in degrees.
+
+    Returns:
+        Offset towards east and north in arcsec.
+    """
+    ra0, dec0, ra1, dec1 = radians(ra0), radians(dec0), radians(ra1), radians(dec1)
+    cosd = sin(dec1) * sin(dec0) + cos(dec1) * cos(dec0) * cos(ra1 - ra0)
+    xi = cos(dec1) * sin(ra1 - ra0) / cosd
+    eta = (sin(dec1) * cos(dec0) - cos(dec1) * sin(dec0) * cos(ra1 - ra0)) / cosd
+    return degrees(xi) * 3600.0, degrees(eta) * 3600.0
+
+
+class AxisTransform:
+    """Linear transform of small sky offsets to mount axis offsets.
+
+    The Jacobian of lvmtipo's delta_radec2mot_axis is computed by finite differences around a
+    reference position and reused until the reference moves more than max_distance or the
+    Jacobian is older than max_age, the sky rotates against the mount axes over time.
+    """
+
+    def __init__(
+        self,
+        delta: Optional[Callable] = None,
+        step: float = 10.0,
+        max_distance: float = 60.0,
+        max_age: float = 60.0,
+    ):
+        """Init new transform.
+
+        Args:
+            delta: Function (reference, position) -> axis offsets, delta_radec2mot_axis if None.
+            step: Step of the finite differences in arcsec.
+            max_distance: Distance of the reference in arcsec that triggers a new Jacobian.
+            max_age: Age of the Jacobian in seconds that triggers a new one.
+        """
+        if delta is None:
+            from lvmtipo.pwimount import delta_radec2mot_axis as delta
+
+        self.delta = delta
+        self.step = step
+        self.max_distance = max_distance
+        self.max_age = max_age
+        self.reset()
+
+    def reset(self) -> None:
+        """Drop the Jacobian."""
+        self.jacobian: Optional[np.ndarray] = None
+        self.origin: Optional[Tuple[float, float]] = None
+        self.time = -np.inf
+
+    def update(self, reference) -> np.ndarray:
+        """Compute the Jacobian around a reference.
+
+        Args:
+            reference: SkyCoord of the reference.
+
+        Returns:
+            2x2 matrix from offsets east/north in arcsec to axis offsets.
+        """
+        import astropy.units as u
+
+        columns = []
+        for east, north in ((self.step, 0.0), (0.0, self.step)):
+            position = reference.spherical_offsets_by(east * u.arcsec, north * u.arcsec)
+            columns.append([a.deg / self.step for a in self.delta(reference, position)])
+
+        self.jacobian = np.array(columns).T
+        self.origin = (reference.ra.deg, reference.dec.deg)
+        self.time = time.monotonic()
+        return self.jacobian
+
+    def outdated(self, ra: float, dec: float) -> bool:
+        """Whether the Jacobian has to be recomputed for a reference at ra/dec in degrees."""
+        if self.jacobian is None or time.monotonic() - self.time > self.max_age:
+            return True
+        return hypot(*sky_offset(*self.origin, ra, dec)) > self.max_distance
+
+    def axis_offsets(self, offsets: np.ndarray) -> np.ndarray:
+        """Transform sky offsets to axis offsets with the current Jacobian.
+
+        Args:
+            offsets: Offsets east/north in arcsec, shape (2,) or (N, 2).
+
+        Returns:
+            Axis offsets in the units of delta_radec2mot_axis(...).deg, same shape.
+        """
+        return np.asarray(offsets) @ self.jacobian.T
+
+    def __call__(self, reference, position) -> Tuple[Tuple[float, float], Tuple[float, float]]:
+        """Sky and axis offset from reference to position.
+
+        Args:
+            reference: SkyCoord of the reference.
+            position: SkyCoord of the current position.
+
+        Returns:
+            Tuple of the offset east/north in arcsec and the axis offsets.
+        """
+        ra0, dec0 = reference.ra.deg, reference.dec.deg
+        if self.outdated(ra0, dec0):
+            self.update(reference)
+
+        offset = sky_offset(ra0, dec0, position.ra.deg, position.dec.deg)
+        axis0, axis1 = self.axis_offsets(offset)
+        return offset, (float(axis0), float(axis1))
+
+
+__all__ = ["AxisTransform", "sky_offset"]
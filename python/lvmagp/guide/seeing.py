@@ -0,0 +1,169 @@
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from lvmagp.images import Image
+
+
+class SeeingMonitor:
+    """Rolling seeing and transparency from the source catalogs of the guide frames.
+
+    Seeing is the median FWHM of unsaturated round sources, transparency the median flux
+    rate of sources matched to the first frame of a camera after reset, relative to it.
+    Both are kept per camera over the last frames and summarised by median and scaled MAD.
+    No image data is touched, frames without catalog are ignored. Seeing needs a fwhm column,
+    e.g. from SepSourceDetection, DaophotSourceDetection has none and only gives transparency.
+    """
+
+    def __init__(
+        self,
+        window: int = 20,
+        min_sources: int = 3,
+        max_ellipticity: float = 0.3,
+        saturation: float = 60000,
+        match_radius: float = 3.0,
+        match_count: int = 50,
+        pixel_scale: Optional[float] = None,
+    ):
+        """Init new monitor.
+
+        Args:
+            window: Number of frames per camera the estimates are computed from.
+            min_sources: Minimum number of good sources in a frame.
+            max_ellipticity: Sources with larger ellipticity are ignored.
+            saturation: Sources with larger peak are ignored.
+            match_radius: Radius in pixels for matching sources to the transparency reference.
+            match_count: Number of brightest sources matched.
+            pixel_scale: Pixel scale in arcsec/pixel if not in the image header or WCS.
+        """
+        self.window = window
+        self.min_sources = min_sources
+        self.max_ellipticity = max_ellipticity
+        self.saturation = saturation
+        self.match_radius = match_radius
+        self.match_count = match_count
+        self.pixel_scale = pixel_scale
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget all frames and the transparency references, e.g. for a new field."""
+        self.frames: Dict[str, deque] = {}
+        self.references: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def _scale(self, image: Image) -> Optional[float]:
+        scale = image.pixel_scale
+        wcs = getattr(image, "astrometric_wcs", None)
+        if scale is None and wcs is not None:
+            scale = float(np.mean(np.abs(wcs.proj_plane_pixel_scales()))) * 3600.0
+        return scale or self.pixel_scale
+
+    def _sources(self, image: Image) -> Optional[Dict[str, np.ndarray]]:
+        """Good sources of a catalog as column arrays."""
+        catalog = image.catalog
+        if catalog is None or len(catalog) < self.min_sources:
+            return None
+
+        columns = {name: np.asarray(catalog[name], dtype=float)
+                   for name in ("x", "y", "flux", "peak", "fwhm", "ellipticity")
+                   if name in catalog.colnames}
+        good = np.ones(len(catalog), dtype=bool)
+        if "peak" in columns:
+            good &= columns["peak"] < self.saturation
+        if "ellipticity" in columns:
+            good &= columns["ellipticity"] < self.max_ellipticity
+        if "fwhm" in columns:
+            good &= np.isfinite(columns["fwhm"]) & (columns["fwhm"] > 0)
+
+        if np.count_nonzero(good) < self.min_sources:
+            return None
+        return {name: values[good] for name, values in columns.items()}
+
+    def _transparency(self, camera: str, sources: Dict[str, np.ndarray], exptime: float) -> float:
+        if "flux" not in sources:
+            return np.nan
+
+        brightest = np.argsort(sources["flux"])[::-1][:self.match_count]
+        xy = np.column_stack([sources["x"][brightest], sources["y"][brightest]])
+        rate = sources["flux"][brightest] / exptime
+
+        if camera not in self.references:
+            self.references[camera] = (xy, rate)
+            return 1.0
+
+        ref_xy, ref_rate = self.references[camera]
+        dist = np.hypot(*(xy[:, None, :] - ref_xy[None, :, :]).transpose(2, 0, 1))
+        nearest = np.argmin(dist, axis=1)
+        matched = (dist[np.arange(len(xy)), nearest] < self.match_radius) & (ref_rate[nearest] > 0)
+        if np.count_nonzero(matched) < self.min_sources:
+            return np.nan
+        return float(np.median(rate[matched] / ref_rate[nearest[matched]]))
+
+    def update(self, images: List[Image], now: Optional[float] = None) -> None:
+        """Add the catalogs of a guide frame.
+
+        Args:
+            images: Images of all cameras, with catalogs.
+            now: Time of the frame, time.time() if None.
+        """
+        now = time.time() if now is None else now
+        for img in images or []:
+            sources = self._sources(img)
+            if sources is None:
+                continue
+
+            camera = img.header.get("CAMNAME", "")
+            scale = self._scale(img)
+            seeing = float(np.median(sources["fwhm"])) * (scale or 1.0) \
+                if "fwhm" in sources else np.nan
+            exptime = float(img.header.get("EXPTIME") or 1.0)
+            transparency = self._transparency(camera, sources, exptime)
+
+            frames = self.frames.setdefault(camera, deque(maxlen=self.window))
+            frames.append((now, seeing, transparency, len(sources["x"]), scale is not None,
+                           "fwhm" in sources))
+
+    @staticmethod
+    def _robust(values: np.ndarray) -> Tuple[Optional[float], Optional[float]]:
+        values = values[np.isfinite(values)]
+        if len(values) == 0:
+            return None, None
+        median = np.median(values)
+        return float(median), float(1.4826 * np.median(np.abs(values - median)))
+
+    def status(self) -> Dict[str, Any]:
+        """Current estimates per camera and the median over all cameras."""
+        cameras = {}
+        for camera, frames in self.frames.items():
+            frames = np.array(frames, dtype=float)
+            seeing, seeing_scatter = self._robust(frames[:, 1])
+            transparency, transparency_scatter = self._robust(frames[:, 2])
+            cameras[camera] = {
+                "seeing": seeing,
+                "seeing_scatter": seeing_scatter,
+                "transparency": transparency,
+                "transparency_scatter": transparency_scatter,
+                "sources": int(frames[-1, 3]),
+                "frames": len(frames),
+                "unit": "arcsec" if frames[-1, 4] else "pixel",
+                "time": float(frames[-1, 0]),
+            }
+
+        seeing = [c["seeing"] for c in cameras.values() if c["seeing"] is not None]
+        transparency = [c["transparency"] for c in cameras.values()
+                        if c["transparency"] is not None]
+        status = {
+            "seeing": float(np.median(seeing)) if seeing else None,
+            "transparency": float(np.median(transparency)) if transparency else None,
+            "cameras": cameras,
+        }
+
+        no_fwhm = [camera for camera, frames in self.frames.items() if not frames[-1][5]]
+        if no_fwhm:
+            status["warning"] = f"no fwhm column in the catalogs of {', '.join(no_fwhm)}, " \
+                                "seeing needs e.g. SepSourceDetection"
+        return status
+
+
+__all__ = ["SeeingMonitor"]
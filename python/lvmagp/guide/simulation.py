@@ -0,0 +1,79 @@
+"""Closed loop simulation of the guide controller.
+
+Run ``python -m lvmagp.guide.simulation`` to compare controller settings.
+"""
+
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from lvmagp.guide.controller import GuideController
+
+
+def simulate(
+    controller: GuideController,
+    cycles: int = 500,
+    dt: float = 5.0,
+    drift: Tuple[float, float] = (0.05, -0.03),
+    drift_walk: float = 0.002,
+    noise: float = 0.4,
+    jitter: float = 0.1,
+    seed: Optional[int] = 0,
+) -> Dict[str, Any]:
+    """Simulate guiding with a mount drifting away and noisy error measurements.
+
+    Args:
+        controller: Controller to simulate, it is reset first.
+        cycles: Number of guide cycles.
+        dt: Time between cycles in seconds.
+        drift: Initial drift rate per axis and second.
+        drift_walk: Random walk of the drift rate per cycle.
+        noise: Measurement noise, e.g. from seeing.
+        jitter: Random walk of the pointing per cycle, e.g. from wind.
+        seed: Seed of the random generator.
+
+    Returns:
+        Dict with per cycle error, measurement and correction and the summary values
+        rms, max and commands.
+    """
+    rng = np.random.default_rng(seed)
+    controller.reset()
+
+    rate = np.array(drift, dtype=float)
+    error = np.zeros(2)
+    errors = np.zeros((cycles, 2))
+    measured = np.zeros((cycles, 2))
+    corrections = np.zeros((cycles, 2))
+
+    for i in range(cycles):
+        rate += rng.normal(0, drift_walk, 2)
+        error += rate * dt + rng.normal(0, jitter, 2)
+
+        measured[i] = error + rng.normal(0, noise, 2)
+        corrections[i] = controller.update(tuple(measured[i]), now=i * dt)
+        errors[i] = error
+        error = error - corrections[i]
+
+    # skip the settling of the controller
+    settled = errors[min(10, cycles // 10):]
+    return {
+        "time": np.arange(cycles) * dt,
+        "error": errors,
+        "measured": measured,
+        "correction": corrections,
+        "rms": float(np.sqrt(np.mean(np.sum(settled ** 2, axis=1)))),
+        "max": float(np.max(np.hypot(settled[:, 0], settled[:, 1]))),
+        "commands": int(np.count_nonzero(np.any(corrections != 0, axis=1))),
+    }
+
+
+if __name__ == "__main__":
+    controllers = {
+        "proportional": GuideController(),
+        "pi": GuideController(kp=0.8, ki=0.02, max_step=10.0, max_integral=20.0),
+        "kalman": GuideController(kp=1.0, kalman=True, measurement_noise=0.4),
+    }
+    for name, controller in controllers.items():
+        result = simulate(controller)
+        print(f"{name:>14}: rms {result['rms']:.2f} max {result['max']:.2f} "
+              f"commands {result['commands']}")
@@ -0,0 +1,177 @@
+import asyncio
+import heapq
+import itertools
+import time
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from lvmagp.exceptions import LvmagpSolveDropped
+
+
+class _Job:
+    __slots__ = ("priority", "seq", "func", "args", "future", "key", "queued", "expires",
+                 "started")
+
+    def __init__(self, priority, seq, func, args, future, key, queued, expires):
+        self.priority = priority
+        self.seq = seq
+        self.func = func
+        self.args = args
+        self.future = future
+        self.key = key
+        self.queued = queued
+        self.expires = expires
+        self.started = False
+
+
+class SolverQueue:
+    """Bounded concurrency queue for solves, e.g. an image pipeline ending in astrometry.
+
+    At most concurrency jobs run in the executor, the others wait ordered by priority and
+    age. A waiting job is dropped when a newer job with the same key arrives or when its
+    deadline passes before it started, its caller gets LvmagpSolveDropped. Running jobs
+    are never interrupted.
+    """
+
+    REFERENCE = 0
+    GUIDE = 1
+
+    def __init__(self, concurrency: int = 2, executor: Optional[Executor] = None):
+        """Init new queue.
+
+        Args:
+            concurrency: Number of jobs running at the same time.
+            executor: Executor to run the jobs in, default executor of the loop if None.
+        """
+        self.concurrency = concurrency
+        self.executor = executor
+        self._heap: List[Tuple[int, int, _Job]] = []
+        self._seq = itertools.count()
+        self.running = 0
+        self.reset_metrics()
+
+    def reset_metrics(self) -> None:
+        """Zero all counters."""
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.superseded = 0
+        self.deadline_misses = 0
+        self.max_depth = 0
+        self.wait_sum = 0.0
+        self.wait_max = 0.0
+        self.run_sum = 0.0
+
+    @property
+    def depth(self) -> int:
+        """Number of waiting jobs."""
+        return sum(1 for _, _, job in self._heap if not job.future.done())
+
+    async def submit(
+        self,
+        func: Callable[..., Any],
+        *args: Any,
+        priority: int = GUIDE,
+        deadline: Optional[float] = None,
+        key: Optional[Hashable] = None,
+    ) -> Any:
+        """Queue func(*args) and wait for its result.
+
+        Args:
+            func: Function to run in the executor.
+            args: Its arguments.
+            priority: Lower runs first, REFERENCE before GUIDE.
+            deadline: Seconds the job may wait before it starts, no limit if None.
+            key: Jobs with the same key replace each other while waiting, e.g. the camera.
+
+        Returns:
+            Result of func.
+
+        Raises:
+            LvmagpSolveDropped: If the job was replaced or missed its deadline.
+        """
+        loop = asyncio.get_running_loop()
+        now = time.monotonic()
+
+        if key is not None:
+            for _, _, waiting in self._heap:
+                if waiting.key == key and not waiting.future.done():
+                    self.superseded += 1
+                    waiting.future.set_exception(
+                        LvmagpSolveDropped(f"{key}: superseded by a newer frame"))
+
+        job = _Job(priority, next(self._seq), func, args, loop.create_future(), key, now,
+                   None if deadline is None else now + deadline)
+        heapq.heappush(self._heap, (job.priority, job.seq, job))
+        if deadline is not None:
+            loop.call_later(deadline, self._expire, job)
+
+        self.submitted += 1
+        self._dispatch()
+        self.max_depth = max(self.max_depth, self.depth)
+        return await job.future
+
+    def _expire(self, job: _Job) -> None:
+        if not job.started and not job.future.done():
+            self.deadline_misses += 1
+            job.future.set_exception(LvmagpSolveDropped(f"{job.key}: deadline missed"))
+
+    def _dispatch(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self.running < self.concurrency and self._heap:
+            _, _, job = heapq.heappop(self._heap)
+            if job.future.done():
+                # dropped or the caller was cancelled
+                continue
+
+            now = time.monotonic()
+            if job.expires is not None and now > job.expires:
+                self._expire(job)
+                continue
+
+            wait = now - job.queued
+            self.wait_sum += wait
+            self.wait_max = max(self.wait_max, wait)
+
+            job.started = True
+            self.running += 1
+            task = loop.run_in_executor(self.executor, job.func, *job.args)
+            task.add_done_callback(lambda task, job=job, start=now: self._done(job, start, task))
+
+    def _done(self, job: _Job, start: float, task: asyncio.Future) -> None:
+        self.running -= 1
+        self.run_sum += time.monotonic() - start
+
+        if task.cancelled():
+            job.future.cancel()
+        elif task.exception() is not None:
+            self.failed += 1
+            if not job.future.done():
+                job.future.set_exception(task.exception())
+        else:
+            self.completed += 1
+            if not job.future.done():
+                job.future.set_result(task.result())
+
+        self._dispatch()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Queue state and counters."""
+        started = self.completed + self.failed
+        return {
+            "depth": self.depth,
+            "running": self.running,
+            "max_depth": self.max_depth,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "superseded": self.superseded,
+            "deadline_misses": self.deadline_misses,
+            "wait_mean": (self.wait_sum / (started + self.running)
+                          if started + self.running else None),
+            "wait_max": self.wait_max,
+            "run_mean": self.run_sum / started if started else None,
+        }
+
+
+__all__ = ["SolverQueue"]
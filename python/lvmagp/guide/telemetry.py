@@ -0,0 +1,201 @@
+import io
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from lvmagp.exceptions import LvmagpMissingDependency
+
+
+STATUS_CODES = {"good": 0, "poor": 1, "bad": 2}
+
+
+class GuideTelemetry:
+    """Fixed size ring buffer of per frame guide telemetry.
+
+    Records are stored in a numpy structured array, appending overwrites the oldest record
+    and costs the same no matter how full the buffer is. Per camera values have one slot per
+    camera, slots are assigned in the order cameras are seen.
+    """
+
+    def __init__(self, size: int = 20000, max_cameras: int = 2):
+        """Init new buffer.
+
+        Args:
+            size: Number of frames kept.
+            max_cameras: Number of camera slots.
+        """
+        self.size = size
+        self.cameras: List[str] = []
+        self.max_cameras = max_cameras
+        self.dtype = np.dtype([
+            ("time", "f8"),
+            ("reference", "?"),
+            ("state", "U8"),
+            ("ra", "f8"),
+            ("dec", "f8"),
+            ("radec_diff", "f4", (2,)),
+            ("axis_diff", "f4", (2,)),
+            ("axis_offset", "f4", (2,)),
+            ("drift_rate", "f4", (2,)),
+            ("expose_time", "f4"),
+            ("analysis_time", "f4"),
+            ("center", "f8", (max_cameras, 2)),
+            ("shift", "f4", (max_cameras, 2)),
+            ("fwhm", "f4", (max_cameras,)),
+            ("sources", "i4", (max_cameras,)),
+            ("quality", "i1", (max_cameras,)),
+            ("pipeline_time", "f4", (max_cameras,)),
+        ])
+        self.data = np.zeros(size, dtype=self.dtype)
+        self.count = 0
+
+    def __len__(self) -> int:
+        return min(self.count, self.size)
+
+    def _camera(self, name: str) -> Optional[int]:
+        if name not in self.cameras:
+            if len(self.cameras) >= self.max_cameras:
+                return None
+            self.cameras.append(name)
+        return self.cameras.index(name)
+
+    def append(
+        self,
+        time: float,
+        reference: bool = False,
+        state: str = "",
+        position: Any = None,
+        correction: Optional[Dict[str, Any]] = None,
+        images: Optional[List[Any]] = None,
+        quality: Optional[List[Dict[str, Any]]] = None,
+        expose_time: float = np.nan,
+        analysis_time: float = np.nan,
+    ) -> None:
+        """Append the telemetry of a frame.
+
+        Args:
+            time: Unix time of the frame.
+            reference: True for reference frames.
+            state: Guider state.
+            position: SkyCoord of the measured pointing.
+            correction: Status returned by the guide offset.
+            images: Analysed images of all cameras.
+            quality: FrameQuality dicts of all cameras.
+            expose_time: Seconds spent exposing and reading the frame.
+            analysis_time: Seconds spent analysing the frame.
+        """
+        rec = self.data[self.count % self.size]
+        rec.fill(0)
+        for name in ("radec_diff", "axis_diff", "axis_offset", "drift_rate", "center", "shift",
+                     "fwhm", "pipeline_time"):
+            rec[name] = np.nan
+        rec["quality"] = -1
+
+        rec["time"] = time
+        rec["reference"] = reference
+        rec["state"] = state
+        rec["ra"], rec["dec"] = (position.ra.deg, position.dec.deg) if position is not None \
+            else (np.nan, np.nan)
+        rec["expose_time"] = expose_time
+        rec["analysis_time"] = analysis_time
+
+        for key, value in (correction or {}).items():
+            if key in ("radec_diff", "axis_diff", "axis_offset", "drift_rate"):
+                rec[key] = value
+
+        images = images or []
+        quality = quality or [None] * len(images)
+        for img, q in zip(images, quality):
+            idx = self._camera(img.header.get("CAMNAME", ""))
+            if idx is None:
+                continue
+            self._camera_values(rec, idx, img)
+            if q:
+                rec["quality"][idx] = STATUS_CODES.get(q["status"], -1)
+
+        self.count += 1
+
+    @staticmethod
+    def _camera_values(rec: np.ndarray, idx: int, img: Any) -> None:
+        from lvmagp.images import PipelineTiming
+
+        center = getattr(img, "center", None)
+        if center is not None:
+            rec["center"][idx] = (center.ra.deg, center.dec.deg)
+        shift = getattr(img, "shift", None)
+        if shift is not None:
+            rec["shift"][idx] = shift
+
+        catalog = img.catalog
+        if catalog is not None:
+            rec["sources"][idx] = len(catalog)
+            if "fwhm" in catalog.colnames and len(catalog):
+                rec["fwhm"][idx] = np.nanmedian(np.asarray(catalog["fwhm"], dtype=float))
+
+        timing = img.get_meta_safe(PipelineTiming)
+        if timing:
+            rec["pipeline_time"][idx] = timing.total
+
+    def records(self, start: float = -np.inf, end: float = np.inf) -> np.ndarray:
+        """Records in a time range, oldest first.
+
+        Args:
+            start: Start unix time.
+            end: End unix time.
+
+        Returns:
+            Copy of the records.
+        """
+        if self.count <= self.size:
+            data = self.data[:self.count]
+        else:
+            head = self.count % self.size
+            data = np.concatenate([self.data[head:], self.data[:head]])
+        return data[(data["time"] >= start) & (data["time"] <= end)].copy()
+
+    def columns(self, records: np.ndarray) -> Dict[str, np.ndarray]:
+        """Flat columns of records, per camera values get the camera name as prefix."""
+        columns = {}
+        for name in records.dtype.names:
+            values = records[name]
+            if values.ndim == 1:
+                columns[name] = values
+            elif name in ("radec_diff", "axis_diff", "axis_offset", "drift_rate"):
+                columns[f"{name}_0"], columns[f"{name}_1"] = values[:, 0], values[:, 1]
+            else:
+                for idx, camera in enumerate(self.cameras):
+                    if values.ndim == 2:
+                        columns[f"{camera}_{name}"] = values[:, idx]
+                    else:
+                        columns[f"{camera}_{name}_0"] = values[:, idx, 0]
+                        columns[f"{camera}_{name}_1"] = values[:, idx, 1]
+        return columns
+
+    def export(self, start: float = -np.inf, end: float = np.inf, format: str = "npy") -> bytes:
+        """Export records in a time range.
+
+        Args:
+            start: Start unix time.
+            end: End unix time.
+            format: "npy" for a numpy structured array, "parquet" for a flat table (needs pyarrow).
+
+        Returns:
+            The exported data.
+        """
+        records = self.records(start, end)
+        with io.BytesIO() as bio:
+            if format == "npy":
+                np.save(bio, records, allow_pickle=False)
+            elif format == "parquet":
+                try:
+                    import pyarrow as pa
+                    import pyarrow.parquet as pq
+                except ImportError:
+                    raise LvmagpMissingDependency("parquet export needs pyarrow")
+                pq.write_table(pa.table(self.columns(records)), bio, compression="zstd")
+            else:
+                raise ValueError(f"unknown format {format}")
+            return bio.getvalue()
+
+
+__all__ = ["GuideTelemetry"]
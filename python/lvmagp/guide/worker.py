@@ -1,17 +1,11 @@
+import time
 from math import cos
-from typing import Optional, Callable
+from typing import Optional, Callable, List
 
 import asyncio
 
-import click
 import numpy as np
 
-import pandas as pd
-import json
-from pandas import json_normalize
-
-from astropy.coordinates import SkyCoord, Angle
-
 from sdsstools import get_logger
 from sdsstools.logger import SDSSLogger
 from clu.command import Command
@@ -19,16 +13,33 @@ from clu.actor import AMQPActor
 
 from lvmtipo.actors import lvm
 
-from lvmagp.actor.statemachine import ActorState, ActorStateMachine
+from lvmagp.actor.statemachine import ActorState, ActorStateMachine, StateInterrupted
 from lvmagp.images import Image
+from lvmagp.exceptions import (LvmagpAcquisitionFailed, LvmagpFrameRejected, LvmagpExposureFailed,
+                               LvmagpSolveDropped)
+from lvmagp.images.processors.quality import FrameQualityCheck
+from lvmagp.guide.telemetry import GuideTelemetry
+from lvmagp.guide.seeing import SeeingMonitor
 
 from lvmagp.guide.offset import GuideOffset, GuideOffsetPWI
 from lvmagp.guide.calc import GuideCalc, GuideCalcAstrometry
 
-from math import nan
+from math import nan, isnan, isfinite
 
 debug = False
 
+
+def _camname(filename):
+    """CAMNAME of a FITS file, only the headers are read."""
+    from astropy.io import fits
+
+    with fits.open(filename) as hdus:
+        for hdu in hdus:
+            if "CAMNAME" in hdu.header:
+                return hdu.header["CAMNAME"]
+    return None
+
+
 # debugging start
 def fname(camera):
     idx = fname.start + fname.idx % fname.num
@@ -57,37 +68,244 @@ async def debug_files():
 
 # debugging end
 
+class ExposureStats:
+    """ counters and latency of the guide exposures """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.exposures = 0
+        self.attempts = 0
+        self.retries = 0
+        self.timeouts = 0
+        self.failures = 0
+        self.skipped = 0
+        self.latency_last = nan
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+
+    def add_latency(self, latency):
+        self.exposures += 1
+        self.latency_last = latency
+        self.latency_sum += latency
+        self.latency_max = max(self.latency_max, latency)
+
+    def to_dict(self):
+        return {"exposures": self.exposures,
+                "attempts": self.attempts,
+                "retries": self.retries,
+                "timeouts": self.timeouts,
+                "failures": self.failures,
+                "skipped": self.skipped,
+                "latency_last": None if isnan(self.latency_last) else self.latency_last,
+                "latency_mean": self.latency_sum / self.exposures if self.exposures else None,
+                "latency_max": self.latency_max if self.exposures else None}
+
+
 class GuiderWorker():
     def __init__(self, 
                  telsubsystems: lvm.TelSubSystem,
                  statemachine: ActorStateMachine, 
                  actor: AMQPActor = None,
                  exptime:float = 5.0,
-                 logger: SDSSLogger = get_logger("guiding")
+                 logger: SDSSLogger = get_logger("guiding"),
+                 offset_calc: Optional[GuideCalc] = None,
+                 offset_mount: Optional[GuideOffset] = None,
+                 cameras: Optional[List[str]] = None,
+                 quality_check: Optional[FrameQualityCheck] = None,
+                 telemetry: Optional[GuideTelemetry] = None,
+                 seeing: Optional[SeeingMonitor] = None,
+                 readout_timeout: float = 30.0,
+                 retries: int = 2,
+                 retry_delay: float = 1.0,
+                 max_skipped: int = 5,
                 ):
         self.actor=actor
         self.telsubsystems = telsubsystems
         self.statemachine = statemachine
         self.logger = logger
         self.exptime = self.default_exptime = exptime
-        self.offest_mount = GuideOffsetPWI(telsubsystems.pwi)
-        self.offest_calc = GuideCalcAstrometry(logger=logger)
+        self.offest_mount = offset_mount or GuideOffsetPWI(telsubsystems.pwi)
+        self.offest_calc = offset_calc or GuideCalcAstrometry(logger=logger)
+        self.cameras = self.default_cameras = cameras
+        self.quality_check = quality_check
+        self.telemetry = telemetry
+        self.seeing = seeing
+        self.readout_timeout = readout_timeout
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.max_skipped = max_skipped
+        self.exposure_stats = ExposureStats()
+
+    async def _expose(self, exptime):
+        """ single exposure of all cameras, returns the filenames """
+        if debug:
+            return await debug_files()
+        return (await self.telsubsystems.agc.expose(exptime)).flatten().unpack("*.filename")
+
+    async def expose_retry(self, exptime):
+        """ expose with timeout and retries
+
+        Each attempt is cancelled after exptime plus readout_timeout, a failed attempt is
+        retried up to retries times. Cancelling the caller cancels the running attempt.
+        A missing or non-finite exptime is replaced by the default one.
+        """
+        if exptime is None or not isfinite(exptime):
+            exptime = self.default_exptime
+        stats = self.exposure_stats
+        timeout = exptime + self.readout_timeout
+        error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                stats.retries += 1
+                await asyncio.sleep(self.retry_delay)
+            stats.attempts += 1
+            start = time.monotonic()
+            try:
+                filenames = await asyncio.wait_for(self._expose(exptime), timeout)
+                stats.add_latency(time.monotonic() - start)
+                return filenames
+
+            except asyncio.TimeoutError:
+                stats.timeouts += 1
+                error = f"exposure timed out after {timeout:.0f}s"
+            except Exception as e:
+                error = e
+            self.logger.warning(f"exposure attempt {attempt + 1}/{self.retries + 1} "
+                                f"failed: {error}")
+
+        stats.failures += 1
+        raise LvmagpExposureFailed(f"no frame after {self.retries + 1} attempts: {error}")
 
     async def expose(self, exptime):
         """ expose cameras """
         try:
-            if debug:
-                filenames = await debug_files()
-            else:
-                filenames = (await self.telsubsystems.agc.expose(exptime)).flatten().unpack("*.filename")
-#                self.logger.debug(f"filenames: {filenames}")
+            filenames = await self.statemachine.interruptible(self.expose_retry(exptime))
+#            self.logger.debug(f"filenames: {filenames}")
+
+            if self.cameras:
+                # guide only with the selected cameras, the others are never read
+                filenames = [f for f in filenames if _camname(f) in self.cameras]
+                if not filenames:
+                    raise ValueError(f"no image of cameras {self.cameras}")
+
             return filenames, [Image.from_file(f) for f in filenames]
 
+        except StateInterrupted:
+            raise
         except Exception as e:
             self.logger.error(e)
             raise e
 
 
+    async def check_quality(self, images):
+        """ quick quality check of the frames, empty list without quality check """
+        if not self.quality_check:
+            return []
+        loop = asyncio.get_running_loop()
+        return list(await asyncio.gather(*[
+            loop.run_in_executor(None, self.quality_check.estimate, img) for img in images]))
+
+    def record(self, frame_time, is_reference, position=None, correction=None, images=None,
+               quality=None, expose_time=nan, analysis_time=nan):
+        """ add a frame to the telemetry, never fails the guide loop """
+        if self.telemetry is None:
+            return
+        try:
+            self.telemetry.append(frame_time,
+                                  reference=is_reference,
+                                  state=self.statemachine.state.name,
+                                  position=position,
+                                  correction=correction,
+                                  images=images,
+                                  quality=quality,
+                                  expose_time=expose_time,
+                                  analysis_time=analysis_time)
+        except Exception as e:
+            self.logger.warning(f"telemetry: {e}")
+
+    def update_seeing(self, images, frame_time, reset=False):
+        """ add the catalogs of a frame to the seeing monitor, returns its status """
+        if self.seeing is None:
+            return None
+        try:
+            if reset:
+                self.seeing.reset()
+            self.seeing.update(images, now=frame_time)
+            return self.seeing.status()
+        except Exception as e:
+            self.logger.warning(f"seeing: {e}")
+            return None
+
+    async def acquire(self,
+                      ra_h: float,
+                      deg_d: float,
+                      exptime=None,
+                      tolerance: float = 2.0,
+                      iterations: int = 5,
+                      callback: Optional[Callable[..., None]] = None ):
+        """ bring the telescope on target
+
+        Solves a frame, offsets the mount by the full difference to the target and
+        repeats until the pointing is closer than tolerance.
+
+        Args:
+            ra_h: Target right ascension in hours.
+            deg_d: Target declination in degrees.
+            exptime: Exposure time, default if None.
+            tolerance: Distance to target in arcsec that counts as converged.
+            iterations: Maximum number of frames.
+
+        Returns:
+            Tuple of final pointing and its distance to the target in arcsec.
+        """
+        from astropy.coordinates import SkyCoord
+        import astropy.units as u
+
+        exptime = exptime if exptime and not isnan(exptime) else self.default_exptime
+        target = SkyCoord(ra=ra_h * u.hourangle, dec=deg_d * u.deg)
+
+        try:
+            self.statemachine.state = ActorState.ACQUIRE
+            await self.offest_calc.set_target(target.ra.deg, target.dec.deg)
+
+            separation = nan
+            for iteration in range(iterations):
+                filenames, images = await self.expose(exptime)
+                images, position = await self.statemachine.interruptible(
+                    self.offest_calc.pointing(images))
+                if position is None:
+                    raise LvmagpAcquisitionFailed("no astrometric solution")
+
+                separation = position.separation(target).arcsec
+                self.logger.debug(f"acquisition {iteration}: {separation:.1f} arcsec off target")
+
+                correction = None
+                if separation > tolerance:
+                    correction = await self.offest_mount.offset(target, position,
+                                                                corr_factor=1.0, min_offset=0.0)
+
+                if callback:
+                    await callback(is_reference=False,
+                                   state=self.statemachine.state,
+                                   filenames=filenames,
+                                   images=images,
+                                   position=position,
+                                   correction=correction)
+
+                if separation <= tolerance:
+                    return position, separation
+
+            raise LvmagpAcquisitionFailed(f"not converged after {iterations} frames, "
+                                          f"{separation:.1f} arcsec off target")
+
+        except Exception as e:
+            self.logger.error(f"error: {e}")
+            self.statemachine.state = ActorState.IDLE
+            raise e
+
+
     async def reference(self,
                    exptime=None,
                    ra_h: float=nan,
@@ -99,25 +317,43 @@ class GuiderWorker():
             self.statemachine.state = ActorState.START
             self.logger.debug(f"start guiding {self.statemachine.state}")
 
-            self.exptime = exptime if exptime else self.default_exptime
-            if exptime is nan: exptime = self.exptime
+            exptime = exptime if exptime and not isnan(exptime) else self.default_exptime
+            self.exptime = exptime
 
-            filenames = None
+            reference_filenames = None
             self.reference_position = None
             reference_images = None
             positions = None
 
+            if not isnan(ra_h) and not isnan(deg_d):
+                await self.offest_calc.set_target(ra_h * 15, deg_d)
+
+            frame_time = time.time()
             reference_filenames, images = await self.expose(exptime)
-            reference_images, self.reference_position = await self.offest_calc.reference_target(images)
+            expose_time = time.time() - frame_time
+            quality = await self.statemachine.interruptible(self.check_quality(images))
+            if any(q.bad for q in quality):
+                reasons = [r for q in quality for r in q.reasons]
+                raise LvmagpFrameRejected(f"reference frame rejected: {reasons}")
+
+            reference_images, self.reference_position = await self.statemachine.interruptible(
+                self.offest_calc.reference_target(images))
+            self.offest_mount.reset()
 
             self.statemachine.state = ActorState.GUIDE if not pause else ActorState.PAUSE
+            self.record(frame_time, True, position=self.reference_position,
+                        images=reference_images, quality=[q.to_dict() for q in quality],
+                        expose_time=expose_time,
+                        analysis_time=time.time() - frame_time - expose_time)
+            seeing = self.update_seeing(reference_images, frame_time, reset=True)
 
             if callback:
                 await callback(is_reference=True,
                                state=self.statemachine.state,
                                filenames=reference_filenames,
                                images=reference_images,
-                               position=self.reference_position)
+                               position=self.reference_position,
+                               seeing=seeing)
 
             return self.reference_position, reference_filenames
 
@@ -138,24 +374,81 @@ class GuiderWorker():
     async def loop(self, callback: Optional[Callable[..., None]] = None ):
         """ guider worker """
         try:
+            skipped = 0
             while self.statemachine.state in (ActorState.GUIDE, ActorState.PAUSE):
 
-                current_filenames, images = await self.expose(self.exptime)
-                current_images, current_position = await self.offest_calc.find_offset(images)
-
+                frame_time = time.time()
+                try:
+                    current_filenames, images = await self.expose(self.exptime)
+                    skipped = 0
+                except LvmagpExposureFailed as e:
+                    # a hung or failing camera costs frames, only a persistent failure stops
+                    # guiding
+                    skipped += 1
+                    self.exposure_stats.skipped += 1
+                    if skipped > self.max_skipped:
+                        raise LvmagpExposureFailed(f"{skipped} frames in a row failed: {e}")
+                    self.logger.warning(f"frame skipped ({skipped}/{self.max_skipped}): {e}")
+                    continue
+                expose_time = time.time() - frame_time
+
+                # bad frames are not analysed, poor frames are analysed but not corrected for
+                quality = await self.statemachine.interruptible(self.check_quality(images))
+                reasons = [r for q in quality for r in q.reasons]
+                if any(q.bad for q in quality):
+                    self.logger.warning(f"frame skipped: {reasons}")
+                    self.record(frame_time, False, images=images,
+                                quality=[q.to_dict() for q in quality], expose_time=expose_time)
+                    if callback:
+                        await callback(is_reference=False,
+                                       state=self.statemachine.state,
+                                       filenames=current_filenames,
+                                       images=None,
+                                       position=None,
+                                       quality=[q.to_dict() for q in quality])
+                    continue
+
+                try:
+                    current_images, current_position = await self.statemachine.interruptible(
+                        self.offest_calc.find_offset(images))
+                except LvmagpSolveDropped as e:
+                    # the solver is behind, a newer frame is worth more than this one
+                    self.logger.warning(f"frame skipped: {e}")
+                    continue
+                analysis_time = time.time() - frame_time - expose_time
+
+                correction = None
                 if self.statemachine.state is ActorState.GUIDE:
-                    correction = await self.offest_mount.offset(self.reference_position, current_position)
+                    if all(q.good for q in quality):
+                        try:
+                            correction = await self.offest_mount.offset(self.reference_position,
+                                                                        current_position)
+                        except Exception as e:
+                            # a failed correction is retried with the next frame
+                            self.logger.error(f"frame not corrected: {e}")
+                    else:
+                        self.logger.warning(f"frame not corrected: {reasons}")
                     if debug:
                         await asyncio.sleep(2.0)
 
+                self.record(frame_time, False, position=current_position, correction=correction,
+                            images=current_images, quality=[q.to_dict() for q in quality],
+                            expose_time=expose_time, analysis_time=analysis_time)
+                seeing = self.update_seeing(current_images, frame_time)
+
                 if callback:
                     await callback(is_reference=False,
                                    state=self.statemachine.state,
                                    filenames=current_filenames,
                                    images=current_images,
                                    position=current_position,
-                                   correction=correction)
+                                   correction=correction,
+                                   quality=[q.to_dict() for q in quality],
+                                   seeing=seeing)
 
+        except StateInterrupted:
+            # stop() sets the state once the task is done
+            self.logger.debug("guiding interrupted")
         except Exception as e:
             self.logger.error(f"error: {e}")
             self.statemachine.state = ActorState.IDLE
@@ -5,3 +5,4 @@ __title__ = "Images"
 
 from .image import Image
 from .processor import ImageProcessor
+from .pipeline import ImagePipeline, PipelineTiming
@@ -1,6 +1,7 @@
 from __future__ import annotations
 import copy
 import io
+from threading import RLock
 from typing import TypeVar, Optional, Type, Dict, Any, cast
 
 import numpy as np
@@ -12,11 +13,39 @@ from numpy.typing import NDArray
 
 MetaClass = TypeVar("MetaClass")
 
+
+class _Shared:
+    """Component shared between images, with the number of images referencing it."""
+
+    __slots__ = ("value", "refs")
+
+    def __init__(self, value: Any, refs: int = 1):
+        self.value = value
+        self.refs = refs
+
+
 class Image:
-    """Image class."""
+    """Image class.
+
+    Images are copy-on-write: header, catalog and meta are shared between an image and its copies
+    and only copied on first access on an image that still shares them, so they can be modified
+    in place as usual. The data, mask and uncertainty arrays and the values in meta are always
+    shared and must be replaced instead of modified in place.
+    """
 
     __module__ = "lvmagp.images"
 
+    # shared components and how to copy them
+    _cow = {
+        "header": lambda h: h.copy(),
+        "catalog": lambda c: None if c is None else c.copy(),
+        "meta": dict,
+    }
+
+    # guards the reference counts of all shared components, reentrant since __del__ may run
+    # anywhere
+    _lock = RLock()
+
     def __init__(
         self,
         data: Optional[NDArray[Any]] = None,
@@ -39,18 +68,79 @@ class Image:
             meta: Dictionary with meta information (note: not preserved in I/O operations!).
         """
 
-        # store
+        # store, given header, catalog and meta are owned by the caller and copied on first access
+        self._shared: Dict[str, _Shared] = {
+            "header": _Shared(fits.Header()) if header is None else _Shared(header, refs=2),
+            "catalog": _Shared(catalog, refs=1 if catalog is None else 2),
+            "meta": _Shared({}) if meta is None else _Shared(meta, refs=2),
+        }
         self.data = data
-        self.header = fits.Header() if header is None else header.copy()
         self.mask = None if mask is None else mask.copy()
         self.uncertainty = None if uncertainty is None else uncertainty.copy()
-        self.catalog = None if catalog is None else catalog.copy()
-        self.meta = {} if meta is None else copy.deepcopy(meta)
 
         # add basic header stuff
         if data is not None:
-            self.header["NAXIS1"] = data.shape[1]
-            self.header["NAXIS2"] = data.shape[0]
+            header = self.writable("header")
+            header["NAXIS1"] = data.shape[1]
+            header["NAXIS2"] = data.shape[0]
+
+    def __del__(self) -> None:
+        with Image._lock:
+            for shared in getattr(self, "_shared", {}).values():
+                shared.refs -= 1
+
+    def _set_shared(self, name: str, value: Any) -> None:
+        with Image._lock:
+            self._shared[name].refs -= 1
+            self._shared[name] = _Shared(value)
+
+    def writable(self, name: str) -> Any:
+        """Header, catalog or meta of this image for modifying it in place, same as the properties.
+
+        Args:
+            name: One of "header", "catalog" or "meta".
+
+        Returns:
+            The component, copied first if it is still shared with another image.
+        """
+        shared = self._shared[name]
+        if shared.refs == 1:
+            # owned by this image alone, only a copy of it could share it again
+            return shared.value
+
+        with Image._lock:
+            shared = self._shared[name]
+            if shared.refs > 1:
+                shared.refs -= 1
+                shared = self._shared[name] = _Shared(self._cow[name](shared.value))
+            return shared.value
+
+    @property
+    def header(self) -> fits.Header:
+        """FITS header of the image."""
+        return self.writable("header")
+
+    @header.setter
+    def header(self, header: fits.Header) -> None:
+        self._set_shared("header", header)
+
+    @property
+    def catalog(self) -> Optional[Table]:
+        """Source catalog of the image."""
+        return self.writable("catalog")
+
+    @catalog.setter
+    def catalog(self, catalog: Optional[Table]) -> None:
+        self._set_shared("catalog", catalog)
+
+    @property
+    def meta(self) -> Dict[Any, Any]:
+        """Dictionary with meta information."""
+        return self.writable("meta")
+
+    @meta.setter
+    def meta(self, meta: Dict[Any, Any]) -> None:
+        self._set_shared("meta", meta)
 
     @classmethod
     def from_bytes(cls, data: bytes) -> Image:
@@ -165,27 +255,35 @@ class Image:
         """Returns units of pixels in image."""
         return str(self.header["BUNIT"]).lower() if "BUNIT" in self.header else "adu"
 
-    def __deepcopy__(self) -> Image:
+    def __copy__(self) -> Image:
+        """Returns a copy-on-write copy of this image."""
+        return self.copy()
+
+    def __deepcopy__(self, memo: Optional[Dict[int, Any]] = None) -> Image:
         """Returns a shallow copy of this image."""
         return self.copy()
 
     def copy(self) -> Image:
-        """Returns a copy of this image."""
-        return Image(
-            data=self.data,
-            header=self.header,
-            mask=self.mask,
-            uncertainty=self.uncertainty,
-            catalog=self.catalog,
-            meta=self.meta,
-        )
+        """Returns a copy of this image.
+
+        Nothing is copied here, all components are shared until they are modified.
+        """
+        img = self.__class__.__new__(self.__class__)
+        with Image._lock:
+            for shared in self._shared.values():
+                shared.refs += 1
+            img._shared = dict(self._shared)
+        img.data = self.data
+        img.mask = self.mask
+        img.uncertainty = self.uncertainty
+        return img
 
     def __truediv__(self, other: "Image") -> "Image":
         """Divides this image by other."""
         img = self.copy()
         if img.data is None or other.data is None:
             raise ValueError("One image in division is None.")
-        img.data /= other.data
+        img.data = img.data / other.data
         return img
 
     def writeto(self, f: Any, *args: Any, **kwargs: Any) -> None:
@@ -316,7 +414,7 @@ class Image:
         """
 
         # store it
-        self.meta[meta.__class__] = meta
+        self.writable("meta")[meta.__class__] = meta
 
     def has_meta(self, meta_class: Type[MetaClass]) -> bool:
         """Whether meta exists."""
@@ -0,0 +1,104 @@
+import asyncio
+import time
+from concurrent.futures import Executor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from lvmagp.images import Image
+from lvmagp.images.processor import ImageProcessor
+
+
+class PipelineTiming:
+    """Per stage timing of an image pipeline, stored as image meta."""
+
+    __module__ = "lvmagp.images"
+
+    def __init__(self) -> None:
+        self.stages: Dict[str, float] = {}
+
+    @property
+    def total(self) -> float:
+        """Total time of all stages in seconds."""
+        return sum(self.stages.values())
+
+
+class ImagePipeline(ImageProcessor):
+    """Chain of image processors run as one processor.
+
+    The data is converted to float once before the first stage that needs floats, so later stages
+    do not convert it again and filters in front of it run on the raw data. Background stages do
+    not replace the image, their estimate is stored as image meta and reused by the source
+    detections further down the pipeline.
+    """
+
+    __module__ = "lvmagp.images"
+
+    def __init__(self, stages: List[ImageProcessor], dtype: Any = np.float64,
+                 executor: Optional[Executor] = None, **kwargs: Any):
+        """Init new pipeline.
+
+        Args:
+            stages: Image processors to run in this order.
+            dtype: Type to convert the data to before the first stage needing floats, None to
+                keep it.
+            executor: Executor to run images concurrently in, default executor of the loop if None.
+        """
+        self.stages = stages
+        self.dtype = dtype
+        self.executor = executor
+
+    def __call__(self, image: Image) -> Image:
+        """Run all stages on given image.
+
+        Args:
+            image: Image to process.
+
+        Returns:
+            Processed image with a PipelineTiming meta.
+        """
+        from lvmagp.images.processors.background import Background
+
+        timing = PipelineTiming()
+
+        converted = self.dtype is None
+
+        for idx, stage in enumerate(self.stages):
+            if not converted and getattr(stage, "needs_float", True):
+                converted = True
+                if image.data is not None and image.data.dtype != self.dtype:
+                    start = time.perf_counter()
+                    image = image.copy()
+                    image.data = image.data.astype(self.dtype)
+                    timing.stages["convert"] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            if isinstance(stage, Background):
+                image = image.copy()
+                image.set_meta(stage.estimate(image))
+            else:
+                image = stage(image)
+            name = stage.__class__.__name__
+            name = name if name not in timing.stages else f"{name}{idx}"
+            timing.stages[name] = time.perf_counter() - start
+
+        image.set_meta(timing)
+        return image
+
+    async def run(self, images: List[Image]) -> List[Image]:
+        """Run pipeline on several images, e.g. one per camera, concurrently.
+
+        Processors are mostly C code releasing the GIL, so threads run in parallel.
+
+        Args:
+            images: Images to process.
+
+        Returns:
+            Processed images in the same order.
+        """
+        loop = asyncio.get_running_loop()
+        return list(await asyncio.gather(*[loop.run_in_executor(self.executor, self, img)
+                                           for img in images]))
+
+
+__all__ = ["ImagePipeline", "PipelineTiming"]
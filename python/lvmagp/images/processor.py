@@ -5,6 +5,9 @@ from lvmagp.images import Image
 
 
 class ImageProcessor(object, metaclass=ABCMeta):
+    # whether the processor works on float data, an ImagePipeline converts the data before it
+    needs_float = True
+
     def __init__(self, **kwargs: Any):
         """Init new image processor."""
 
@@ -4,5 +4,10 @@ Astrometry
 """
 from .astrometry import Astrometry
 from .astrometrydotlocal import AstrometryDotLocal
+from .starindex import GuideStarIndex
+from .catalogmatch import CatalogMatchAstrometry
+from .solverd import SolverServer, SolverClient
+from .solvecache import SolveCache
 
-__all__ = ["Astrometry", "AstrometryDotLocal"]
+__all__ = ["Astrometry", "AstrometryDotLocal", "GuideStarIndex", "CatalogMatchAstrometry",
+           "SolverServer", "SolverClient", "SolveCache"]
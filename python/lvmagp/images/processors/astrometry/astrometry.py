@@ -18,5 +18,14 @@ class Astrometry(ImageProcessor, metaclass=ABCMeta):
         """
         ...
 
+    def set_target(self, ra: float, dec: float) -> None:
+        """Prepare for solving images around a target.
+
+        Args:
+            ra: Right ascension in degrees.
+            dec: Declination in degrees.
+        """
+        pass
+
 
 __all__ = ["Astrometry"]
@@ -1,14 +1,15 @@
+import copy
 from abc import ABCMeta, abstractmethod
-from typing import Any
+from threading import Lock
+from typing import Any, Dict, Optional
 
-from astropy.wcs import WCS
+import numpy as np
 
 from lvmagp.images import Image
 from lvmagp.images.processor import ImageProcessor
 
-import astrometry
-
 from .astrometry import Astrometry
+from .solvecache import SolveCache
 import logging
 
 log = logging.getLogger(__name__)
@@ -18,6 +19,8 @@ class AstrometryDotLocal(Astrometry):
 
     __module__ = "lvmagp.images.processors.astrometry"
     solver = None
+    _solver_lock = Lock()
+    _solver_config = dict(cache_directory="astrometry_cache", scales={5,6})
 
     def __init__(
         self,
@@ -26,6 +29,10 @@ class AstrometryDotLocal(Astrometry):
         cache_directory: str = "astrometry_cache",
         scales={5,6},
         exceptions: bool = True,
+        socket: Optional[str] = None,
+        timeout: float = 5.0,
+        fallback: bool = False,
+        solve_cache: Optional[SolveCache] = None,
         **kwargs: Any,
     ):
         """Init new astronomy.net processor.
@@ -34,31 +41,89 @@ class AstrometryDotLocal(Astrometry):
             source_count: Number of sources to send.
             radius: Radius to search in.
             exceptions: Whether to raise Exceptions.
+            socket: Unix socket of a solver daemon, solve in this process if None.
+            timeout: Timeout of a daemon request in seconds, should be below the exposure cadence.
+            fallback: Solve in this process if the daemon cannot be reached, which loads the
+                index files in this process as well.
+            solve_cache: Cache of recent solutions tried before solving, meant for reference and
+                acquisition frames, see without_cache().
         """
 
         self.source_count = source_count
         self.radius = radius
         self.exceptions = exceptions
+        self.fallback = fallback
+        self.solve_cache = solve_cache
+        self.client = None
+        # shared with the copies of without_cache()
+        self._stats = {"fallback_solves": 0}
+
+        if socket:
+            from .solverd import SolverClient
 
+            self.client = SolverClient(socket, timeout=timeout)
+
+        # the solver loads all index files, it is shared and built on first use
         if not AstrometryDotLocal.solver:
-            AstrometryDotLocal.solver = astrometry.Solver(
-                astrometry.series_5200.index_files(
-                    cache_directory=cache_directory,
-                    scales=scales,
+            AstrometryDotLocal._solver_config = dict(cache_directory=cache_directory,
+                                                     scales=scales)
+
+    def without_cache(self) -> "AstrometryDotLocal":
+        """Copy of this processor that always solves, e.g. for guide frames."""
+        astrometry = copy.copy(self)
+        astrometry.solve_cache = None
+        return astrometry
+
+    @property
+    def fallback_solves(self) -> int:
+        """Number of solves done in this process because the daemon could not be reached."""
+        return self._stats["fallback_solves"]
+
+    @classmethod
+    def warmup(cls):
+        """Load the astrometry index files now instead of on the first solve."""
+        return cls.get_solver()
+
+    @classmethod
+    def get_solver(cls):
+        """Shared astrometry solver, created on first call."""
+        with cls._solver_lock:
+            if not cls.solver:
+                import astrometry
+
+                cls.solver = astrometry.Solver(
+                    astrometry.series_5200.index_files(**cls._solver_config)
                 )
-            )
+        return cls.solver
 
-    def source_solve_default(self, image):
-        solution = AstrometryDotLocal.solver.solve(
-            stars=image.catalog['x', 'y'],
+    @classmethod
+    def solve_local(cls, stars, ra: float, dec: float, radius: float,
+                    lower: float = 0.9, upper: float = 1.1) -> Optional[Dict[str, Any]]:
+        """Solve with the solver of this process.
+
+        Args:
+            stars: Pixel positions of the sources, brightest first.
+            ra: Right ascension hint in degrees.
+            dec: Declination hint in degrees.
+            radius: Radius of the position hint in degrees.
+            lower: Lower limit of the pixel scale in arcsec/pixel.
+            upper: Upper limit of the pixel scale in arcsec/pixel.
+
+        Returns:
+            WCS fields of the best match or None.
+        """
+        import astrometry
+
+        solution = cls.get_solver().solve(
+            stars=stars,
             size_hint=astrometry.SizeHint(
-                lower_arcsec_per_pixel=0.9,
-                upper_arcsec_per_pixel=1.1,
+                lower_arcsec_per_pixel=lower,
+                upper_arcsec_per_pixel=upper,
             ),
             position_hint=astrometry.PositionHint(
-                ra_deg=image.header['RA'],
-                dec_deg=image.header['DEC'],
-                radius_deg=self.radius,
+                ra_deg=ra,
+                dec_deg=dec,
+                radius_deg=radius,
             ),
             solution_parameters=astrometry.SolutionParameters(
                 logodds_callback=lambda logodds_list: astrometry.Action.STOP,
@@ -66,8 +131,32 @@ class AstrometryDotLocal(Astrometry):
         )
 
         if solution.has_match():
-            wcs = WCS(solution.best_match().wcs_fields)
-            return wcs
+            return solution.best_match().wcs_fields
+
+    def source_solve_default(self, image):
+        from astropy.wcs import WCS
+
+        params = dict(
+            stars=[[float(x), float(y)] for x, y in image.catalog['x', 'y']],
+            ra=float(image.header['RA']),
+            dec=float(image.header['DEC']),
+            radius=self.radius,
+        )
+
+        if self.client:
+            try:
+                fields = self.client.solve(**params)
+            except OSError as e:
+                if not self.fallback:
+                    raise
+                log.error(f"solver daemon not available, solving locally: {e}")
+                self._stats["fallback_solves"] += 1
+                fields = self.solve_local(**params)
+        else:
+            fields = self.solve_local(**params)
+
+        if fields:
+            return WCS(fields)
 
 
     def __call__(self, image: Image, sort_by="peak") -> Image:
@@ -90,7 +179,7 @@ class AstrometryDotLocal(Astrometry):
         # nothing?
         if cat is None or len(cat) < 3:
             log.warning("Not enough sources for astrometry.")
-            img.header["WCSERR"] = 1
+            img.writable("header")["WCSERR"] = 1
             return img
 
         # sort it, remove saturated stars and take N brightest sources
@@ -103,7 +192,17 @@ class AstrometryDotLocal(Astrometry):
 
 #        print(img.catalog["x", "y"])
         log.debug(f'{img.catalog["x", "y"]}')
-        img.astrometric_wcs = self.source_solve_default(img)
+        if self.solve_cache:
+            camera = img.header.get("CAMNAME", "")
+            ra, dec = float(img.header["RA"]), float(img.header["DEC"])
+            xy = np.array([cat["x"], cat["y"]], dtype=float).T
+            img.astrometric_wcs = self.solve_cache.lookup(camera, ra, dec, xy)
+            if img.astrometric_wcs is None:
+                img.astrometric_wcs = self.source_solve_default(img)
+                if img.astrometric_wcs is not None:
+                    self.solve_cache.store(camera, ra, dec, xy, img.astrometric_wcs)
+        else:
+            img.astrometric_wcs = self.source_solve_default(img)
         log.debug(img.astrometric_wcs)
 
         # finished
@@ -0,0 +1,291 @@
+from threading import Lock
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from lvmagp.images import Image
+
+from .astrometry import Astrometry
+from .starindex import GuideStarIndex
+import logging
+
+log = logging.getLogger(__name__)
+
+
+def tangent_plane(ra: np.ndarray, dec: np.ndarray, ra0: float,
+                  dec0: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Gnomonic projection of sky positions around a tangent point, everything in degrees."""
+    ra, dec = np.radians(ra), np.radians(dec)
+    ra0, dec0 = np.radians(ra0), np.radians(dec0)
+    cosd = np.sin(dec) * np.sin(dec0) + np.cos(dec) * np.cos(dec0) * np.cos(ra - ra0)
+    xi = np.cos(dec) * np.sin(ra - ra0) / cosd
+    eta = (np.sin(dec) * np.cos(dec0) - np.cos(dec) * np.sin(dec0) * np.cos(ra - ra0)) / cosd
+    return np.degrees(xi), np.degrees(eta)
+
+
+def from_tangent_plane(xi: np.ndarray, eta: np.ndarray, ra0: float,
+                       dec0: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Inverse of tangent_plane, everything in degrees."""
+    xi, eta = np.radians(xi), np.radians(eta)
+    ra0, dec0 = np.radians(ra0), np.radians(dec0)
+    denom = np.cos(dec0) - eta * np.sin(dec0)
+    ra = ra0 + np.arctan2(xi, denom)
+    dec = np.arctan2(np.sin(dec0) + eta * np.cos(dec0), np.hypot(xi, denom))
+    return np.degrees(ra) % 360.0, np.degrees(dec)
+
+
+class CatalogMatchAstrometry(Astrometry):
+    """Astrometry by matching detected sources with stars of a local guide star index.
+
+    The stars around the target are fetched once with set_target. A frame is solved by searching
+    the rotation and shift that match most sources to the projected stars, starting from the last
+    solution of the same camera (scale, rotation and offset from the telescope pointing), and
+    fitting a TAN WCS to the matched pairs. Frames that can not be matched are handed to the
+    fallback astrometry, e.g. a blind AstrometryDotLocal.
+    """
+
+    __module__ = "lvmagp.images.processors.astrometry"
+
+    def __init__(
+        self,
+        index: Any,
+        fallback: Optional[Astrometry] = None,
+        source_count: int = 42,
+        pixel_scale: float = 1.0,
+        radius: float = 1.0,
+        mag_limit: float = 16.0,
+        star_count: int = 300,
+        match_radius: float = 3.0,
+        min_matches: int = 6,
+        rotation_range: float = 5.0,
+        rotation_step: float = 0.5,
+        **kwargs: Any,
+    ):
+        """Init new catalog match processor.
+
+        Args:
+            index: GuideStarIndex or the directory of one.
+            fallback: Astrometry used if matching fails.
+            source_count: Number of brightest sources to match.
+            pixel_scale: Pixel scale in arcsec/pixel, used until a camera has been solved once.
+            radius: Radius around the target to fetch stars for in degrees.
+            mag_limit: Faintest guide star magnitude.
+            star_count: Number of brightest stars used for matching.
+            match_radius: Maximum distance of matched pairs in pixels.
+            min_matches: Minimum number of matched pairs for a solution.
+            rotation_range: Rotation searched around the last solution in degrees.
+            rotation_step: Step of the rotation search in degrees.
+        """
+        self.index = index if isinstance(index, GuideStarIndex) else GuideStarIndex(index)
+        self.fallback = fallback
+        self.source_count = source_count
+        self.pixel_scale = pixel_scale
+        self.radius = radius
+        self.mag_limit = mag_limit
+        self.star_count = star_count
+        self.match_radius = match_radius
+        self.min_matches = min_matches
+        self.rotation_range = rotation_range
+        self.rotation_step = rotation_step
+
+        self._stars: Optional[np.ndarray] = None
+        self._target: Optional[Tuple[float, float]] = None
+        self._last_cd: Dict[str, np.ndarray] = {}
+        self._last_offset: Dict[str, Tuple[float, float]] = {}
+        self._lock = Lock()
+
+    def set_target(self, ra: float, dec: float) -> None:
+        """Fetch the guide stars around a target.
+
+        Args:
+            ra: Right ascension in degrees.
+            dec: Declination in degrees.
+        """
+        stars = self.index.query(ra, dec, self.radius, mag_limit=self.mag_limit)
+        with self._lock:
+            self._target = (ra, dec)
+            self._stars = stars
+        log.debug(f"{len(stars)} guide stars around {ra:.4f} {dec:.4f}")
+
+    def _field_stars(self, ra: float, dec: float, field_radius: float) -> np.ndarray:
+        with self._lock:
+            target, stars = self._target, self._stars
+        if stars is None or target is None or \
+                _separation(ra, dec, *target) + field_radius > self.radius:
+            # not prepared for this pointing
+            self.set_target(ra, dec)
+            stars = self._stars
+        sep = _separation(ra, dec, stars["ra"], stars["dec"])
+        return stars[sep < field_radius][:self.star_count]
+
+    def _initial_cd(self, camera: str) -> np.ndarray:
+        with self._lock:
+            if camera in self._last_cd:
+                return self._last_cd[camera]
+        scale = self.pixel_scale / 3600.0
+        return np.array([[-scale, 0.0], [0.0, scale]])
+
+    def _remember(self, camera: str, wcs: Any, ra: float, dec: float) -> None:
+        """Store scale, rotation and offset from the pointing of a solution for the next frames."""
+        nx, ny = wcs.pixel_shape or (0, 0)
+        cra, cdec = wcs.all_pix2world([[(nx + 1) / 2, (ny + 1) / 2]], 1)[0]
+        with self._lock:
+            self._last_cd[camera] = wcs.pixel_scale_matrix
+            self._last_offset[camera] = tangent_plane(cra, cdec, ra, dec)
+
+    def _rotations(self, camera: str) -> np.ndarray:
+        with self._lock:
+            known = camera in self._last_cd
+        half = self.rotation_range if known else 180.0
+        return np.radians(np.arange(-half, half + self.rotation_step / 2, self.rotation_step))
+
+    def _match_shift(self, sources: np.ndarray, stars: np.ndarray,
+                     size: float) -> Tuple[int, np.ndarray]:
+        """Shift with most source/star pairs, by voting on the differences of all pairs."""
+        width = 2 * self.match_radius
+        diff = (sources[:, None, :] - stars[None, :, :]).reshape(-1, 2)
+        nbins = int(np.ceil(2 * size / width)) + 1
+        bins = np.floor((diff + size) / width).astype(int)
+        good = ((bins >= 0) & (bins < nbins)).all(axis=1)
+        if not good.any():
+            return 0, np.zeros(2)
+        votes = np.bincount(bins[good, 1] * nbins + bins[good, 0],
+                            minlength=nbins * nbins).reshape(nbins, nbins)
+
+        # count 2x2 bins, a shift near a bin edge is split up
+        votes[1:, :] += votes[:-1, :].copy()
+        votes[:, 1:] += votes[:, :-1].copy()
+        iy, ix = np.unravel_index(np.argmax(votes), votes.shape)
+
+        near = good & (bins[:, 0] >= ix - 1) & (bins[:, 0] <= ix) \
+            & (bins[:, 1] >= iy - 1) & (bins[:, 1] <= iy)
+        return int(votes[iy, ix]), np.median(diff[near], axis=0)
+
+    def _pairs(self, sources: np.ndarray, predicted: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        dist = np.hypot(*(sources[:, None, :] - predicted[None, :, :]).transpose(2, 0, 1))
+        j = np.argmin(dist, axis=1)
+        i = np.nonzero(dist[np.arange(len(sources)), j] < self.match_radius)[0]
+        # keep the closest source for every star
+        order = np.argsort(dist[i, j[i]])
+        _, first = np.unique(j[i][order], return_index=True)
+        i = i[order][first]
+        return i, j[i]
+
+    def solve(self, image: Image) -> Optional[Any]:
+        """Match the sources of an image with the guide stars.
+
+        Args:
+            image: Image with catalog and RA/DEC of the pointing in its header.
+
+        Returns:
+            WCS or None if there is no match.
+        """
+        from astropy.wcs import WCS
+
+        camera = image.header.get("CAMNAME", "")
+        nx, ny = image.header["NAXIS1"], image.header["NAXIS2"]
+        center = np.array([(nx + 1) / 2, (ny + 1) / 2])
+        ra, dec = float(image.header["RA"]), float(image.header["DEC"])
+        with self._lock:
+            offset = self._last_offset.get(camera)
+        ra0, dec0 = from_tangent_plane(*offset, ra, dec) if offset else (ra, dec)
+
+        cat = image.catalog
+        sources = np.array([cat["x"], cat["y"]], dtype=float).transpose()[:self.source_count]
+
+        cd = self._initial_cd(camera)
+        field_radius = np.hypot(nx, ny) / 2 * np.sqrt(abs(np.linalg.det(cd)))
+        stars = self._field_stars(ra0, dec0, field_radius * 1.5)
+        if len(stars) < self.min_matches:
+            return None
+
+        # the pointing can be off by about a field, stars outside of the frame can still match
+        xi, eta = tangent_plane(stars["ra"], stars["dec"], ra0, dec0)
+        plane = np.array([xi, eta]).transpose()
+
+        best = (0, None)
+        for rot in self._rotations(camera):
+            c, s = np.cos(rot), np.sin(rot)
+            inv = np.linalg.inv(np.array([[c, -s], [s, c]]) @ cd)
+            predicted = plane @ inv.T + center
+            votes, shift = self._match_shift(sources, predicted, max(nx, ny))
+            if votes > best[0]:
+                best = (votes, predicted + shift)
+
+        if best[0] < self.min_matches:
+            return None
+
+        # fit pixel -> tangent plane around the new center and match again with the fitted solution
+        predicted = best[1]
+        for _ in range(3):
+            i, j = self._pairs(sources, predicted)
+            if len(i) < self.min_matches:
+                return None
+
+            xi, eta = tangent_plane(stars["ra"], stars["dec"], ra0, dec0)
+            A = np.column_stack([np.ones(len(i)), sources[i] - center])
+            coeffs, *_ = np.linalg.lstsq(A, np.array([xi[j], eta[j]]).transpose(), rcond=None)
+            zero, cd = coeffs[0], coeffs[1:].T
+
+            wcs = WCS(naxis=2)
+            wcs.wcs.ctype = ["RA---TAN", "DEC--TAN"]
+            wcs.wcs.crval = [ra0, dec0]
+            wcs.wcs.crpix = center - np.linalg.solve(cd, zero)
+            wcs.wcs.cd = cd
+            wcs.pixel_shape = (nx, ny)
+
+            ra0, dec0 = wcs.all_pix2world([center], 1)[0]
+            predicted = np.array(wcs.all_world2pix(stars["ra"], stars["dec"], 1)).transpose()
+
+        self._remember(camera, wcs, ra, dec)
+        log.debug(f"{camera}: matched {len(i)} of {len(sources)} sources")
+        return wcs
+
+    def __call__(self, image: Image) -> Image:
+        """Find astrometric solution on given image.
+
+        Args:
+            image: Image to analyse.
+        """
+        img = image.copy()
+
+        if img.catalog is None or len(img.catalog) < self.min_matches:
+            log.warning("Not enough sources for catalog matching.")
+            img.writable("header")["WCSERR"] = 1
+            return self.fallback(image) if self.fallback else img
+
+        cat = img.catalog
+        if "peak" in cat.colnames:
+            cat = cat[np.argsort(-np.asarray(cat["peak"]), kind="stable")]
+        img.catalog = cat
+
+        try:
+            wcs = self.solve(img)
+        except (np.linalg.LinAlgError, ValueError) as e:
+            log.warning(f"catalog matching failed: {e}")
+            wcs = None
+
+        if wcs is None:
+            if self.fallback:
+                log.debug("no catalog match, using fallback astrometry")
+                img = self.fallback(image)
+                fallback_wcs = getattr(img, "astrometric_wcs", None)
+                if fallback_wcs:
+                    fallback_wcs.pixel_shape = (img.header["NAXIS1"], img.header["NAXIS2"])
+                    self._remember(img.header.get("CAMNAME", ""), fallback_wcs,
+                                   float(img.header["RA"]), float(img.header["DEC"]))
+                return img
+            img.writable("header")["WCSERR"] = 1
+
+        img.astrometric_wcs = wcs
+        return img
+
+
+def _separation(ra0: Any, dec0: Any, ra1: Any, dec1: Any) -> Any:
+    """Angular separation in degrees."""
+    ra0, dec0, ra1, dec1 = (np.radians(v) for v in (ra0, dec0, ra1, dec1))
+    cossep = np.sin(dec0) * np.sin(dec1) + np.cos(dec0) * np.cos(dec1) * np.cos(ra1 - ra0)
+    return np.degrees(np.arccos(np.clip(cossep, -1.0, 1.0)))
+
+
+__all__ = ["CatalogMatchAstrometry", "tangent_plane", "from_tangent_plane"]
@@ -0,0 +1,202 @@
+import time
+from collections import OrderedDict
+from math import cos, radians, degrees, hypot
+from threading import Lock
+from typing import Any, Hashable, Optional, Tuple
+
+import numpy as np
+
+import logging
+
+log = logging.getLogger(__name__)
+
+
+class _Entry:
+    __slots__ = ("camera", "ra", "dec", "xy", "wcs", "time")
+
+    def __init__(self, camera, ra, dec, xy, wcs):
+        self.camera = camera
+        self.ra = ra
+        self.dec = dec
+        self.xy = xy
+        self.wcs = wcs
+        self.time = time.monotonic()
+
+
+class SolveCache:
+    """Cache of recent astrometric solutions.
+
+    Entries are keyed by camera and a hash of the distances between the brightest sources,
+    which does not change with small pointing offsets. An entry is only used after the
+    sources of the new frame have been matched to the cached ones by a translation and
+    the matched sources show neither rotation nor large residuals, the cached WCS is
+    returned shifted by it. Without a hash hit, entries of the camera with a
+    pointing within radius are tried. Entries expire after max_age, the least recently
+    used are evicted beyond max_entries.
+    """
+
+    __module__ = "lvmagp.images.processors.astrometry"
+
+    def __init__(
+        self,
+        max_entries: int = 32,
+        max_age: float = 3600.0,
+        radius: float = 0.1,
+        source_count: int = 20,
+        pattern_count: int = 6,
+        pattern_step: float = 2.0,
+        match_radius: float = 2.0,
+        min_matches: int = 6,
+        max_shift: float = 100.0,
+        max_residual: float = 1.0,
+        max_rotation: float = 0.05,
+    ):
+        """Init new cache.
+
+        Args:
+            max_entries: Number of solutions kept.
+            max_age: Seconds a solution is kept.
+            radius: Distance in degrees of the header pointings for a cached solution to be tried.
+            source_count: Number of brightest sources stored and matched.
+            pattern_count: Number of brightest sources in the hash.
+            pattern_step: Quantisation of the source distances in the hash in pixels.
+            match_radius: Radius in pixels for a source to match after the translation.
+            min_matches: Minimum number of matched sources for a cached solution to be used.
+            max_shift: Largest translation in pixels.
+            max_residual: Largest rms distance in pixels of the matched sources after the
+                translation.
+            max_rotation: Largest rotation in degrees between the matched sources.
+        """
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.radius = radius
+        self.source_count = source_count
+        self.pattern_count = pattern_count
+        self.pattern_step = pattern_step
+        self.match_radius = match_radius
+        self.min_matches = min_matches
+        self.max_shift = max_shift
+        self.max_residual = max_residual
+        self.max_rotation = max_rotation
+        self.entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self.lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0
+
+    def pattern(self, xy: np.ndarray) -> Optional[int]:
+        """Hash of the sorted distances between the brightest sources, None if too few."""
+        if len(xy) < self.pattern_count:
+            return None
+        p = xy[:self.pattern_count]
+        dist = np.hypot(*(p[:, None, :] - p[None, :, :]).transpose(2, 0, 1))
+        dist = np.sort(dist[np.triu_indices(len(p), 1)])
+        return hash(tuple(np.round(dist / self.pattern_step).astype(int)))
+
+    def translation(self, xy: np.ndarray, ref: np.ndarray) -> Tuple[int, np.ndarray]:
+        """Shift from ref to xy with most matching sources, by voting on all pair differences."""
+        width = 2 * self.match_radius
+        diff = (xy[:, None, :] - ref[None, :, :]).reshape(-1, 2)
+        diff = diff[(np.abs(diff) <= self.max_shift).all(axis=1)]
+        if len(diff) == 0:
+            return 0, np.zeros(2)
+        bins = np.floor(diff / width).astype(int)
+        cells, counts = np.unique(bins, axis=0, return_counts=True)
+        best = cells[np.argmax(counts)]
+        near = (np.abs(bins - best) <= 1).all(axis=1)
+        shift = np.median(diff[near], axis=0)
+
+        dist = np.hypot(*(xy[:, None, :] - (ref + shift)[None, :, :]).transpose(2, 0, 1))
+        return int(np.count_nonzero(dist.min(axis=1) < self.match_radius)), shift
+
+    def residuals(self, xy: np.ndarray, ref: np.ndarray, shift: np.ndarray) -> Tuple[float, float]:
+        """Rotation in degrees and rms residual in pixels of the sources matched by the shift."""
+        moved = ref + shift
+        dist = np.hypot(*(xy[:, None, :] - moved[None, :, :]).transpose(2, 0, 1))
+        nearest = np.argmin(dist, axis=1)
+        matched = dist[np.arange(len(xy)), nearest] < self.match_radius
+        a, b = xy[matched], moved[nearest[matched]]
+
+        # rotation about the centroid of the matched sources, least squares
+        a0, b0 = a - a.mean(axis=0), b - b.mean(axis=0)
+        angle = np.arctan2(np.sum(b0[:, 0] * a0[:, 1] - b0[:, 1] * a0[:, 0]), np.sum(b0 * a0))
+        rms = np.sqrt(np.mean(np.sum((a - b) ** 2, axis=1)))
+        return degrees(angle), float(rms)
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        for key in [k for k, e in self.entries.items() if now - e.time > self.max_age]:
+            del self.entries[key]
+
+    def _candidates(self, camera: str, ra: float, dec: float, key: Optional[Hashable]):
+        if key is not None and key in self.entries:
+            yield key, self.entries[key]
+        for k, e in reversed(self.entries.items()):
+            dra = ((e.ra - ra + 180) % 360 - 180) * cos(radians(dec))
+            if k != key and e.camera == camera and hypot(dra, e.dec - dec) < self.radius:
+                yield k, e
+
+    def lookup(self, camera: str, ra: float, dec: float, xy: np.ndarray) -> Optional[Any]:
+        """Verified solution for a frame.
+
+        Args:
+            camera: Camera name.
+            ra: Right ascension of the header pointing in degrees.
+            dec: Declination of the header pointing in degrees.
+            xy: Pixel positions of the sources, brightest first.
+
+        Returns:
+            Cached WCS shifted to the frame or None.
+        """
+        xy = np.asarray(xy, dtype=float)[:self.source_count]
+        pattern = self.pattern(xy)
+        key = None if pattern is None else (camera, pattern)
+        with self.lock:
+            self._expire()
+            for k, entry in self._candidates(camera, ra, dec, key):
+                matches, shift = self.translation(xy, entry.xy)
+                if matches < self.min_matches:
+                    self.rejected += 1
+                    continue
+                rotation, rms = self.residuals(xy, entry.xy, shift)
+                if abs(rotation) > self.max_rotation or rms > self.max_residual:
+                    log.debug(f"{camera}: cached solution rejected, rotation {rotation:.3f} deg, "
+                              f"rms {rms:.2f} px")
+                    self.rejected += 1
+                    continue
+
+                self.entries.move_to_end(k)
+                self.hits += 1
+                log.debug(f"{camera}: cached solution, shift {shift} px, {matches} matches")
+                wcs = entry.wcs.deepcopy()
+                wcs.wcs.crpix += shift
+                return wcs
+
+            self.misses += 1
+            return None
+
+    def store(self, camera: str, ra: float, dec: float, xy: np.ndarray, wcs: Any) -> None:
+        """Add a solution.
+
+        Args:
+            camera: Camera name.
+            ra: Right ascension of the header pointing in degrees.
+            dec: Declination of the header pointing in degrees.
+            xy: Pixel positions of the sources, brightest first.
+            wcs: Solution.
+
+        Solutions with too few sources for the hash are not stored.
+        """
+        xy = np.asarray(xy, dtype=float)[:self.source_count]
+        pattern = self.pattern(xy)
+        if pattern is None:
+            return
+        key = (camera, pattern)
+        with self.lock:
+            self.entries[key] = _Entry(camera, ra, dec, xy, wcs)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+
+__all__ = ["SolveCache"]
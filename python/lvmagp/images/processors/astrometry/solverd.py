@@ -0,0 +1,159 @@
+import asyncio
+import json
+import os
+import socket
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import logging
+
+log = logging.getLogger(__name__)
+
+
+DEFAULT_SOCKET = "/tmp/lvmagp-solver.sock"
+
+# messages are JSON, prefixed by their length as unsigned 32 bit big endian
+_HEADER = struct.Struct("!I")
+
+
+def _encode(message: Dict[str, Any]) -> bytes:
+    data = json.dumps(message, default=float).encode()
+    return _HEADER.pack(len(data)) + data
+
+
+def _wcs_fields(message: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """WCS fields as returned by the solver, JSON turned the (value, comment) tuples into lists."""
+    if message is None:
+        return None
+    return {key: tuple(value) if isinstance(value, list) else value
+            for key, value in message.items()}
+
+
+class SolverServer:
+    """Local astrometry solver daemon.
+
+    Loads the index files once and solves requests of all actors on the node, so the
+    indexes are in memory only once. Requests are solved in a thread pool, one request
+    per connection is in flight at a time.
+    """
+
+    def __init__(self, path: str = DEFAULT_SOCKET, threads: int = 2, **solver_config: Any):
+        """Init new server.
+
+        Args:
+            path: Path of the Unix socket.
+            threads: Number of solves running in parallel.
+            solver_config: cache_directory and scales of the index files.
+        """
+        self.path = path
+        self.executor = ThreadPoolExecutor(threads, thread_name_prefix="solver")
+        self.solver_config = solver_config
+        if "scales" in solver_config:
+            self.solver_config["scales"] = set(solver_config["scales"])
+        self.solved = 0
+        self.failed = 0
+
+    def solve(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        from .astrometrydotlocal import AstrometryDotLocal
+
+        try:
+            fields = AstrometryDotLocal.solve_local(**request)
+            self.solved += 1
+            return {"wcs": fields}
+        except Exception as e:
+            self.failed += 1
+            log.warning(f"solve failed: {e}")
+            return {"wcs": None, "error": str(e)}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                try:
+                    (size,) = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+                except asyncio.IncompleteReadError:
+                    break
+                request = json.loads(await reader.readexactly(size))
+                if request.pop("command", "solve") == "status":
+                    response = {"solved": self.solved, "failed": self.failed}
+                else:
+                    response = await loop.run_in_executor(self.executor, self.solve, request)
+                writer.write(_encode(response))
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self) -> None:
+        """Load the indexes and serve until cancelled."""
+        from .astrometrydotlocal import AstrometryDotLocal
+
+        if self.solver_config:
+            AstrometryDotLocal._solver_config = dict(self.solver_config)
+        await asyncio.get_running_loop().run_in_executor(self.executor, AstrometryDotLocal.warmup)
+
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        server = await asyncio.start_unix_server(self.handle, path=self.path)
+        log.info(f"solver listening on {self.path}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+
+class SolverClient:
+    """Client of the local solver daemon, blocking, one connection per request."""
+
+    def __init__(self, path: str = DEFAULT_SOCKET, timeout: float = 5.0):
+        """Init new client.
+
+        Args:
+            path: Path of the Unix socket of the daemon.
+            timeout: Timeout of a request in seconds.
+        """
+        self.path = path
+        self.timeout = timeout
+
+    def _request(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self.timeout)
+            sock.connect(self.path)
+            sock.sendall(_encode(message))
+            (size,) = _HEADER.unpack(self._read(sock, _HEADER.size))
+            return json.loads(self._read(sock, size))
+
+    @staticmethod
+    def _read(sock: socket.socket, size: int) -> bytes:
+        data = bytearray()
+        while len(data) < size:
+            chunk = sock.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("solver closed the connection")
+            data += chunk
+        return bytes(data)
+
+    def solve(self, stars: List[List[float]], **params: Any) -> Optional[Dict[str, Any]]:
+        """Solve on the daemon.
+
+        Args:
+            stars: Pixel positions of the sources, brightest first.
+            params: ra, dec, radius, lower and upper as for AstrometryDotLocal.solve_local.
+
+        Returns:
+            WCS fields of the best match or None.
+
+        Raises:
+            OSError: If the daemon cannot be reached.
+        """
+        response = self._request({"command": "solve", "stars": stars, **params})
+        return _wcs_fields(response.get("wcs"))
+
+    def status(self) -> Dict[str, Any]:
+        """Number of solved and failed requests of the daemon."""
+        return self._request({"command": "status"})
+
+
+__all__ = ["SolverServer", "SolverClient", "DEFAULT_SOCKET"]
@@ -0,0 +1,175 @@
+import json
+import os
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, List, Tuple
+
+import numpy as np
+
+import logging
+
+log = logging.getLogger(__name__)
+
+
+STAR_DTYPE = np.dtype([("ra", "f8"), ("dec", "f8"), ("mag", "f4")])
+
+
+class GuideStarIndex:
+    """Local on-disk index of guide stars, e.g. a bright subset of Gaia.
+
+    The sky is cut into declination bands of tile_size degrees, every band into RA tiles of about
+    tile_size degrees. Every tile is one .npy file with the stars sorted by magnitude, tiles are
+    memory mapped and only the pages of stars that are used are read from disk.
+    """
+
+    __module__ = "lvmagp.images.processors.astrometry"
+
+    def __init__(self, directory: str, max_tiles: int = 64):
+        """Open an index.
+
+        Args:
+            directory: Directory of the index, created with GuideStarIndex.build.
+            max_tiles: Number of tiles kept open.
+        """
+        self.directory = directory
+        with open(os.path.join(directory, "index.json")) as f:
+            self.tile_size = float(json.load(f)["tile_size"])
+        self.max_tiles = max_tiles
+        self._tiles: "OrderedDict[Tuple[int, int], np.ndarray]" = OrderedDict()
+        self._lock = Lock()
+
+    @staticmethod
+    def _ra_tiles(band: int, tile_size: float) -> int:
+        """Number of RA tiles in a declination band."""
+        dec = min(abs(-90.0 + (band + 0.5) * tile_size), 90.0)
+        return max(1, int(360.0 * np.cos(np.radians(dec)) / tile_size))
+
+    @staticmethod
+    def _tile_ids(ra: np.ndarray, dec: np.ndarray,
+                  tile_size: float) -> Tuple[np.ndarray, np.ndarray]:
+        nbands = int(np.ceil(180.0 / tile_size))
+        band = np.clip(((np.asarray(dec) + 90.0) / tile_size).astype(int), 0, nbands - 1)
+        nra = np.array([GuideStarIndex._ra_tiles(b, tile_size) for b in range(nbands)])[band]
+        idx = np.minimum((np.asarray(ra) % 360.0 / 360.0 * nra).astype(int), nra - 1)
+        return band, idx
+
+    def _filename(self, band: int, idx: int) -> str:
+        return os.path.join(self.directory, f"tile_{band:03d}_{idx:04d}.npy")
+
+    @classmethod
+    def build(cls, directory: str, ra: Any, dec: Any, mag: Any,
+              tile_size: float = 2.0) -> "GuideStarIndex":
+        """Build an index from star positions, e.g. a Gaia extract.
+
+        Args:
+            directory: Directory to write the index to.
+            ra: Right ascension of the stars in degrees.
+            dec: Declination of the stars in degrees.
+            mag: Magnitude of the stars.
+            tile_size: Size of the tiles in degrees.
+
+        Returns:
+            The new index.
+        """
+        os.makedirs(directory, exist_ok=True)
+
+        stars = np.empty(len(ra), dtype=STAR_DTYPE)
+        stars["ra"], stars["dec"], stars["mag"] = np.asarray(ra) % 360.0, dec, mag
+
+        band, idx = cls._tile_ids(stars["ra"], stars["dec"], tile_size)
+        key = band * 10000 + idx
+        order = np.lexsort((stars["mag"], key))
+        stars, key = stars[order], key[order]
+
+        tiles, start = np.unique(key, return_index=True)
+        for tile, lo, hi in zip(tiles, start, np.append(start[1:], len(key))):
+            np.save(os.path.join(directory, f"tile_{tile // 10000:03d}_{tile % 10000:04d}.npy"),
+                    stars[lo:hi])
+
+        with open(os.path.join(directory, "index.json"), "w") as f:
+            json.dump({"tile_size": tile_size, "stars": len(stars)}, f)
+
+        return cls(directory)
+
+    def _tile(self, band: int, idx: int) -> np.ndarray:
+        with self._lock:
+            key = (band, idx)
+            if key in self._tiles:
+                self._tiles.move_to_end(key)
+                return self._tiles[key]
+
+            filename = self._filename(band, idx)
+            tile = np.load(filename, mmap_mode="r") if os.path.exists(filename) \
+                else np.empty(0, dtype=STAR_DTYPE)
+
+            self._tiles[key] = tile
+            if len(self._tiles) > self.max_tiles:
+                self._tiles.popitem(last=False)
+            return tile
+
+    def tiles(self, ra: float, dec: float, radius: float) -> List[Tuple[int, int]]:
+        """Tiles overlapping a circle on the sky.
+
+        Args:
+            ra: Right ascension of the center in degrees.
+            dec: Declination of the center in degrees.
+            radius: Radius in degrees.
+
+        Returns:
+            List of (band, index) of the tiles.
+        """
+        nbands = int(np.ceil(180.0 / self.tile_size))
+        lo = max(int((dec - radius + 90.0) / self.tile_size), 0)
+        hi = min(int((dec + radius + 90.0) / self.tile_size), nbands - 1)
+
+        # half width in RA at the declination furthest from the equator
+        maxdec = abs(dec) + radius
+        width = radius / np.cos(np.radians(maxdec)) if maxdec < 90.0 else 360.0
+
+        tiles = []
+        for band in range(lo, hi + 1):
+            nra = self._ra_tiles(band, self.tile_size)
+            if width >= 180.0:
+                tiles.extend((band, idx) for idx in range(nra))
+                continue
+            first = int(np.floor((ra - width) % 360.0 / 360.0 * nra))
+            count = int(np.ceil(2 * width / 360.0 * nra)) + 1
+            tiles.extend(sorted({(band, (first + i) % nra) for i in range(count)}))
+        return tiles
+
+    def query(self, ra: float, dec: float, radius: float, mag_limit: float = np.inf,
+              count: int = 0) -> np.ndarray:
+        """Stars in a circle on the sky.
+
+        Args:
+            ra: Right ascension of the center in degrees.
+            dec: Declination of the center in degrees.
+            radius: Radius in degrees.
+            mag_limit: Faintest magnitude.
+            count: Return only this number of the brightest stars, 0 for all.
+
+        Returns:
+            Structured array with ra, dec and mag, brightest first.
+        """
+        parts = []
+        for band, idx in self.tiles(ra, dec, radius):
+            tile = self._tile(band, idx)
+            # tiles are sorted by magnitude, so only the bright part is read
+            tile = tile[:np.searchsorted(tile["mag"], mag_limit, side="right")]
+            if len(tile):
+                parts.append(np.asarray(tile))
+
+        if not parts:
+            return np.empty(0, dtype=STAR_DTYPE)
+        stars = np.concatenate(parts)
+
+        ra0, dec0 = np.radians(ra), np.radians(dec)
+        ra1, dec1 = np.radians(stars["ra"]), np.radians(stars["dec"])
+        cossep = np.sin(dec0) * np.sin(dec1) + np.cos(dec0) * np.cos(dec1) * np.cos(ra1 - ra0)
+        stars = stars[cossep >= np.cos(np.radians(radius))]
+
+        stars = stars[np.argsort(stars["mag"], kind="stable")]
+        return stars[:count] if count else stars
+
+
+__all__ = ["GuideStarIndex", "STAR_DTYPE"]
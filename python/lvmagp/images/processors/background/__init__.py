@@ -2,9 +2,10 @@
 Background
 ----------------
 """
-from .background import Background
+from .background import Background, BackgroundEstimate
 from .darkimage import DarkImageBackground
 from .pysep import SepBackground
 from .daophot import DaophotBackground
 
-__all__ = ["Background", "DarkImageBackground", "SepBackground", "DaophotBackground"]
+__all__ = ["Background", "BackgroundEstimate", "DarkImageBackground", "SepBackground",
+           "DaophotBackground"]
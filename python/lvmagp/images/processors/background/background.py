@@ -1,9 +1,28 @@
 from abc import ABCMeta, abstractmethod
+from typing import Any, Optional
+
+import numpy as np
 
 from lvmagp.images import Image
 from lvmagp.images.processor import ImageProcessor
 
 
+class BackgroundEstimate:
+    """Background of an image, stored as image meta so later processors can reuse it."""
+
+    __module__ = "lvmagp.images.processors.background"
+
+    def __init__(self, background: Any, rms: Optional[float] = None):
+        """Init new background estimate.
+
+        Args:
+            background: Background map or scalar.
+            rms: Global background noise.
+        """
+        self.background = background
+        self.rms = rms
+
+
 class Background(ImageProcessor, metaclass=ABCMeta):
     """Base class for background."""
 
@@ -21,5 +40,22 @@ class Background(ImageProcessor, metaclass=ABCMeta):
         """
         ...
 
+    def estimate(self, image: Image) -> BackgroundEstimate:
+        """Estimate background of given image.
+
+        Args:
+            image: Image.
+
+        Returns:
+            Background estimate to store as image meta.
+        """
+        bkg = self(image)
+
+        # sep.Background
+        if hasattr(bkg, "back"):
+            return BackgroundEstimate(bkg.back(), bkg.globalrms)
+
+        return BackgroundEstimate(np.asarray(bkg))
+
 
-__all__ = ["Background"]
+__all__ = ["Background", "BackgroundEstimate"]
@@ -1,10 +1,8 @@
 import asyncio
 from typing import Tuple, TYPE_CHECKING, Any, Optional
 
-from photutils.background import Background2D, MedianBackground
-
 from lvmagp.images import Image
-from .background import Background
+from .background import Background, BackgroundEstimate
 
 
 class DaophotBackground(Background):
@@ -77,6 +75,8 @@ Parameters:
 
         """
 
+        from photutils.background import MedianBackground
+
         self.box_size=box_size
         self.kwargs=kwargs
         self.kwargs["bkg_estimator"] = MedianBackground()
@@ -92,11 +92,19 @@ Parameters:
         Returns:
             Background in float.
         """
+        from photutils.background import Background2D
 
         return Background2D(image.data,
                            box_size if box_size else self.box_size,
                            **{**self.kwargs, **kwargs}).background
 
+    def estimate(self, image: Image) -> BackgroundEstimate:
+        """Estimate background and its noise of given image."""
+        from photutils.background import Background2D
+
+        bkg = Background2D(image.data, self.box_size, **self.kwargs)
+        return BackgroundEstimate(bkg.background, bkg.background_rms_median)
+
 
 
 __all__ = ["DaophotBackground"]
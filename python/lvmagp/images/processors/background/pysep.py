@@ -1,7 +1,5 @@
 from typing import Tuple, TYPE_CHECKING, Any, Optional
 
-import sep
-
 from lvmagp.images import Image
 from .background import Background
 
@@ -51,6 +49,7 @@ class SepBackground(Background):
         Returns:
             Image with subtracted background in float.
         """
+        import sep
 
         return sep.Background(image.data.astype(float), **{**self.kwargs, **kwargs})
 
@@ -2,8 +2,11 @@ import asyncio
 from typing import Tuple, Any
 import logging
 
+import numpy as np
+
 from .sourcedetection import SourceDetection
 from lvmagp.images import Image
+from lvmagp.images.processors.background import BackgroundEstimate
 
 log = logging.getLogger(__name__)
 
@@ -56,20 +59,23 @@ class DaophotSourceDetection(SourceDetection):
         if image.data is None:
             log.warning("No data found in image.")
             return image
-        data = image.data.astype(float).copy()
-
-        # estimate background
-        sigma_clip = SigmaClip(sigma=self.bkg_sigma)
-        bkg_estimator = MedianBackground()
-        bkg = Background2D(
-            data,
-            self.bkg_box_size,
-            filter_size=self.bkg_filter_size,
-            sigma_clip=sigma_clip,
-            bkg_estimator=bkg_estimator,
-            mask=image.mask,
-        )
-        data -= bkg.background
+        data = image.data.astype(float)
+
+        # estimate background, unless an earlier processor already did
+        background = image.get_meta_safe(BackgroundEstimate)
+        if background is None or np.shape(background.background) not in ((), data.shape):
+            sigma_clip = SigmaClip(sigma=self.bkg_sigma)
+            bkg_estimator = MedianBackground()
+            bkg = Background2D(
+                data,
+                self.bkg_box_size,
+                filter_size=self.bkg_filter_size,
+                sigma_clip=sigma_clip,
+                bkg_estimator=bkg_estimator,
+                mask=image.mask,
+            )
+            background = BackgroundEstimate(bkg.background, bkg.background_rms_median)
+        data -= background.background
 
         # do statistics
         mean, median, std = sigma_clipped_stats(data, sigma=3.0)
@@ -91,6 +97,7 @@ class DaophotSourceDetection(SourceDetection):
         img = image.copy()
         # pick columns for catalog
         img.catalog = sources["x", "y", "flux", "peak"] if sources else None
+        img.set_meta(background)
         return img
 
 
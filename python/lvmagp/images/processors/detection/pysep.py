@@ -6,10 +6,10 @@ from astropy.table import Table, Column
 import logging
 import numpy as np
 import numpy.typing as npt
-import pandas as pd
 
 from .sourcedetection import SourceDetection
 from lvmagp.images import Image
+from lvmagp.images.processors.background import BackgroundEstimate
 
 if TYPE_CHECKING:
     from sep import Background
@@ -65,8 +65,7 @@ class SepSourceDetection(SourceDetection):
             Image with attached catalog.
         """
         import sep
-
-        loop = asyncio.get_running_loop()
+        import pandas as pd
 
         # got data?
         if image.data is None:
@@ -76,8 +75,15 @@ class SepSourceDetection(SourceDetection):
         # no mask?
         mask = image.mask if image.mask is not None else np.zeros(image.data.shape, dtype=bool)
 
-        # remove background
-        data, bkg = SepSourceDetection.remove_background(image.data, mask)
+        # remove background, unless an earlier processor already estimated it
+        background = image.get_meta_safe(BackgroundEstimate)
+        if background is not None and background.rms is not None and \
+                np.shape(background.background) in ((), image.data.shape):
+            data = np.ascontiguousarray(image.data - background.background, dtype=float)
+            globalrms = background.rms
+        else:
+            data, bkg = SepSourceDetection.remove_background(image.data, mask)
+            globalrms = bkg.globalrms
 
         # extract sources
         #sources = await loop.run_in_executor(
@@ -99,7 +105,7 @@ class SepSourceDetection(SourceDetection):
         sources = sep.extract(
             data,
             self.threshold,
-            err=bkg.globalrms,
+            err=globalrms,
             minarea=self.minarea,
             deblend_nthresh=self.deblend_nthresh,
             deblend_cont=self.deblend_cont,
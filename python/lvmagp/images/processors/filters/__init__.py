@@ -0,0 +1,7 @@
+"""
+Filters
+----------------
+"""
+from .median import MedianFilter
+
+__all__ = ["MedianFilter"]
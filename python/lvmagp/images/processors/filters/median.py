@@ -0,0 +1,42 @@
+from typing import Any
+
+from lvmagp.images import Image
+from lvmagp.images.processor import ImageProcessor
+
+
+class MedianFilter(ImageProcessor):
+    """Median filter the image data, e.g. to remove hot pixels before detection."""
+
+    __module__ = "lvmagp.images.processors.filters"
+
+    # works on the raw integer data, which is faster
+    needs_float = False
+
+    def __init__(self, size: int = 2, **kwargs: Any):
+        """Init new median filter.
+
+        Args:
+            size: Size of the filter window in pixels.
+        """
+        self.size = size
+
+    def __call__(self, image: Image) -> Image:
+        """Filter given image.
+
+        Args:
+            image: Image to filter.
+
+        Returns:
+            Filtered image.
+        """
+        from scipy.ndimage import median_filter
+
+        if image.data is None:
+            return image
+
+        img = image.copy()
+        img.data = median_filter(image.data, size=self.size)
+        return img
+
+
+__all__ = ["MedianFilter"]
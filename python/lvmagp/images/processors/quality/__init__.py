@@ -0,0 +1,7 @@
+"""
+Quality
+----------------
+"""
+from .framequality import FrameQuality, FrameQualityCheck
+
+__all__ = ["FrameQuality", "FrameQualityCheck"]
@@ -0,0 +1,186 @@
+from typing import Any, List
+
+import numpy as np
+
+from lvmagp.images import Image
+from lvmagp.images.processor import ImageProcessor
+
+
+class FrameQuality:
+    """Quick quality estimate of a frame, stored as image meta.
+
+    A good frame is analysed and corrected for, a poor frame is analysed but the result is not
+    sent to the mount and a bad frame is not analysed at all.
+    """
+
+    __module__ = "lvmagp.images.processors.quality"
+
+    GOOD = "good"
+    POOR = "poor"
+    BAD = "bad"
+
+    def __init__(self, status: str, reasons: List[str], median: float, noise: float,
+                 saturated: float, sources: int, ellipticity: float):
+        """Init new frame quality.
+
+        Args:
+            status: One of GOOD, POOR or BAD.
+            reasons: Why the frame is not good.
+            median: Median level.
+            noise: Robust standard deviation of the sky.
+            saturated: Fraction of saturated pixels.
+            sources: Estimated number of sources.
+            ellipticity: Median ellipticity of the brightest sources.
+        """
+        self.status = status
+        self.reasons = reasons
+        self.median = median
+        self.noise = noise
+        self.saturated = saturated
+        self.sources = sources
+        self.ellipticity = ellipticity
+
+    @property
+    def good(self) -> bool:
+        return self.status == FrameQuality.GOOD
+
+    @property
+    def bad(self) -> bool:
+        return self.status == FrameQuality.BAD
+
+    def to_dict(self) -> dict:
+        return {"status": self.status, "reasons": self.reasons, "median": self.median,
+                "noise": self.noise, "saturated": self.saturated, "sources": self.sources,
+                "ellipticity": self.ellipticity}
+
+
+class FrameQualityCheck(ImageProcessor):
+    """Cheap frame check before source detection and astrometry.
+
+    Level, noise and saturation come from a subsampled frame, sources are counted as local maxima
+    in a binned frame and their ellipticity is measured from second moments, to spot clouded out,
+    saturated and trailed frames in a few milliseconds.
+    """
+
+    __module__ = "lvmagp.images.processors.quality"
+
+    def __init__(
+        self,
+        step: int = 4,
+        binning: int = 4,
+        threshold: float = 10.0,
+        saturation: float = 60000.0,
+        max_saturated: float = 0.05,
+        min_sources: int = 3,
+        poor_sources: int = 6,
+        max_ellipticity: float = 0.4,
+        **kwargs: Any,
+    ):
+        """Init new frame quality check.
+
+        Args:
+            step: Only every step-th pixel in both axes is used for statistics.
+            binning: Binning for the source count.
+            threshold: Detection threshold in sigma of the binned frame.
+            saturation: Pixel values at or above this are saturated.
+            max_saturated: Frames with a larger saturated fraction are bad.
+            min_sources: Frames with fewer sources are bad.
+            poor_sources: Frames with fewer sources are poor.
+            max_ellipticity: Frames with more elongated sources, e.g. trailed, are poor.
+        """
+        self.step = step
+        self.binning = binning
+        self.threshold = threshold
+        self.saturation = saturation
+        self.max_saturated = max_saturated
+        self.min_sources = min_sources
+        self.poor_sources = poor_sources
+        self.max_ellipticity = max_ellipticity
+
+    def _ellipticity(self, binned: np.ndarray, peaks: np.ndarray, background: float,
+                     count: int = 10) -> float:
+        """Median ellipticity of the brightest peaks from second moments in a 7x7 box."""
+        ny, nx = binned.shape
+        brightest = peaks[np.argsort(-binned[peaks[:, 0], peaks[:, 1]])][:count]
+        dy, dx = np.mgrid[-3:4, -3:4]
+
+        values = []
+        for y, x in brightest:
+            if y < 3 or x < 3 or y >= ny - 3 or x >= nx - 3:
+                continue
+            box = np.clip(binned[y - 3:y + 4, x - 3:x + 4] - background, 0, None)
+            total = box.sum()
+            if total <= 0:
+                continue
+            mx, my = (box * dx).sum() / total, (box * dy).sum() / total
+            xx = (box * (dx - mx) ** 2).sum() / total
+            yy = (box * (dy - my) ** 2).sum() / total
+            xy = (box * (dx - mx) * (dy - my)).sum() / total
+            root = np.sqrt(((xx - yy) / 2) ** 2 + xy ** 2)
+            a, b = (xx + yy) / 2 + root, (xx + yy) / 2 - root
+            values.append(1.0 - np.sqrt(max(b, 0.0) / a) if a > 0 else 0.0)
+        return float(np.median(values)) if values else 0.0
+
+    def estimate(self, image: Image) -> FrameQuality:
+        """Estimate the quality of a frame.
+
+        Args:
+            image: Image to check.
+
+        Returns:
+            The frame quality.
+        """
+        data = image.data
+        sub = data[::self.step, ::self.step].astype(np.float32)
+        median = float(np.median(sub))
+        noise = float(1.4826 * np.median(np.abs(sub - median)))
+        saturated = float(np.mean(sub >= self.saturation))
+
+        # local maxima in a binned frame
+        b = self.binning
+        ny, nx = data.shape[0] // b, data.shape[1] // b
+        binned = data[:ny * b, :nx * b].reshape(ny, b, nx, b).mean(axis=(1, 3), dtype=np.float32)
+        bmedian = float(np.median(binned[::2, ::2]))
+        bnoise = float(1.4826 * np.median(np.abs(binned[::2, ::2] - bmedian))) or noise / b or 1.0
+
+        inner = binned[1:-1, 1:-1]
+        peak = inner > bmedian + self.threshold * bnoise
+        for sy in (slice(0, -2), slice(1, -1), slice(2, None)):
+            for sx in (slice(0, -2), slice(1, -1), slice(2, None)):
+                if sy.start == 1 and sx.start == 1:
+                    continue
+                peak &= inner >= binned[sy, sx]
+        peaks = np.argwhere(peak) + 1
+        sources = len(peaks)
+        ellipticity = self._ellipticity(binned, peaks, bmedian) if sources else 0.0
+
+        bad, poor = [], []
+        if not np.isfinite(median) or noise == 0:
+            bad.append("no signal")
+        if saturated > self.max_saturated:
+            bad.append(f"saturated {saturated:.1%}")
+        if sources < self.min_sources:
+            bad.append(f"{sources} sources")
+        elif sources < self.poor_sources:
+            poor.append(f"{sources} sources")
+        if ellipticity > self.max_ellipticity:
+            poor.append(f"ellipticity {ellipticity:.2f}")
+
+        status = FrameQuality.BAD if bad else FrameQuality.POOR if poor else FrameQuality.GOOD
+        return FrameQuality(status, bad + poor, median, noise, saturated, sources, ellipticity)
+
+    def __call__(self, image: Image) -> Image:
+        """Check given image and store a FrameQuality as meta.
+
+        Args:
+            image: Image to check.
+
+        Returns:
+            Image with FrameQuality meta.
+        """
+        img = image.copy()
+        img.set_meta(self.estimate(image))
+        return img
+
+
+__all__ = ["FrameQuality", "FrameQualityCheck"]
@@ -0,0 +1,108 @@
+# encoding: utf-8
+#
+# test_catalogmatch.py
+
+import numpy as np
+from pytest import approx, fixture, importorskip
+
+
+importorskip("astropy")
+
+from astropy.table import Table  # noqa: E402
+from astropy.wcs import WCS  # noqa: E402
+
+from lvmagp.images import Image  # noqa: E402
+from lvmagp.images.processors.astrometry import (  # noqa: E402
+    CatalogMatchAstrometry,
+    GuideStarIndex,
+)
+from lvmagp.images.processors.astrometry.catalogmatch import (  # noqa: E402
+    from_tangent_plane,
+    tangent_plane,
+)
+
+
+RA, DEC = 120.0, -30.0
+NX, NY = 1600, 1100
+
+
+@fixture
+def index(tmp_path):
+    rng = np.random.default_rng(1)
+    count = 4000
+    xi, eta = rng.uniform(-1.2, 1.2, count), rng.uniform(-1.2, 1.2, count)
+    ra, dec = from_tangent_plane(xi, eta, RA, DEC)
+    mag = rng.uniform(8.0, 16.0, count)
+    return GuideStarIndex.build(str(tmp_path / "index"), ra, dec, mag, tile_size=1.0)
+
+
+def frame(index, rotation=2.0, offset=(30.0, -20.0)):
+    """Image with the guide stars as seen by a camera with given rotation and pointing offset."""
+    angle = np.radians(rotation)
+    scale = 1.0 / 3600.0
+    wcs = WCS(naxis=2)
+    wcs.wcs.ctype = ["RA---TAN", "DEC--TAN"]
+    wcs.wcs.crval = [RA, DEC]
+    wcs.wcs.crpix = [(NX + 1) / 2 + offset[0], (NY + 1) / 2 + offset[1]]
+    c, s = np.cos(angle), np.sin(angle)
+    wcs.wcs.cd = scale * np.array([[-c, s], [s, c]])
+
+    stars = index.query(RA, DEC, 0.5)
+    x, y = wcs.all_world2pix(stars["ra"], stars["dec"], 1)
+    inside = (x > 0) & (x < NX) & (y > 0) & (y < NY)
+    peak = 30000.0 - 1000.0 * stars["mag"][inside]
+
+    img = Image(np.zeros((NY, NX), dtype=np.float32))
+    img.catalog = Table({"x": x[inside], "y": y[inside], "flux": peak, "peak": peak})
+    header = img.writable("header")
+    header["RA"], header["DEC"], header["CAMNAME"] = RA, DEC, "east"
+    return img, wcs
+
+
+class TestGuideStarIndex(object):
+    """Tests for the local guide star index."""
+
+    def test_query(self, index):
+
+        stars = index.query(RA, DEC, 0.5, mag_limit=12.0)
+        xi, eta = tangent_plane(stars["ra"], stars["dec"], RA, DEC)
+
+        assert len(stars) > 0
+        assert np.all(stars["mag"] <= 12.0)
+        assert np.all(np.diff(stars["mag"]) >= 0)
+        assert np.all(np.hypot(xi, eta) < 0.51)
+
+    def test_count(self, index):
+
+        assert len(index.query(RA, DEC, 1.0, count=10)) == 10
+
+    def test_ra_wrap(self, tmp_path):
+
+        index = GuideStarIndex.build(str(tmp_path / "wrap"),
+                                     [359.9, 0.1, 180.0], [0.0, 0.0, 0.0], [10.0, 11.0, 12.0])
+
+        assert index.query(0.0, 0.0, 0.5)["ra"] == approx([359.9, 0.1])
+
+
+class TestCatalogMatchAstrometry(object):
+    """Tests for solving frames against the guide star index."""
+
+    def test_solve(self, index):
+
+        img, truth = frame(index)
+        astrometry = CatalogMatchAstrometry(index, radius=1.0, pixel_scale=1.0)
+        wcs = astrometry.solve(img)
+
+        assert wcs is not None
+        for x, y in [(1.0, 1.0), (NX, NY), (NX / 2, NY / 2)]:
+            ra, dec = wcs.all_pix2world([[x, y]], 1)[0]
+            ra_true, dec_true = truth.all_pix2world([[x, y]], 1)[0]
+            assert ra == approx(ra_true, abs=1e-5)
+            assert dec == approx(dec_true, abs=1e-5)
+
+    def test_no_stars(self, tmp_path):
+
+        index = GuideStarIndex.build(str(tmp_path / "empty"), [0.0], [0.0], [10.0])
+        img, _ = frame(index)
+
+        assert CatalogMatchAstrometry(index).solve(img) is None
@@ -0,0 +1,77 @@
+# encoding: utf-8
+#
+# test_controller.py
+
+from pytest import approx
+
+from lvmagp.guide.controller import AxisController, DriftFilter, GuideController
+
+
+class TestGuideController(object):
+    """Tests for the guide controller."""
+
+    def test_proportional_with_deadband(self):
+
+        controller = GuideController(kp=0.8, deadband=0.8)
+
+        assert controller.update((2.0, 0.5), now=0.0) == approx((1.6, 0.4))
+        assert controller.update((0.5, -0.5), now=10.0) == (0.0, 0.0)
+
+    def test_max_step(self):
+
+        controller = GuideController(kp=1.0, deadband=0.0, max_step=1.5)
+
+        assert controller.update((10.0, -10.0), now=0.0) == approx((1.5, -1.5))
+
+    def test_anti_windup(self):
+
+        axis = AxisController(kp=0.0, ki=1.0, max_step=1.0)
+
+        for _ in range(10):
+            assert axis.update(10.0, 1.0) == approx(1.0)
+
+        # the integral did not grow while limited, so the output drops at once
+        assert axis.integral == 0.0
+        assert axis.update(-0.5, 1.0) == approx(-0.5)
+
+    def test_reset(self):
+
+        controller = GuideController(ki=0.1, kalman=True)
+        controller.update((1.0, 1.0), now=0.0)
+        controller.update((2.0, 2.0), now=10.0)
+        controller.reset()
+
+        assert controller.last_time is None
+        assert controller.drift_rate == (0.0, 0.0)
+        assert all(axis.integral == 0.0 for axis in controller.axes)
+
+
+class TestDriftFilter(object):
+    """Tests for the Kalman filter of the guide error."""
+
+    def test_rate(self):
+
+        drift = DriftFilter(measurement_noise=0.01)
+        for t in range(30):
+            if drift.initialized:
+                drift.predict(1.0)
+            drift.update(0.1 * t)
+
+        assert drift.rate == approx(0.1, abs=1e-3)
+        assert drift.position == approx(2.9, abs=1e-2)
+
+    def test_correction(self):
+
+        drift = DriftFilter(measurement_noise=0.01)
+        drift.update(1.0)
+        drift.predict(1.0, correction=1.0)
+
+        assert drift.position == approx(0.0)
+
+    def test_no_rate_before_second_measurement(self):
+
+        drift = DriftFilter()
+        drift.update(5.0)
+
+        assert drift.rate == 0.0
+        assert drift.position == 5.0
@@ -0,0 +1,86 @@
+# encoding: utf-8
+#
+# test_curvefit.py
+
+import numpy as np
+from pytest import approx, importorskip, raises
+
+
+importorskip("scipy")
+
+from lvmagp.focus.curvefit import (  # noqa: E402
+    fit_hyperbola,
+    fit_hyperbola_joint,
+    fit_hyperbolas,
+    hyperbola,
+)
+
+
+FOCUS = np.linspace(-3.0, 3.0, 9)
+
+
+def sweep(offset=0.0, a=1.0, b=2.0, c=0.5, noise=0.0, seed=0):
+    y = hyperbola(FOCUS - offset, a, b, c)
+    if noise:
+        y = y + np.random.default_rng(seed).normal(0.0, noise, len(FOCUS))
+    return FOCUS, y, np.full(len(FOCUS), max(noise, 0.01))
+
+
+class TestFitHyperbola(object):
+    """Tests for the single and batched hyperbola fits."""
+
+    def test_minimum(self):
+
+        focus, err = fit_hyperbola(*sweep(c=0.7, noise=0.02))
+
+        assert focus == approx(0.7, abs=0.05)
+        assert 0 < err < 0.1
+
+    def test_too_few_points(self):
+
+        with raises(RuntimeError):
+            fit_hyperbola([0.0, 1.0], [1.0, 2.0], [0.1, 0.1])
+
+    def test_batched(self):
+
+        x, y, e = sweep(c=-0.4)
+        short = np.where(np.arange(len(x)) < 2, x, np.nan)
+        foc, err = fit_hyperbolas([x, short], [y, y], [e, e])
+
+        assert foc[0] == approx(-0.4, abs=1e-3)
+        assert np.isnan(foc[1]) and np.isnan(err[1])
+
+
+class TestFitHyperbolaJoint(object):
+    """Tests for the joint fit of several cameras."""
+
+    def test_offsets(self):
+
+        sweeps = [sweep(offset=d) for d in (-0.2, 0.0, 0.2)]
+        focus, err, offsets = fit_hyperbola_joint(*zip(*sweeps))
+
+        assert focus == approx(0.5, abs=1e-3)
+        assert offsets == approx([-0.2, 0.0, 0.2], abs=1e-3)
+
+    def test_fixed_offsets(self):
+
+        sweeps = [sweep(offset=d) for d in (-0.3, 0.3)]
+        focus, err, offsets = fit_hyperbola_joint(*zip(*sweeps), offsets=[-0.3, 0.3])
+
+        assert focus == approx(0.5, abs=1e-3)
+        assert offsets == approx([-0.3, 0.3])
+
+    def test_drops_undersampled_camera(self):
+
+        x, y, e = zip(*[sweep(offset=d) for d in (-0.2, 0.2)])
+        x, y, e = list(x) + [[0.0]], list(y) + [[2.0]], list(e) + [[0.1]]
+        focus, err, offsets = fit_hyperbola_joint(x, y, e)
+
+        assert focus == approx(0.5, abs=1e-3)
+        assert offsets[:2] == approx([-0.2, 0.2], abs=1e-3)
+        assert np.isnan(offsets[2])
+
+    def test_not_enough_points(self):
+
+        with raises(RuntimeError):
+            fit_hyperbola_joint([[0.0], [1.0]], [[1.0], [1.0]], [[0.1], [0.1]])
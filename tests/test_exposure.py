@@ -0,0 +1,84 @@
+# encoding: utf-8
+#
+# test_exposure.py
+
+import asyncio
+import logging
+from math import nan
+
+from pytest import importorskip, raises
+
+
+importorskip("clu")
+importorskip("lvmtipo")
+
+from lvmagp.actor.statemachine import ActorStateMachine  # noqa: E402
+from lvmagp.exceptions import LvmagpExposureFailed  # noqa: E402
+from lvmagp.guide.worker import GuiderWorker  # noqa: E402
+
+
+class Telescope(object):
+    pwi = None
+
+
+class Exposures(object):
+    """Exposure failing or hanging for the first attempts."""
+
+    def __init__(self, fail=0, hang=0):
+        self.fail = fail
+        self.hang = hang
+        self.exptimes = []
+
+    async def __call__(self, exptime):
+        self.exptimes.append(exptime)
+        if self.hang:
+            self.hang -= 1
+            await asyncio.sleep(10)
+        if self.fail:
+            self.fail -= 1
+            raise RuntimeError("camera error")
+        return ["east.fits", "west.fits"]
+
+
+def worker(exposures, **kwargs):
+    worker = GuiderWorker(Telescope(), ActorStateMachine(), offset_calc=object(),
+                          offset_mount=object(), logger=logging.getLogger("test"),
+                          retry_delay=0.0, **kwargs)
+    worker._expose = exposures
+    return worker
+
+
+class TestExposeRetry(object):
+    """Tests for the guide exposures with timeout and retries."""
+
+    def test_retry(self):
+
+        guider = worker(Exposures(fail=2))
+        assert asyncio.run(guider.expose_retry(1.0)) == ["east.fits", "west.fits"]
+
+        stats = guider.exposure_stats.to_dict()
+        assert stats["attempts"] == 3 and stats["retries"] == 2
+        assert stats["exposures"] == 1 and stats["failures"] == 0
+
+    def test_timeout(self):
+
+        guider = worker(Exposures(hang=1), readout_timeout=0.05)
+        asyncio.run(guider.expose_retry(0.0))
+
+        stats = guider.exposure_stats.to_dict()
+        assert stats["timeouts"] == 1 and stats["exposures"] == 1
+
+    def test_failed(self):
+
+        guider = worker(Exposures(fail=5), retries=1)
+        with raises(LvmagpExposureFailed):
+            asyncio.run(guider.expose_retry(1.0))
+
+        assert guider.exposure_stats.failures == 1
+        assert guider.exposure_stats.attempts == 2
+
+    def test_default_exptime(self):
+
+        exposures = Exposures()
+        asyncio.run(worker(exposures, exptime=3.0).expose_retry(nan))
+        assert exposures.exptimes == [3.0]
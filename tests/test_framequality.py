@@ -0,0 +1,64 @@
+# encoding: utf-8
+#
+# test_framequality.py
+
+import numpy as np
+from pytest import importorskip
+
+
+importorskip("astropy")
+
+from lvmagp.images import Image  # noqa: E402
+from lvmagp.images.processors.quality import FrameQuality, FrameQualityCheck  # noqa: E402
+
+
+def frame(count=20, sigma=(2.0, 2.0), peak=5000.0, seed=1):
+    rnd = np.random.default_rng(seed)
+    y, x = np.mgrid[:256, :256]
+    data = rnd.normal(1000.0, 10.0, size=(256, 256))
+    for sx, sy in rnd.uniform(20, 236, size=(count, 2)):
+        data += peak * np.exp(-(x - sx) ** 2 / (2 * sigma[0] ** 2)
+                              - (y - sy) ** 2 / (2 * sigma[1] ** 2))
+    return Image(data)
+
+
+class TestFrameQualityCheck(object):
+    """Tests for the quick frame quality check."""
+
+    def test_good(self):
+
+        image = FrameQualityCheck()(frame())
+        quality = image.get_meta(FrameQuality)
+
+        assert quality.good and quality.reasons == []
+        assert quality.sources >= 15
+        assert abs(quality.median - 1000.0) < 20.0
+
+    def test_empty(self):
+
+        quality = FrameQualityCheck().estimate(frame(count=0))
+
+        assert quality.bad
+        assert quality.reasons == ["0 sources"]
+
+    def test_saturated(self):
+
+        image = frame()
+        image.data[:128] = 65535.0
+        quality = FrameQualityCheck().estimate(image)
+
+        assert quality.bad
+        assert any(reason.startswith("saturated") for reason in quality.reasons)
+
+    def test_poor(self):
+
+        quality = FrameQualityCheck(poor_sources=50).estimate(frame())
+        assert quality.status == FrameQuality.POOR
+
+    def test_trailed(self):
+
+        quality = FrameQualityCheck().estimate(frame(sigma=(12.0, 2.0)))
+
+        assert quality.status == FrameQuality.POOR
+        assert quality.ellipticity > 0.4
+        assert quality.to_dict()["status"] == "poor"
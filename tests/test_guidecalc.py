@@ -0,0 +1,205 @@
+# encoding: utf-8
+#
+# test_guidecalc.py
+
+import asyncio
+import threading
+
+import numpy as np
+from pytest import approx, importorskip, raises
+
+
+importorskip("astropy")
+
+import astropy.units as u  # noqa: E402
+from astropy.coordinates import SkyCoord  # noqa: E402
+from astropy.io import fits  # noqa: E402
+from astropy.table import Table  # noqa: E402
+
+from lvmagp.guide.calc import GuideCalcAstrometry, GuideCalcCorrelation, GuideCalcPixel  # noqa: E402,E501
+from lvmagp.guide.calc.cameramodel import CameraModel  # noqa: E402
+from lvmagp.guide.offset.transform import sky_offset  # noqa: E402
+from lvmagp.guide.solverqueue import SolverQueue  # noqa: E402
+from lvmagp.images import Image  # noqa: E402
+
+
+# one arcsec per pixel, x towards west and y towards north
+CD = [[-1.0 / 3600, 0.0], [0.0, 1.0 / 3600]]
+POINTING = SkyCoord(ra=120.0 * u.deg, dec=-30.0 * u.deg)
+
+
+def image(camera, data=None, catalog=None):
+    header = fits.Header({"CAMNAME": camera, "RA": POINTING.ra.deg, "DEC": POINTING.dec.deg})
+    return Image(np.zeros((32, 32)) if data is None else data, header=header, catalog=catalog)
+
+
+def stars(shift=(0, 0), seed=1):
+    rnd = np.random.default_rng(seed)
+    y, x = np.mgrid[:64, :64]
+    data = np.zeros((64, 64))
+    for sx, sy in rnd.uniform(12, 52, size=(8, 2)):
+        data += np.exp(-((x - sx - shift[0]) ** 2 + (y - sy - shift[1]) ** 2) / 4.0)
+    return data
+
+
+def models():
+    return {"east": CameraModel("east", CD, (1800.0, 0.0)),
+            "west": CameraModel("west", CD, (-1800.0, 0.0))}
+
+
+class FixedShift(GuideCalcPixel):
+    """Pixel calc with a given shift instead of centroiding."""
+
+    shift = np.array([2.0, -1.0])
+
+    def _shift(self, image):
+        return self.shift
+
+
+class TestGuideCalcPixel(object):
+    """Tests for the guide offset from pixel shifts."""
+
+    def calc(self):
+        calc = FixedShift()
+        calc.models = models()
+        calc.reference_midpoint = POINTING
+        calc.reference_centroids = {"east": np.zeros((1, 2)), "west": np.zeros((1, 2))}
+        calc.reference_images = {"east": image("east", catalog=Table({"x": [1.0], "y": [2.0]}))}
+        return calc
+
+    def test_offset(self):
+
+        images, position = asyncio.run(self.calc().find_offset([image("east"), image("west")]))
+
+        east, north = POINTING.spherical_offsets_to(position)
+        assert east.arcsec == approx(-2.0, abs=1e-6)
+        assert north.arcsec == approx(-1.0, abs=1e-6)
+        assert all(img.shift.tolist() == [2.0, -1.0] for img in images)
+
+    def test_catalog(self):
+
+        calc = self.calc()
+        images, _ = asyncio.run(calc.find_offset([image("east"), image("west")]))
+
+        # frames keep their own catalog, the reference one is only attached
+        assert images[0].catalog is None and images[1].catalog is None
+        assert images[0].reference_catalog["x"].tolist() == [1.0]
+        assert images[1].reference_catalog is None
+
+    def test_cameras(self):
+
+        with raises(ValueError):
+            asyncio.run(self.calc().find_offset([image("east")]))
+
+
+class TestGuideCalcCorrelation(object):
+    """Tests for the guide offset from phase correlation."""
+
+    def calc(self, **kwargs):
+        calc = GuideCalcCorrelation(**kwargs)
+        calc.models = models()
+        asyncio.run(calc.reference_target([image("east", stars()), image("west", stars(seed=2))]))
+        return calc
+
+    def test_shift(self):
+
+        calc = self.calc()
+        shift = calc._shift(image("east", stars(shift=(3, -2))))
+        assert shift == approx([-3.0, 2.0], abs=0.1)
+
+    def test_binning(self):
+
+        calc = self.calc(binning=2)
+        shift = calc._shift(image("west", stars(shift=(-4, 6), seed=2)))
+        assert shift == approx([4.0, -6.0], abs=0.5)
+
+    def test_offset(self):
+
+        calc = self.calc()
+        frames = [image("east", stars(shift=(1, 0))), image("west", stars(shift=(1, 0), seed=2))]
+        images, position = asyncio.run(calc.find_offset(frames))
+
+        east, north = POINTING.spherical_offsets_to(position)
+        assert east.arcsec == approx(1.0, abs=0.1)
+        assert north.arcsec == approx(0.0, abs=0.1)
+        assert calc.reference_images == {}
+        assert images[0].catalog is None and images[0].reference_catalog is None
+
+
+class TestCalcMidpoint(object):
+    """Tests for the telescope pointing from the camera centers."""
+
+    def images(self, *cameras):
+        images = []
+        for camera in cameras:
+            east, north = models()[camera].position
+            img = image(camera)
+            img.center = POINTING.spherical_offsets_by(east * u.arcsec, north * u.arcsec)
+            images.append(img)
+        return images
+
+    def test_pair(self):
+
+        midpoint = GuideCalcPixel().calc_midpoint(self.images("east", "west"))
+        assert midpoint.separation(POINTING).arcsec < 0.5
+
+    def test_single(self):
+
+        calc = GuideCalcPixel()
+        with raises(ValueError):
+            calc.calc_midpoint(self.images("east"))
+
+        calc.camera_positions = {"east": (1800.0, 0.0)}
+        images = self.images("east")
+        pointing = calc.calc_midpoint(images)
+        center = images[0].center
+        assert sky_offset(pointing.ra.deg, pointing.dec.deg, center.ra.deg, center.dec.deg) \
+            == approx((1800.0, 0.0), abs=1e-3)
+
+    def test_models(self):
+
+        calc = GuideCalcPixel()
+        calc.models = models()
+        assert calc.calc_midpoint(self.images("west")).separation(POINTING).arcsec < 0.5
+
+
+class TestGuideCalcAstrometry(object):
+    """Tests for the astrometric guide offset."""
+
+    def test_queue_size(self):
+
+        calc = GuideCalcAstrometry()
+        calc.guide_pipeline = lambda img: img
+        with raises(ValueError):
+            # the frames have no solution, only the queue matters here
+            asyncio.run(calc.astrometric([image("east"), image("west"), image("north")]))
+        assert calc.solver_queue.concurrency == 3
+
+        shared = SolverQueue(concurrency=1)
+        assert GuideCalcAstrometry(solver_queue=shared).solver_queue is shared
+
+    def test_cancel(self):
+
+        solved, failed = [], threading.Event()
+
+        def pipeline(img):
+            solved.append(img.header["CAMNAME"])
+            if img.header["CAMNAME"] == "east":
+                raise ValueError("solve failed")
+            failed.wait(1.0)
+            return img
+
+        async def main():
+            calc = GuideCalcAstrometry(solver_queue=SolverQueue(concurrency=1))
+            calc.guide_pipeline = pipeline
+            try:
+                await calc.astrometric([image("east"), image("west"), image("north")])
+            finally:
+                failed.set()
+                await asyncio.sleep(0.1)
+
+        with raises(ValueError):
+            asyncio.run(main())
+
+        # west started when east failed, north is cancelled while waiting
+        assert solved == ["east", "west"]
@@ -0,0 +1,97 @@
+# encoding: utf-8
+#
+# test_image.py
+
+import copy
+import threading
+
+import numpy as np
+from pytest import importorskip
+
+
+importorskip("astropy")
+
+from astropy.io import fits  # noqa: E402
+from astropy.table import Table  # noqa: E402
+
+from lvmagp.images import Image  # noqa: E402
+
+
+def image():
+    catalog = Table({"x": [3.0, 1.0, 2.0], "y": [1.0, 2.0, 3.0]})
+    return Image(np.zeros((4, 5)), catalog=catalog)
+
+
+class TestCopyOnWrite(object):
+    """Tests for the copy-on-write components of images."""
+
+    def test_header(self):
+
+        original = image()
+        copied = original.copy()
+        copied.header["X"] = 1
+
+        assert "X" not in original.header
+        assert copied.header["X"] == 1
+        assert copied.data is original.data
+
+    def test_catalog(self):
+
+        original = image()
+        copied = copy.copy(original)
+        copied.catalog.sort("x")
+
+        assert original.catalog["x"].tolist() == [3.0, 1.0, 2.0]
+        assert copied.catalog["x"].tolist() == [1.0, 2.0, 3.0]
+
+        original.catalog.remove_row(0)
+        assert len(copied.catalog) == 3
+
+    def test_meta(self):
+
+        original = image()
+        copied = copy.deepcopy(original)
+        copied.set_meta(3.0)
+
+        assert not original.has_meta(float)
+        assert copied.get_meta(float) == 3.0
+
+    def test_callers_objects(self):
+
+        header = fits.Header({"A": 1})
+        catalog = Table({"x": [1.0]})
+        img = Image(np.zeros((2, 2)), header=header, catalog=catalog)
+        img.header["A"] = 2
+        img.catalog["x"][0] = 5.0
+
+        assert header["A"] == 1
+        assert catalog["x"][0] == 1.0
+
+    def test_setter_and_refs(self):
+
+        original = image()
+        copies = [original.copy() for _ in range(3)]
+        copies[0].header = fits.Header()
+
+        assert original._shared["header"].refs == 3
+        del copies
+        assert original._shared["header"].refs == 1
+        assert original._shared["meta"].refs == 1
+
+    def test_threads(self):
+
+        original = image()
+
+        def work():
+            for _ in range(200):
+                img = original.copy()
+                img.header["T"] = threading.get_ident()
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert "T" not in original.header
+        assert original._shared["header"].refs == 1
@@ -0,0 +1,39 @@
+# encoding: utf-8
+#
+# test_imports.py
+
+import subprocess
+import sys
+
+from pytest import importorskip
+
+
+HEAVY_MODULES = ["pandas", "scipy", "photutils", "sep", "lmfit", "astrometry", "astropy.wcs"]
+
+PROFILE = """
+import sys, time
+start = time.perf_counter()
+import lvmagp.actor.actor
+print(time.perf_counter() - start)
+print(",".join(m for m in {modules!r} if m in sys.modules))
+"""
+
+
+class TestImports(object):
+    """Import time profile of the actor, run in a fresh interpreter."""
+
+    def test_actor_import_is_lazy(self):
+
+        importorskip("clu")
+        importorskip("cluplus")
+
+        result = subprocess.run(
+            [sys.executable, "-c", PROFILE.format(modules=HEAVY_MODULES)],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        elapsed, loaded = result.stdout.strip().splitlines()[-2:]
+
+        assert loaded == ""
+        assert float(elapsed) < 1.0
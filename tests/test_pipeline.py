@@ -0,0 +1,70 @@
+# encoding: utf-8
+#
+# test_pipeline.py
+
+import asyncio
+
+import numpy as np
+from pytest import importorskip
+
+
+importorskip("astropy")
+importorskip("scipy")
+
+from lvmagp.images import Image, ImagePipeline, ImageProcessor, PipelineTiming  # noqa: E402
+from lvmagp.images.processors.filters import MedianFilter  # noqa: E402
+
+
+class Recorder(ImageProcessor):
+    """Stage remembering the dtype of the data it got."""
+
+    def __init__(self, needs_float=True):
+        self.needs_float = needs_float
+        self.dtypes = []
+
+    def __call__(self, image):
+        self.dtypes.append(image.data.dtype)
+        return image
+
+
+def image():
+    return Image(np.arange(100, dtype=np.uint16).reshape(10, 10))
+
+
+class TestImagePipeline(object):
+    """Tests for the image pipeline."""
+
+    def test_convert_after_filter(self):
+
+        raw, detection = Recorder(needs_float=False), Recorder()
+        original = image()
+        result = ImagePipeline([MedianFilter(size=3), raw, detection])(original)
+
+        assert raw.dtypes == [np.uint16]
+        assert detection.dtypes == [np.float64]
+        assert original.data.dtype == np.uint16
+        stages = list(result.get_meta(PipelineTiming).stages)
+        assert stages == ["MedianFilter", "Recorder", "convert", "Recorder2"]
+
+    def test_convert_once(self):
+
+        first, second = Recorder(), Recorder()
+        ImagePipeline([first, second], dtype=np.float32)(image())
+
+        assert first.dtypes == second.dtypes == [np.float32]
+
+    def test_keep_dtype(self):
+
+        stage = Recorder()
+        result = ImagePipeline([stage], dtype=None)(image())
+
+        assert stage.dtypes == [np.uint16]
+        assert "convert" not in result.get_meta(PipelineTiming).stages
+
+    def test_run(self):
+
+        stage = Recorder()
+        images = asyncio.run(ImagePipeline([stage]).run([image(), image()]))
+
+        assert len(images) == 2
+        assert all(img.data.dtype == np.float64 for img in images)
@@ -0,0 +1,75 @@
+# encoding: utf-8
+#
+# test_seeing.py
+
+import numpy as np
+from pytest import approx, importorskip
+
+
+importorskip("astropy")
+
+from astropy.io import fits  # noqa: E402
+from astropy.table import Table  # noqa: E402
+
+from lvmagp.guide.seeing import SeeingMonitor  # noqa: E402
+from lvmagp.images import Image  # noqa: E402
+
+
+def image(camera="east", fwhm=4.0, flux=1000.0, fwhm_column=True):
+    x, y = np.meshgrid(np.arange(10.0, 60.0, 10.0), [10.0, 30.0])
+    columns = {"x": x.ravel(), "y": y.ravel(), "flux": np.full(10, flux),
+               "peak": np.full(10, 100.0), "ellipticity": np.full(10, 0.1)}
+    if fwhm_column:
+        columns["fwhm"] = np.full(10, fwhm)
+    header = fits.Header({"CAMNAME": camera, "EXPTIME": 5.0})
+    return Image(np.zeros((64, 64)), header=header, catalog=Table(columns))
+
+
+class TestSeeingMonitor(object):
+    """Tests for the rolling seeing and transparency."""
+
+    def test_seeing(self):
+
+        monitor = SeeingMonitor(window=3, pixel_scale=0.5)
+        for fwhm in (10.0, 4.0, 4.0, 6.0):
+            monitor.update([image(fwhm=fwhm)], now=1.0)
+
+        status = monitor.status()
+        assert status["seeing"] == approx(2.0)
+        assert status["cameras"]["east"]["frames"] == 3
+        assert status["cameras"]["east"]["unit"] == "arcsec"
+
+    def test_transparency(self):
+
+        monitor = SeeingMonitor()
+        monitor.update([image("east"), image("west", fwhm=6.0)])
+        monitor.update([image("east", flux=500.0), image("west", fwhm=6.0, flux=500.0)])
+
+        status = monitor.status()
+        assert status["transparency"] == approx(0.75)
+        assert status["seeing"] == approx(5.0)
+        assert status["cameras"]["west"]["unit"] == "pixel"
+
+        monitor.reset()
+        assert monitor.status()["cameras"] == {}
+
+    def test_ignored(self):
+
+        monitor = SeeingMonitor()
+        empty = image()
+        empty.catalog = None
+        saturated = image()
+        saturated.catalog["peak"] = 65000.0
+        monitor.update([empty, saturated])
+
+        assert monitor.status() == {"seeing": None, "transparency": None, "cameras": {}}
+
+    def test_no_fwhm(self):
+
+        monitor = SeeingMonitor()
+        monitor.update([image(fwhm_column=False)])
+
+        status = monitor.status()
+        assert status["seeing"] is None
+        assert status["transparency"] == 1.0
+        assert "east" in status["warning"]
@@ -0,0 +1,94 @@
+# encoding: utf-8
+#
+# test_solvecache.py
+
+import numpy as np
+from pytest import approx, fixture, importorskip
+
+
+importorskip("astropy")
+
+from astropy.wcs import WCS  # noqa: E402
+
+from lvmagp.images.processors.astrometry import SolveCache  # noqa: E402
+
+
+CENTER = np.array([800.0, 550.0])
+
+
+@fixture
+def wcs():
+    wcs = WCS(naxis=2)
+    wcs.wcs.ctype = ["RA---TAN", "DEC--TAN"]
+    wcs.wcs.crval = [10.0, 20.0]
+    wcs.wcs.crpix = CENTER
+    wcs.wcs.cdelt = [-1 / 3600, 1 / 3600]
+    return wcs
+
+
+@fixture
+def sources():
+    return np.random.default_rng(2).uniform(0, 1600, (30, 2))
+
+
+def rotate(xy, degrees):
+    angle = np.radians(degrees)
+    rot = np.array([[np.cos(angle), -np.sin(angle)], [np.sin(angle), np.cos(angle)]])
+    return (xy - CENTER) @ rot.T + CENTER
+
+
+class TestSolveCache(object):
+    """Tests for the cache of astrometric solutions."""
+
+    def test_shifted_frame(self, wcs, sources):
+
+        cache = SolveCache()
+        cache.store("east", 10.0, 20.0, sources, wcs)
+
+        shift = np.array([12.3, -7.6])
+        noise = np.random.default_rng(3).normal(0.0, 0.2, sources.shape)
+        cached = cache.lookup("east", 10.01, 20.0, sources + shift + noise)
+
+        assert cached is not None
+        assert cached.wcs.crpix == approx(CENTER + shift, abs=0.2)
+        assert wcs.wcs.crpix == approx(CENTER)
+        assert cache.hits == 1
+
+    def test_rotated_frame(self, wcs, sources):
+
+        cache = SolveCache()
+        cache.store("east", 10.0, 20.0, sources, wcs)
+
+        assert cache.lookup("east", 10.0, 20.0, rotate(sources, 0.3) + 5.0) is None
+        assert cache.rejected == 1
+
+    def test_other_camera_and_field(self, wcs, sources):
+
+        cache = SolveCache()
+        cache.store("east", 10.0, 20.0, sources, wcs)
+        other = np.random.default_rng(4).uniform(0, 1600, (30, 2))
+
+        assert cache.lookup("west", 10.0, 20.0, sources) is None
+        assert cache.lookup("east", 10.0, 20.0, other) is None
+        assert cache.misses == 2
+
+    def test_expiry_and_eviction(self, wcs, sources):
+
+        cache = SolveCache(max_age=-1.0)
+        cache.store("east", 10.0, 20.0, sources, wcs)
+        assert cache.lookup("east", 10.0, 20.0, sources) is None
+
+        cache = SolveCache(max_entries=1)
+        cache.store("east", 10.0, 20.0, sources, wcs)
+        cache.store("east", 50.0, 20.0, sources[::-1] + 3.0, wcs)
+        assert len(cache.entries) == 1
+        assert cache.lookup("east", 10.0, 20.0, sources) is None
+
+    def test_few_sources(self, wcs, sources):
+
+        cache = SolveCache(min_matches=3)
+        cache.store("east", 10.0, 20.0, sources[:4], wcs)
+        cache.store("east", 50.0, 20.0, sources[10:14], wcs)
+
+        assert len(cache.entries) == 0
+        assert cache.lookup("east", 50.0, 20.0, sources[10:14]) is None
@@ -0,0 +1,88 @@
+# encoding: utf-8
+#
+# test_solverd.py
+
+import asyncio
+import os
+
+import numpy as np
+from pytest import importorskip, raises
+
+
+importorskip("astropy")
+
+from astropy.io import fits  # noqa: E402
+from astropy.table import Table  # noqa: E402
+
+from lvmagp.images import Image  # noqa: E402
+from lvmagp.images.processors.astrometry import (AstrometryDotLocal, SolverClient,  # noqa: E402
+                                                 SolverServer)
+
+
+FIELDS = {"CRVAL1": (120.0, "RA"), "CRVAL2": (-30.0, "DEC"), "CTYPE1": ("RA---TAN", "")}
+
+
+def solve_local(stars, ra, dec, radius, lower=0.9, upper=1.1):
+    if len(stars) < 3:
+        raise ValueError("not enough stars")
+    return dict(FIELDS, NSTARS=(len(stars), ""))
+
+
+def image():
+    catalog = Table({"x": [1.0, 2.0, 3.0], "y": [3.0, 2.0, 1.0]})
+    return Image(np.zeros((4, 4)), header=fits.Header({"RA": 120.0, "DEC": -30.0}),
+                 catalog=catalog)
+
+
+class TestSolverDaemon(object):
+    """Tests for the solver daemon and its client."""
+
+    def test_round_trip(self, tmp_path, monkeypatch):
+
+        monkeypatch.setattr(AstrometryDotLocal, "warmup", classmethod(lambda cls: None))
+        monkeypatch.setattr(AstrometryDotLocal, "solve_local", staticmethod(solve_local))
+        path = str(tmp_path / "solver.sock")
+
+        async def main():
+            server = SolverServer(path, threads=1)
+            task = asyncio.ensure_future(server.serve())
+            while not os.path.exists(path):
+                await asyncio.sleep(0.01)
+
+            client = SolverClient(path, timeout=5.0)
+            loop = asyncio.get_running_loop()
+            try:
+                solved = await loop.run_in_executor(
+                    None, lambda: client.solve([[1, 2], [3, 4], [5, 6]], ra=120.0, dec=-30.0,
+                                               radius=1.0))
+                failed = await loop.run_in_executor(
+                    None, lambda: client.solve([[1, 2]], ra=120.0, dec=-30.0, radius=1.0))
+                status = await loop.run_in_executor(None, client.status)
+            finally:
+                task.cancel()
+            return solved, failed, status
+
+        solved, failed, status = asyncio.run(main())
+
+        assert solved == dict(FIELDS, NSTARS=(3, ""))
+        assert failed is None
+        assert status == {"solved": 1, "failed": 1}
+
+    def test_no_daemon(self, tmp_path, monkeypatch):
+
+        calls = []
+        monkeypatch.setattr(AstrometryDotLocal, "solve_local",
+                            staticmethod(lambda **params: calls.append(params)))
+        path = str(tmp_path / "missing.sock")
+
+        astrometry = AstrometryDotLocal(socket=path)
+        assert astrometry.client.timeout == 5.0
+        with raises(OSError):
+            astrometry.source_solve_default(image())
+        assert calls == []
+
+        astrometry = AstrometryDotLocal(socket=path, fallback=True)
+        guide = astrometry.without_cache()
+        assert guide.source_solve_default(image()) is None
+        assert len(calls) == 1
+        assert astrometry.fallback_solves == 1
@@ -0,0 +1,123 @@
+# encoding: utf-8
+#
+# test_solverqueue.py
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from pytest import raises
+
+from lvmagp.exceptions import LvmagpSolveDropped
+from lvmagp.guide.solverqueue import SolverQueue
+
+
+def run_blocked(scenario):
+    """Run scenario(queue, blocker, order), the queue is busy until blocker is set."""
+
+    async def main():
+        executor = ThreadPoolExecutor(1)
+        queue = SolverQueue(concurrency=1, executor=executor)
+        blocker = threading.Event()
+        order = []
+
+        first = asyncio.ensure_future(queue.submit(blocker.wait))
+        await asyncio.sleep(0)
+        try:
+            return await scenario(queue, blocker, order), queue
+        finally:
+            blocker.set()
+            await first
+            executor.shutdown()
+
+    return asyncio.run(main())
+
+
+class TestSolverQueue(object):
+    """Tests for the solver queue."""
+
+    def test_result(self):
+
+        async def main():
+            return await SolverQueue().submit(sum, [1, 2, 3])
+
+        assert asyncio.run(main()) == 6
+
+    def test_priority(self):
+
+        async def scenario(queue, blocker, order):
+            jobs = [queue.submit(order.append, "guide", priority=SolverQueue.GUIDE),
+                    queue.submit(order.append, "reference", priority=SolverQueue.REFERENCE)]
+            jobs = [asyncio.ensure_future(job) for job in jobs]
+            await asyncio.sleep(0)
+            blocker.set()
+            await asyncio.gather(*jobs)
+            return order
+
+        order, queue = run_blocked(scenario)
+
+        assert order == ["reference", "guide"]
+        assert queue.completed == 3
+
+    def test_superseded(self):
+
+        async def scenario(queue, blocker, order):
+            old = asyncio.ensure_future(queue.submit(order.append, "old", key="east"))
+            await asyncio.sleep(0)
+            new = asyncio.ensure_future(queue.submit(order.append, "new", key="east"))
+            await asyncio.sleep(0)
+            blocker.set()
+            with raises(LvmagpSolveDropped):
+                await old
+            await new
+            return order
+
+        order, queue = run_blocked(scenario)
+
+        assert order == ["new"]
+        assert queue.superseded == 1
+
+    def test_max_depth(self):
+
+        async def main():
+            queue = SolverQueue(concurrency=2)
+            await queue.submit(sum, [1])
+            return queue
+
+        assert asyncio.run(main()).max_depth == 0
+
+        async def scenario(queue, blocker, order):
+            waiting = asyncio.ensure_future(queue.submit(order.append, "waiting"))
+            await asyncio.sleep(0)
+            blocker.set()
+            await waiting
+            return order
+
+        order, queue = run_blocked(scenario)
+        assert queue.max_depth == 1
+
+    def test_deadline(self):
+
+        async def scenario(queue, blocker, order):
+            late = asyncio.ensure_future(queue.submit(order.append, "late", deadline=0.01))
+            await asyncio.sleep(0.05)
+            blocker.set()
+            with raises(LvmagpSolveDropped):
+                await late
+            return order
+
+        order, queue = run_blocked(scenario)
+
+        assert order == []
+        assert queue.deadline_misses == 1
+        assert queue.to_dict()["depth"] == 0
+
+    def test_failure(self):
+
+        async def main():
+            queue = SolverQueue()
+            with raises(ZeroDivisionError):
+                await queue.submit(divmod, 1, 0)
+            return queue
+
+        assert asyncio.run(main()).failed == 1
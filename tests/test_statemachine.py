@@ -0,0 +1,70 @@
+# encoding: utf-8
+#
+# test_statemachine.py
+
+import asyncio
+
+from pytest import raises
+
+from lvmagp.actor.statemachine import ActorState, ActorStateMachine, StateInterrupted
+
+
+class TestInterruptible(object):
+    """Tests for interrupting guide stages on stop."""
+
+    def test_result(self):
+
+        async def main():
+            statemachine = ActorStateMachine()
+            statemachine.state = ActorState.GUIDE
+            return await statemachine.interruptible(asyncio.sleep(0.01, result=42))
+
+        assert asyncio.run(main()) == 42
+
+    def test_stop(self):
+
+        async def main():
+            statemachine = ActorStateMachine()
+            statemachine.state = ActorState.GUIDE
+            stage = asyncio.ensure_future(asyncio.sleep(10))
+
+            loop = asyncio.get_running_loop()
+            loop.call_later(0.01, setattr, statemachine, "state", ActorState.STOP)
+            with raises(StateInterrupted):
+                await asyncio.wait_for(statemachine.interruptible(stage), 1.0)
+            return stage
+
+        assert asyncio.run(main()).cancelled()
+
+    def test_stopped_before(self):
+
+        async def main():
+            statemachine = ActorStateMachine()
+            statemachine.state = ActorState.STOP
+            stage = asyncio.sleep(0)
+            try:
+                with raises(StateInterrupted):
+                    await statemachine.interruptible(stage)
+            finally:
+                stage.close()
+
+        asyncio.run(main())
+
+    def test_stop_task(self):
+
+        async def main():
+            statemachine = ActorStateMachine()
+
+            async def loop():
+                statemachine.state = ActorState.GUIDE
+                while True:
+                    await statemachine.interruptible(asyncio.sleep(10))
+
+            await statemachine.start(loop())
+            await asyncio.sleep(0.01)
+            await statemachine.stop()
+            return statemachine
+
+        statemachine = asyncio.run(main())
+        assert statemachine.isIdle()
+        assert statemachine.task is None
@@ -0,0 +1,69 @@
+# encoding: utf-8
+#
+# test_telemetry.py
+
+import io
+
+import numpy as np
+from pytest import approx, importorskip, raises
+
+
+importorskip("astropy")
+
+from astropy.table import Table  # noqa: E402
+
+from lvmagp.guide.telemetry import GuideTelemetry  # noqa: E402
+from lvmagp.images import Image  # noqa: E402
+
+
+def image(camera, fwhm):
+    catalog = Table({"x": [1.0, 2.0], "y": [1.0, 2.0], "fwhm": [fwhm, fwhm]})
+    img = Image(np.zeros((10, 10)), catalog=catalog)
+    img.writable("header")["CAMNAME"] = camera
+    img.shift = (1.0, -1.0)
+    return img
+
+
+class TestGuideTelemetry(object):
+    """Tests for the guide telemetry ring buffer."""
+
+    def test_ring(self):
+
+        telemetry = GuideTelemetry(size=3)
+        for t in range(5):
+            telemetry.append(float(t), state="GUIDE")
+
+        assert len(telemetry) == 3
+        assert telemetry.records()["time"].tolist() == [2.0, 3.0, 4.0]
+        assert telemetry.records(start=2.5, end=3.5)["time"].tolist() == [3.0]
+
+    def test_cameras(self):
+
+        telemetry = GuideTelemetry(size=10, max_cameras=2)
+        telemetry.append(1.0, reference=True, images=[image("east", 3.0), image("west", 4.0)],
+                         quality=[{"status": "good"}, {"status": "bad"}],
+                         correction={"axis_offset": (0.5, -0.5)})
+        telemetry.append(2.0, images=[image("west", 5.0), image("spare", 6.0)])
+
+        records = telemetry.records()
+        assert telemetry.cameras == ["east", "west"]
+        assert records["fwhm"][0] == approx([3.0, 4.0])
+        assert records["quality"][0].tolist() == [0, 2]
+        assert records["sources"][1].tolist() == [0, 2]
+        assert np.isnan(records["fwhm"][1][0]) and records["fwhm"][1][1] == approx(5.0)
+        assert records["axis_offset"][0] == approx([0.5, -0.5])
+
+        columns = telemetry.columns(records)
+        assert columns["west_fwhm"] == approx([4.0, 5.0])
+        assert columns["east_shift_0"] == approx([1.0, np.nan], nan_ok=True)
+
+    def test_export(self):
+
+        telemetry = GuideTelemetry(size=10)
+        telemetry.append(1.0, state="GUIDE")
+
+        records = np.load(io.BytesIO(telemetry.export()))
+        assert records["state"].tolist() == ["GUIDE"]
+
+        with raises(ValueError):
+            telemetry.export(format="csv")